@@ -1,104 +1,175 @@
 import json
 import os
+from collections import deque
 from datetime import datetime
+import trade_store
 
-HISTORY_FILE = "trade_history.json"
 ACCURACY_FILE = "accuracy.json"
+RECENT_TRADES_KEPT = 20
 
 # 📥 Load trade history
 def load_trade_history():
-    if os.path.exists(HISTORY_FILE):
-        with open(HISTORY_FILE, "r") as file:
-            try:
-                return json.load(file)
-            except json.JSONDecodeError:
-                print("⚠️ Error decoding trade_history.json")
-                return []
-    return []
-
-# 💾 Save accuracy report
+    try:
+        return trade_store.load_trades()
+    except Exception as e:
+        print(f"⚠️ Error loading trade history: {e}")
+        return []
+
+# 💾 Save accuracy report (also the checkpoint for incremental updates)
 def save_accuracy_report(report):
     with open(ACCURACY_FILE, "w") as file:
         json.dump(report, file, indent=4)
 
-# 📊 Evaluate accuracy of closed trades
-def evaluate_trade_accuracy():
-    trades = load_trade_history()
-    if not trades:
-        print("⚠️ No trade history found.")
+def load_accuracy_report():
+    if not os.path.exists(ACCURACY_FILE):
+        return None
+    try:
+        with open(ACCURACY_FILE, "r") as file:
+            report = json.load(file)
+    except json.JSONDecodeError:
+        print("⚠️ Error decoding accuracy.json")
+        return None
+    # Reports written before checkpoints existed are rebuilt from scratch
+    return report if "last_close_seq" in report else None
+
+def empty_report():
+    return {
+        "accuracy_percent": 0.0,
+        "total_trades": 0,
+        "wins": 0,
+        "losses": 0,
+        "win_rate": 0.0,
+        "pnl_total": 0.0,
+        "pnl_wins": 0.0,
+        "pnl_losses": 0.0,
+        "by_symbol": {},
+        "by_timeframe": {},
+        "last_close_seq": 0,
+        "history_id": None,
+        "last_updated": None,
+        "evaluated_trades": []
+    }
+
+# 🧮 Score one closed trade (None when it can't be evaluated)
+def evaluate_trade(trade):
+    if trade.get("signal") == "WAIT":
+        return None
+
+    entry = trade.get("entry_price")
+    exit_ = trade.get("exit_price")
+
+    # 🩹 Fix missing entry price fallback
+    if entry in [None, "", 0] and trade.get("signal") == "SELL":
+        entry = trade.get("price")
+
+    if entry in [None, "", 0] or exit_ in [None, "", 0]:
+        print(f"⚠️ Skipping invalid trade: {trade}")
+        return None
+
+    try:
+        entry = float(entry)
+        exit_ = float(exit_)
+        side = trade.get("signal", "").upper()
+
+        if side not in ["BUY", "SELL"]:
+            return None
+
+        pnl = (exit_ - entry) if side == "BUY" else (entry - exit_)
         return {
-            "accuracy_percent": 0.0,
-            "total_trades": 0,
-            "wins": 0,
-            "losses": 0,
-            "win_rate": 0.0,
-            "evaluated_trades": []
+            "symbol": trade.get("symbol", "UNKNOWN"),
+            "side": side,
+            "entry": round(entry, 2),
+            "exit": round(exit_, 2),
+            "pnl": round(pnl, 2),
+            "result": "WIN" if pnl > 0 else "LOSS",
+            "timestamp": trade.get("timestamp", "UNKNOWN"),
+            "timeframe": trade.get("timeframe") or "UNKNOWN",
+            "raw_pnl": pnl
         }
+    except Exception as e:
+        print(f"⚠️ Error evaluating trade: {e}")
+        return None
+
+# ➕ Fold one evaluated trade into the running aggregates
+def apply_trade(report, detail):
+    pnl = detail.pop("raw_pnl")
+    is_win = detail["result"] == "WIN"
+    report["wins" if is_win else "losses"] += 1
+    report["pnl_total"] += pnl
+    report["pnl_wins" if is_win else "pnl_losses"] += pnl
+
+    for group, key in (("by_symbol", detail["symbol"]), ("by_timeframe", detail["timeframe"])):
+        bucket = report[group].setdefault(key, {"wins": 0, "losses": 0, "pnl": 0.0})
+        bucket["wins" if is_win else "losses"] += 1
+        bucket["pnl"] += pnl
+
+    report["evaluated_trades"].append(detail)
+
+def finalize_report(report):
+    total = report["wins"] + report["losses"]
+    win_rate = (report["wins"] / total) * 100 if total > 0 else 0.0
+    report["total_trades"] = total
+    report["accuracy_percent"] = round(win_rate, 2)
+    report["win_rate"] = round(win_rate, 2)
+    report["evaluated_trades"] = report["evaluated_trades"][-RECENT_TRADES_KEPT:]
+    report["last_updated"] = datetime.utcnow().isoformat() + "Z"
+    return report
 
-    wins = 0
-    losses = 0
-    details = []
-
-    for trade in trades:
-        if trade.get("signal") == "WAIT":
-            continue
-
-        entry = trade.get("entry_price")
-        exit_ = trade.get("exit_price")
-
-        # 🩹 Fix missing entry price fallback
-        if entry in [None, "", 0] and trade.get("signal") == "SELL":
-            entry = trade.get("price")
-
-        if entry in [None, "", 0] or exit_ in [None, "", 0]:
-            print(f"⚠️ Skipping invalid trade: {trade}")
-            continue
-
-        try:
-            entry = float(entry)
-            exit_ = float(exit_)
-            side = trade.get("signal", "").upper()
-
-            if side not in ["BUY", "SELL"]:
-                continue
-
-            pnl = (exit_ - entry) if side == "BUY" else (entry - exit_)
-            is_win = pnl > 0
-            result = "WIN" if is_win else "LOSS"
-
-            if is_win:
-                wins += 1
-            else:
-                losses += 1
-
-            details.append({
-                "symbol": trade.get("symbol", "UNKNOWN"),
-                "side": side,
-                "entry": round(entry, 2),
-                "exit": round(exit_, 2),
-                "pnl": round(pnl, 2),
-                "result": result,
-                "timestamp": trade.get("timestamp", "UNKNOWN")
-            })
-
-        except Exception as e:
-            print(f"⚠️ Error evaluating trade: {e}")
-            continue
-
-    total = wins + losses
-    win_rate = (wins / total) * 100 if total > 0 else 0.0
-
-    report = {
-        "accuracy_percent": round(win_rate, 2),
-        "total_trades": total,
-        "wins": wins,
-        "losses": losses,
-        "win_rate": round(win_rate, 2),
-        "last_updated": datetime.utcnow().isoformat() + "Z",
-        "evaluated_trades": details
-    }
+# 🪪 The checkpoint only holds for the database it was taken on: a recreated or migrated
+# trade_history.db restarts its close seqs, and every close up to the old checkpoint would be skipped
+def checkpoint_matches(report, identity):
+    if not report["last_close_seq"]:
+        return True
+    return report.get("history_id") == identity and trade_store.last_close_seq() >= report["last_close_seq"]
 
+# 📊 Fold in trades closed since the last checkpoint (cost grows with new closes, not history)
+def evaluate_trade_accuracy():
+    report = load_accuracy_report() or empty_report()
+    identity = trade_store.close_log_identity()
+    reset = not checkpoint_matches(report, identity)
+    if reset:
+        print("⚠️ Trade history changed since the accuracy checkpoint, rebuilding the report")
+        report = empty_report()
+    report["history_id"] = identity
+    closed = trade_store.load_closed_trades(report["last_close_seq"])
+    if not closed:
+        if reset:
+            save_accuracy_report(finalize_report(report))
+        return report
+
+    for seq, trade in closed:
+        detail = evaluate_trade(trade)
+        if detail:
+            apply_trade(report, detail)
+        report["last_close_seq"] = seq
+
+    finalize_report(report)
     save_accuracy_report(report)
-    print(f"✅ Accuracy Report Saved: {wins}/{total} WIN → {win_rate:.2f}%")
+    print(f"✅ Accuracy Report Saved: {report['wins']}/{report['total_trades']} WIN → {report['win_rate']:.2f}%")
+    return report
 
+# 🔍 Full recompute from every closed trade (for verifying the incremental report)
+def recompute_trade_accuracy(save=False):
+    report = empty_report()
+    report["history_id"] = trade_store.close_log_identity()
+    recent = deque(maxlen=RECENT_TRADES_KEPT)
+    for seq, trade in trade_store.load_closed_trades(0):
+        detail = evaluate_trade(trade)
+        if detail:
+            apply_trade(report, detail)
+            recent.append(report["evaluated_trades"].pop())
+        report["last_close_seq"] = seq
+    report["evaluated_trades"] = list(recent)
+    finalize_report(report)
+    if save:
+        save_accuracy_report(report)
     return report
+
+def verify_accuracy_report():
+    incremental = evaluate_trade_accuracy()
+    full = recompute_trade_accuracy()
+    keys = ["wins", "losses", "total_trades", "by_symbol", "by_timeframe", "last_close_seq"]
+    matches = all(json.dumps(incremental[k], sort_keys=True) == json.dumps(full[k], sort_keys=True) for k in keys)
+    matches = matches and abs(incremental["pnl_total"] - full["pnl_total"]) < 1e-6
+    print("✅ Accuracy report matches a full recompute" if matches else "❌ Accuracy report differs from a full recompute")
+    return matches
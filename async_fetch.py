@@ -0,0 +1,78 @@
+import asyncio
+import time
+import weakref
+import aiohttp
+from http_client import (
+    CONNECT_TIMEOUT, HEADERS, LATENCY, MAX_ATTEMPTS, RETRY_STATUS, backoff_delay, host_limit, host_of
+)
+from rate_limiter import BINANCE_LIMITER
+
+MAX_CONCURRENT_REQUESTS = 32
+REQUEST_TIMEOUT = 10
+
+# 📡 One GET under the shared weight limiter (returns None after MAX_ATTEMPTS failures);
+# parse, when given, turns the raw response text into the result instead of json decoding.
+# Retries, backoff and latency stats follow the same policy as http_client.HttpClient: that client
+# serves the blocking callers (worker threads, ccxt-free REST), this one the event loop's concurrent pages.
+async def fetch_json(session, semaphore, url, params, weight=1, limiter=BINANCE_LIMITER, parse=None):
+    host = host_of(url)
+    for attempt in range(MAX_ATTEMPTS):
+        await limiter.acquire(weight)
+        retry_after = None
+        started = None
+        try:
+            async with semaphore:
+                started = time.perf_counter()
+                async with session.get(url, params=params) as response:
+                    limiter.observe_used_weight(response.headers.get("X-MBX-USED-WEIGHT-1M"))
+                    if response.status in RETRY_STATUS:
+                        retry_after = response.headers.get("Retry-After")
+                        raise aiohttp.ClientResponseError(response.request_info, (), status=response.status,
+                                                          message="retryable status")
+                    response.raise_for_status()
+                    result = parse(await response.text()) if parse is not None else await response.json()
+            LATENCY.record(host, time.perf_counter() - started)
+            return result
+        except Exception as e:
+            if started is not None:
+                LATENCY.record(host, time.perf_counter() - started, ok=False)
+            status = getattr(e, "status", None)
+            if status is not None and status not in RETRY_STATUS:
+                print(f"❌ {params}: {e}")
+                return None
+            if status in (418, 429):
+                print(f"⏳ Rate limited ({status})")
+            if attempt + 1 < MAX_ATTEMPTS:
+                delay = backoff_delay(attempt, retry_after)
+                print(f"❌ Attempt {attempt+1} failed for {params}: {e} (retrying in {delay:.1f}s)")
+                await asyncio.sleep(delay)
+            else:
+                print(f"❌ Attempt {attempt+1} failed for {params}: {e}")
+    return None
+
+# 🔌 Pooled session (callers running several batches at once can share one)
+def open_session():
+    timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT, connect=CONNECT_TIMEOUT)
+    connector = aiohttp.TCPConnector(limit=MAX_CONCURRENT_REQUESTS)
+    return aiohttp.ClientSession(timeout=timeout, connector=connector, headers=HEADERS)
+
+# 🚦 Per-host concurrency caps live with the session, so every batch sharing it
+# (main runs one per symbol) is bounded together
+HOST_SEMAPHORES = weakref.WeakKeyDictionary()  # session → {host: Semaphore}
+
+def host_semaphore(session, host):
+    semaphores = HOST_SEMAPHORES.setdefault(session, {})
+    if host not in semaphores:
+        semaphores[host] = asyncio.Semaphore(min(host_limit(host), MAX_CONCURRENT_REQUESTS))
+    return semaphores[host]
+
+# ⚡ Run every (url, params, weight) request concurrently (up to each host's limit), results in the same order
+async def fetch_json_many_async(requests, limiter=BINANCE_LIMITER, session=None, parse=None):
+    if session is None:
+        async with open_session() as session:
+            return await fetch_json_many_async(requests, limiter, session, parse)
+    tasks = [
+        fetch_json(session, host_semaphore(session, host_of(url)), url, params, weight, limiter, parse)
+        for url, params, weight in requests
+    ]
+    return await asyncio.gather(*tasks)
@@ -1,8 +1,13 @@
 import json
+import numpy as np
 import pandas as pd
-from signal_logic import generate_trade_signal
+from exit_engine import find_exits, select_non_overlapping
+from signal_logic import generate_trade_signal, generate_signal_series, generate_panel_signals
+import candle_store
 from price_data import fetch_price_data
 from news_sentiment import fetch_and_analyze_news
+from sentiment_store import SENTIMENT_STORE
+from price_data import INTERVAL_MS
 from datetime import datetime
 
 # 📊 Strategy Parameters
@@ -14,89 +19,226 @@ SL_PERCENT = 0.05     # 5% Stop Loss
 def load_symbols():
     return ["BTCUSDT", "ETHUSDT", "SOLUSDT"]
 
-def simulate_trades(symbols, timeframe="1h"):
+EXIT_MODE = "path"    # "path": first TP/SL touch on later highs/lows | "next_close": legacy one-bar check
+SAME_BAR_RULE = "sl"  # bar crossing both TP and SL: "sl", "tp" or "nearest" (to the bar's open)
+MAX_HOLD_BARS = None  # close at market after this many bars (None = hold until TP/SL)
+PER_SYMBOL_SENTIMENT = False  # True: each symbol reads only articles mentioning it (the live bot uses them all)
+
+BACKTEST_PARAMS = {
+    "trade_percent": TRADE_PERCENT,
+    "tp_percent": TP_PERCENT,
+    "sl_percent": SL_PERCENT,
+    "exit_mode": EXIT_MODE,
+    "same_bar": SAME_BAR_RULE,
+    "max_hold": MAX_HOLD_BARS
+}
+
+# 🗞 Value for one bar: news_sentiment/news_confidence are per-bar arrays (sentiment_store) or one value for the run
+def at_bar(values, i):
+    return values[i] if isinstance(values, np.ndarray) else values
+
+# 🔁 Signal bars: bar i trades on the candles before it (df.iloc[:i])
+def iter_signals(symbol, df, timeframe, news_sentiment, vectorized=True, params=None, signals=None):
+    if vectorized:
+        # ⚡ Indicators computed once over the whole series (or passed in, one signal per df row)
+        if signals is None:
+            signals = generate_signal_series(symbol, df, timeframe, news_sentiment, params)["signal"].to_numpy()
+        for i in range(50, len(df) - 1):
+            if signals[i - 1] in ("BUY", "SELL"):
+                yield i, signals[i - 1]
+        return
+
+    for i in range(50, len(df) - 1):
+        sub_df = df.iloc[:i]
+        result = generate_trade_signal(symbol, sub_df, timeframe, at_bar(news_sentiment, i - 1), params)
+        signal = result.get("signal")
+        if signal in ["BUY", "SELL"]:
+            yield i, signal
+
+# 📈 Trades for one symbol; returns (trades, wins, losses, balance)
+def backtest_symbol(symbol, df, timeframe, news_sentiment, balance, news_confidence=0.0, vectorized=True, params=None,
+                    signal_series=None):
+    params = {**BACKTEST_PARAMS, **(params or {})}
+    signals = list(iter_signals(symbol, df, timeframe, news_sentiment, vectorized, params, signal_series))
+    if params["exit_mode"] == "next_close":
+        return next_close_exits(symbol, df, signals, news_sentiment, balance, news_confidence, params)
+    return path_exits(symbol, df, signals, news_sentiment, balance, news_confidence, params)
+
+# 🛣 One position at a time, held until the first bar whose high/low reaches TP or SL
+def path_exits(symbol, df, signals, news_sentiment, balance, news_confidence, params):
+    trades = []
+    wins, losses = 0, 0
+    if not signals:
+        return trades, wins, losses, balance
+
+    entry_idx = np.array([i - 1 for i, _ in signals], dtype=np.int64)
+    sides = np.array([1 if signal == "BUY" else -1 for _, signal in signals], dtype=np.int64)
+    closes = df["close"].to_numpy(dtype=float)
+    exit_idx, exit_price, result = find_exits(
+        df["open"], df["high"], df["low"], closes, entry_idx, sides,
+        params["tp_percent"], params["sl_percent"], params["same_bar"], params["max_hold"]
+    )
+
+    taken = select_non_overlapping(entry_idx, exit_idx)
+    entry_idx, sides = entry_idx[taken], sides[taken]
+    exit_idx, exit_price, result = exit_idx[taken], exit_price[taken], result[taken]
+    entry_price = closes[entry_idx]
+
+    # 💰 Each closed trade risks trade_percent of the running balance
+    returns = sides * (exit_price - entry_price) / entry_price
+    returns[result == "OPEN"] = 0.0
+    balances = balance * np.cumprod(1 + params["trade_percent"] * returns)
+    pnls = np.diff(np.r_[balance, balances])
+
+    for k in range(len(taken)):
+        is_open = result[k] == "OPEN"
+        if not is_open:
+            if pnls[k] > 0:
+                wins += 1
+            else:
+                losses += 1
+        trades.append({
+            "symbol": symbol,
+            "signal": "BUY" if sides[k] > 0 else "SELL",
+            "entry_price": round(entry_price[k], 2),
+            "exit_price": round(exit_price[k], 2),
+            "pnl": round(pnls[k], 2),
+            "result": result[k],
+            "balance": round(balances[k], 2),
+            "entry_time": str(df.index[entry_idx[k]]),
+            "exit_time": None if is_open else str(df.index[exit_idx[k]]),
+            "bars_held": int(exit_idx[k] - entry_idx[k]),
+            "news_sentiment": at_bar(news_sentiment, entry_idx[k]),
+            "confidence": at_bar(news_confidence, entry_idx[k])
+        })
+
+    return trades, wins, losses, float(balances[-1])
+
+# 🔂 Legacy exit: every signal judged against the close two bars later; in-between moves are skipped
+def next_close_exits(symbol, df, signals, news_sentiment, balance, news_confidence, params):
+    trades = []
+    wins, losses = 0, 0
+
+    for i, signal in signals:
+        entry_price = df["close"].iloc[i - 1]
+        exit_price = df["close"].iloc[i + 1]
+        entry_time = str(df.index[i - 1])
+        exit_time = str(df.index[i + 1])
+
+        capital = balance * params["trade_percent"]
+        quantity = capital / entry_price
+        tp = entry_price * (1 + params["tp_percent"])
+        sl = entry_price * (1 - params["sl_percent"])
+
+        pnl = 0
+        result_label = "UNREALIZED"
+
+        if signal == "BUY":
+            if exit_price >= tp:
+                pnl = quantity * (tp - entry_price)
+                result_label = "TP"
+                wins += 1
+            elif exit_price <= sl:
+                pnl = quantity * (sl - entry_price)
+                result_label = "SL"
+                losses += 1
+            else:
+                result_label = "SKIPPED"
+                continue
+
+        elif signal == "SELL":
+            if exit_price <= sl:
+                pnl = quantity * (entry_price - sl)
+                result_label = "TP"
+                wins += 1
+            elif exit_price >= tp:
+                pnl = quantity * (entry_price - tp)
+                result_label = "SL"
+                losses += 1
+            else:
+                result_label = "SKIPPED"
+                continue
+
+        balance += pnl
+
+        trades.append({
+            "symbol": symbol,
+            "signal": signal,
+            "entry_price": round(entry_price, 2),
+            "exit_price": round(exit_price, 2),
+            "pnl": round(pnl, 2),
+            "result": result_label,
+            "balance": round(balance, 2),
+            "entry_time": entry_time,
+            "exit_time": exit_time,
+            "news_sentiment": at_bar(news_sentiment, i - 1),
+            "confidence": at_bar(news_confidence, i - 1)
+        })
+
+    return trades, wins, losses, balance
+
+# 🗞 Stored sentiment for every panel bar, as of each bar's close: (times,) or (symbols, times)
+def sentiment_panel(panel, timeframe):
+    close_times = panel.times + INTERVAL_MS[timeframe] - 1
+    if PER_SYMBOL_SENTIMENT:
+        return np.stack([SENTIMENT_STORE.asof(close_times, symbol)[0] for symbol in panel.symbols])
+    return SENTIMENT_STORE.asof(close_times)[0]
+
+def simulate_trades(symbols, timeframe="1h", vectorized=True):
     all_trades = []
     balance = INITIAL_BALANCE
     wins, losses = 0, 0
 
-    # 🧠 Fetch historical news sentiment once for backtest
-    news = fetch_and_analyze_news()
-    news_sentiment = news.get("sentiment", "NEUTRAL").upper()
-    news_confidence = news.get("confidence", 0.0)
-
-    print(f"\n🧠 News Sentiment for Backtest: {news_sentiment} | Confidence: {news_confidence}\n")
+    # 🧠 Sentiment as known at each bar from the stored articles; without any, today's news for every bar
+    try:
+        stored_articles = SENTIMENT_STORE.count()
+    except Exception as e:
+        print(f"⚠️ Sentiment history unavailable: {e}")
+        stored_articles = 0
+    if stored_articles:
+        print(f"\n🧠 News Sentiment for Backtest: as of each bar, from {stored_articles} stored articles\n")
+    else:
+        news = fetch_and_analyze_news()
+        news_sentiment = news.get("sentiment", "NEUTRAL").upper()
+        news_confidence = news.get("confidence", 0.0)
+        print(f"\n⚠️ No stored news history, using today's sentiment for every bar")
+        print(f"🧠 News Sentiment for Backtest: {news_sentiment} | Confidence: {news_confidence}\n")
 
+    frames = {}
     for symbol in symbols:
-        print(f"\n📈 Backtesting {symbol} on {timeframe} (90 days)...")
         df = fetch_price_data(symbol, timeframe)
-
         if df is None or len(df) < 60:
             print(f"⚠️ Not enough data for {symbol}")
             continue
+        frames[symbol] = df
 
-        for i in range(50, len(df) - 1):
-            sub_df = df.iloc[:i].copy()
-            result = generate_trade_signal(symbol, sub_df, timeframe, news_sentiment)
-            signal = result.get("signal")
+    sentiments = {}
+    for symbol, df in frames.items():
+        if stored_articles:
+            sentiment, confidence, _ = SENTIMENT_STORE.for_frame(df, symbol if PER_SYMBOL_SENTIMENT else None)
+            sentiments[symbol] = (sentiment, confidence)
+        else:
+            sentiments[symbol] = (news_sentiment, news_confidence)
 
-            if signal not in ["BUY", "SELL"]:
-                continue
+    # 🧮 Signals for every symbol in one pass over a symbol × time panel
+    panel_signals = {}
+    if vectorized and frames:
+        panel = candle_store.panel_from_frames(frames)
+        panel_sentiment = news_sentiment if not stored_articles else sentiment_panel(panel, timeframe)
+        signal_panel = generate_panel_signals(panel, panel_sentiment)["signal"]
+        for row, symbol in enumerate(panel.symbols):
+            panel_signals[symbol] = signal_panel[row, panel.mask[row]]
 
-            entry_price = sub_df["close"].iloc[-1]
-            exit_price = df["close"].iloc[i + 1]
-            entry_time = str(sub_df.index[-1])
-            exit_time = str(df.index[i + 1])
-
-            capital = balance * TRADE_PERCENT
-            quantity = capital / entry_price
-            tp = entry_price * (1 + TP_PERCENT)
-            sl = entry_price * (1 - SL_PERCENT)
-
-            pnl = 0
-            result_label = "UNREALIZED"
-
-            if signal == "BUY":
-                if exit_price >= tp:
-                    pnl = quantity * (tp - entry_price)
-                    result_label = "TP"
-                    wins += 1
-                elif exit_price <= sl:
-                    pnl = quantity * (sl - entry_price)
-                    result_label = "SL"
-                    losses += 1
-                else:
-                    result_label = "SKIPPED"
-                    continue
-
-            elif signal == "SELL":
-                if exit_price <= sl:
-                    pnl = quantity * (entry_price - sl)
-                    result_label = "TP"
-                    wins += 1
-                elif exit_price >= tp:
-                    pnl = quantity * (entry_price - tp)
-                    result_label = "SL"
-                    losses += 1
-                else:
-                    result_label = "SKIPPED"
-                    continue
-
-            balance += pnl
-
-            trade = {
-                "symbol": symbol,
-                "signal": signal,
-                "entry_price": round(entry_price, 2),
-                "exit_price": round(exit_price, 2),
-                "pnl": round(pnl, 2),
-                "result": result_label,
-                "balance": round(balance, 2),
-                "entry_time": entry_time,
-                "exit_time": exit_time,
-                "news_sentiment": news_sentiment,
-                "confidence": news_confidence
-            }
-            all_trades.append(trade)
+    for symbol, df in frames.items():
+        print(f"\n📈 Backtesting {symbol} on {timeframe} (90 days)...")
+        sentiment, confidence = sentiments[symbol]
+        trades, symbol_wins, symbol_losses, balance = backtest_symbol(
+            symbol, df, timeframe, sentiment, balance, confidence, vectorized,
+            signal_series=panel_signals.get(symbol)
+        )
+        all_trades += trades
+        wins += symbol_wins
+        losses += symbol_losses
 
     # 📂 Save trade log
     with open("backtest_results.json", "w") as f:
@@ -111,6 +253,7 @@ def simulate_trades(symbols, timeframe="1h"):
         "evaluated_trades": total_trades,
         "wins": wins,
         "losses": losses,
+        "open_trades": sum(1 for t in all_trades if t["result"] == "OPEN"),
         "win_rate": accuracy,
         "timestamp": datetime.utcnow().isoformat() + "Z"
     }
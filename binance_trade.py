@@ -1,21 +1,30 @@
 import ccxt
 import os
+from price_service import PRICE_SERVICE
+from paper_exchange import PaperExchange
 
 # 🔐 Load API keys securely from environment variables
 api_key = os.getenv("BINANCE_API_KEY")
 api_secret = os.getenv("BINANCE_API_SECRET")
 
-# ✅ Initialize Binance Futures client (LIVE)
-binance = ccxt.binance({
-    'apiKey': api_key,
-    'secret': api_secret,
-    'enableRateLimit': True,
-    'options': {
-        'defaultType': 'future',        # USDT-M Futures
-        'defaultMarket': 'linear',
-        'adjustForTimeDifference': True
-    }
-})
+# 🧪 PAPER_TRADING=1 sends every order to the in-process simulated exchange instead
+PAPER_TRADING = os.getenv("PAPER_TRADING", "0") == "1"
+PAPER_BALANCE = float(os.getenv("PAPER_BALANCE", "10000"))
+
+if PAPER_TRADING:
+    binance = PaperExchange(balances={"USDT": PAPER_BALANCE}, price_source=PRICE_SERVICE.get_price)
+else:
+    # ✅ Initialize Binance Futures client (LIVE)
+    binance = ccxt.binance({
+        'apiKey': api_key,
+        'secret': api_secret,
+        'enableRateLimit': True,
+        'options': {
+            'defaultType': 'future',        # USDT-M Futures
+            'defaultMarket': 'linear',
+            'adjustForTimeDifference': True
+        }
+    })
 
 # ⚠️ DO NOT set sandbox or override URLs in LIVE mode
 
@@ -25,11 +34,11 @@ def format_symbol(symbol):
         return symbol
     return f"{symbol[:-4]}/{symbol[-4:]}"  # BTCUSDT → BTC/USDT
 
-# 📉 Fetch current market price
+# 📉 Fetch current market price from the exchange the orders go to
+# (PRICE_SERVICE's testnet snapshot is for analysis only, never for sizing or slippage checks)
 def get_price(symbol):
     try:
-        market_symbol = format_symbol(symbol)
-        ticker = binance.fetch_ticker(market_symbol)
+        ticker = binance.fetch_ticker(format_symbol(symbol))
         price = float(ticker["last"])
         print(f"📉 Live price for {symbol}: {price}")
         return price
@@ -37,6 +46,11 @@ def get_price(symbol):
         print(f"⚠️ Error fetching price for {symbol}: {e}")
         return None
 
+# 📡 Streamed prices also move the paper exchange (fills resting limit orders)
+def feed_price(symbol, price):
+    if PAPER_TRADING:
+        binance.update_price(symbol, price)
+
 # 💰 Get current available balance in USDT
 def get_balance(asset="USDT"):
     try:
@@ -0,0 +1,57 @@
+import heapq
+import math
+import threading
+import time
+from price_data import INTERVAL_MS
+
+SETTLE_DELAY = 5  # seconds after a close before the candle is treated as final
+
+# ⏱ Next candle close (epoch seconds) for an interval; Binance aligns candles to the epoch in UTC
+def next_close(interval, now):
+    step = INTERVAL_MS[interval] / 1000
+    return (math.floor(now / step) + 1) * step
+
+# 🕯 Fires (symbol, timeframe) jobs right after their timeframe's candle closes
+class CandleScheduler:
+    def __init__(self, jobs, callback, settle_delay=SETTLE_DELAY, clock=time.time):
+        self.jobs = list(jobs)
+        self.callback = callback
+        self.settle_delay = settle_delay
+        self.clock = clock
+        self._queue = []
+        self._stop = threading.Event()
+        now = clock()
+        for interval in sorted({tf for _, tf in self.jobs}, key=INTERVAL_MS.get):
+            heapq.heappush(self._queue, (next_close(interval, now) + settle_delay, interval))
+
+    def seconds_until_next(self, now=None):
+        now = self.clock() if now is None else now
+        return max(0.0, self._queue[0][0] - now) if self._queue else None
+
+    def run_pending(self, now=None):
+        now = self.clock() if now is None else now
+        due = set()
+        while self._queue and self._queue[0][0] <= now:
+            fire_at, interval = heapq.heappop(self._queue)
+            due.add(interval)
+            heapq.heappush(self._queue, (next_close(interval, fire_at) + self.settle_delay, interval))
+
+        if not due:
+            return []
+        jobs = [(symbol, tf) for symbol, tf in self.jobs if tf in due]
+        print(f"🕯 Candle close: {', '.join(sorted(due, key=INTERVAL_MS.get))} | {len(jobs)} jobs")
+        try:
+            self.callback(jobs)
+        except Exception as e:
+            print(f"❌ Scheduled job failed: {e}")
+        return jobs
+
+    def run_forever(self, max_sleep=60):
+        while not self._stop.is_set():
+            wait = self.seconds_until_next()
+            # Wake up at least every max_sleep seconds so clock jumps are picked up
+            self._stop.wait(max_sleep if wait is None else min(wait, max_sleep))
+            self.run_pending()
+
+    def stop(self):
+        self._stop.set()
@@ -0,0 +1,196 @@
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+
+STORE_DIR = "candle_data"
+
+# 📦 One fixed-width binary record per candle (Binance's unused "ignore" column is dropped)
+CANDLE_DTYPE = np.dtype([
+    ("open_time", "<i8"),
+    ("open", "<f8"),
+    ("high", "<f8"),
+    ("low", "<f8"),
+    ("close", "<f8"),
+    ("volume", "<f8"),
+    ("close_time", "<i8"),
+    ("quote_asset_volume", "<f8"),
+    ("number_of_trades", "<i8"),
+    ("taker_buy_base", "<f8"),
+    ("taker_buy_quote", "<f8")
+])
+
+# 📊 Frame columns by default: OHLCV + close_time (the only ones the strategy reads)
+FRAME_FIELDS = ["open", "high", "low", "close", "volume", "close_time"]
+PRICE_FIELDS = ["open", "high", "low", "close", "volume", "quote_asset_volume", "taker_buy_base", "taker_buy_quote"]
+KLINE_PUNCTUATION = str.maketrans("", "", '"[] \n')
+
+def store_path(symbol, interval):
+    return os.path.join(STORE_DIR, f"{symbol.upper()}_{interval}.bin")
+
+# 🔄 Raw Binance klines → typed records
+def klines_to_records(raw_klines):
+    records = np.empty(len(raw_klines), dtype=CANDLE_DTYPE)
+    if not raw_klines:
+        return records
+    columns = list(zip(*raw_klines))
+    for i, name in enumerate(CANDLE_DTYPE.names):
+        records[name] = np.asarray(columns[i], dtype=CANDLE_DTYPE[name])
+    return records
+
+# ⚡ Raw klines JSON text → typed records, without building a Python object per value
+# (every kline field is a number or a quoted number, so the text is one flat float list);
+# a body that isn't a whole klines array (HTML error page, truncated transfer) raises ValueError
+def parse_klines(text):
+    text = text.strip()
+    if not (text.startswith("[") and text.endswith("]")):
+        raise ValueError(f"Not a klines array: {text[:80]!r}")
+    flat = np.fromstring(text.translate(KLINE_PUNCTUATION), sep=",")
+    if not flat.size:
+        return np.empty(0, dtype=CANDLE_DTYPE)
+    values = flat.reshape(-1, len(CANDLE_DTYPE.names) + 1)  # + Binance's unused "ignore" column
+    records = np.empty(len(values), dtype=CANDLE_DTYPE)
+    for i, name in enumerate(CANDLE_DTYPE.names):
+        records[name] = values[:, i]
+    return records
+
+# 📥 Memory-mapped candles, optionally from start_time (epoch ms) onward
+def load_candles(symbol, interval, start_time=None):
+    path = store_path(symbol, interval)
+    if not os.path.exists(path) or os.path.getsize(path) < CANDLE_DTYPE.itemsize:
+        return np.empty(0, dtype=CANDLE_DTYPE)
+    records = np.memmap(path, dtype=CANDLE_DTYPE, mode="r")
+    if start_time is not None:
+        records = records[np.searchsorted(records["open_time"], start_time):]
+    return records
+
+# 💾 Save klines (raw lists or parsed records): top-ups are written in place, backfills are merged.
+# The file is never shrunk or truncated: other threads may still hold a memmap of it
+# (load_candles), and touching a truncated page would kill them with SIGBUS.
+def save_candles(symbol, interval, raw_klines):
+    new = raw_klines if isinstance(raw_klines, np.ndarray) else klines_to_records(raw_klines)
+    if not len(new):
+        return 0
+
+    os.makedirs(STORE_DIR, exist_ok=True)
+    path = store_path(symbol, interval)
+    existing = load_candles(symbol, interval)
+
+    if len(existing) and new["open_time"][0] >= existing["open_time"][-1]:
+        # 📎 Top-up: rewrite the last stored candle when the batch re-sends it (it may have been
+        # open when saved), then append; the file only grows, so existing mappings stay valid
+        offset = len(existing) - 1 if new["open_time"][0] == existing["open_time"][-1] else len(existing)
+        del existing
+        with open(path, "r+b") as f:
+            f.seek(offset * CANDLE_DTYPE.itemsize)
+            f.write(new.tobytes())
+        return len(new)
+
+    if len(existing) and new["open_time"][0] >= existing["open_time"][0]:
+        # 🔁 Replaces candles inside the stored range: rewrite into a new file
+        keep = int(np.searchsorted(existing["open_time"], new["open_time"][0]))
+        newer = existing[existing["open_time"] > new["open_time"][-1]]
+        merged = np.concatenate([np.asarray(existing[:keep]), new, np.asarray(newer)])
+    elif len(existing):
+        newer = existing[existing["open_time"] > new["open_time"][-1]]
+        merged = np.concatenate([new, np.asarray(newer)])
+    else:
+        merged = new
+    del existing
+    # A unique temp name, so two writers saving the same series can't clobber each other's file
+    fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp", dir=STORE_DIR)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(merged.tobytes())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return len(new)
+
+# 📊 Records → the DataFrame layout fetch_price_data returns (open_time index, only the chosen fields;
+# price/volume columns as dtype, float32 halves them again when full float64 precision isn't needed)
+def to_frame(records, fields=FRAME_FIELDS, dtype=np.float64):
+    columns = {}
+    for name in fields:
+        if name in ("open_time", "close_time"):
+            columns[name] = pd.to_datetime(np.asarray(records[name]), unit="ms")
+        elif name in PRICE_FIELDS:
+            columns[name] = np.asarray(records[name], dtype=dtype)
+        else:
+            columns[name] = np.asarray(records[name])
+    index = pd.DatetimeIndex(pd.to_datetime(np.asarray(records["open_time"]), unit="ms"), name="open_time")
+    return pd.DataFrame(columns, index=index)
+
+PANEL_FIELDS = ["open", "high", "low", "close", "volume"]
+
+# 🧮 Symbols × timestamps arrays on one shared time axis
+class CandlePanel:
+    """
+    fields[name] is a (symbols, times) float64 array and mask marks the bars a
+    symbol really has. A missing bar after a symbol's first candle is filled as a
+    flat candle at the previous close with zero volume; before it, values are NaN.
+    """
+    def __init__(self, symbols, times, fields, mask):
+        self.symbols = list(symbols)
+        self.times = times
+        self.fields = fields
+        self.mask = mask
+
+    def __getitem__(self, name):
+        return self.fields[name]
+
+    def __len__(self):
+        return len(self.times)
+
+    # Column of each symbol's first and last real bar (-1 when it has none)
+    def first_valid(self):
+        has_any = self.mask.any(axis=1)
+        return np.where(has_any, np.argmax(self.mask, axis=1), -1)
+
+    def last_valid(self):
+        has_any = self.mask.any(axis=1)
+        return np.where(has_any, len(self.times) - 1 - np.argmax(self.mask[:, ::-1], axis=1), -1)
+
+    def row(self, symbol):
+        return self.symbols.index(symbol)
+
+# 🧩 Align per-symbol candles ({symbol: records or dict of arrays with "open_time"}) on the union of open times
+def align_panel(series, fields=PANEL_FIELDS):
+    symbols = list(series)
+    open_times = [np.asarray(series[s]["open_time"], dtype=np.int64) for s in symbols]
+    times = np.unique(np.concatenate(open_times)) if open_times else np.empty(0, dtype=np.int64)
+
+    shape = (len(symbols), len(times))
+    mask = np.zeros(shape, dtype=bool)
+    raw = {name: np.full(shape, np.nan) for name in fields}
+    for row, symbol in enumerate(symbols):
+        columns = np.searchsorted(times, open_times[row])
+        mask[row, columns] = True
+        for name in fields:
+            raw[name][row, columns] = series[symbol][name]
+
+    # 🩹 Gaps: carry the previous close forward as a flat, zero-volume candle
+    last_seen = np.maximum.accumulate(np.where(mask, np.arange(len(times)), -1), axis=1)
+    started = last_seen >= 0
+    rows = np.arange(len(symbols))[:, None]
+    carried_close = np.where(started, raw["close"][rows, np.maximum(last_seen, 0)], np.nan) if "close" in raw else None
+    panel_fields = {}
+    for name in fields:
+        if name == "volume":
+            filled = np.where(mask, raw[name], np.where(started, 0.0, np.nan))
+        elif name in ("open", "high", "low", "close") and carried_close is not None:
+            filled = np.where(mask, raw[name], carried_close)
+        else:
+            filled = raw[name]
+        panel_fields[name] = np.ascontiguousarray(filled)
+    return CandlePanel(symbols, times, panel_fields, mask)
+
+# 📊 Panel from DataFrames laid out like to_frame (datetime open_time index)
+def panel_from_frames(frames, fields=PANEL_FIELDS):
+    series = {}
+    for symbol, df in frames.items():
+        columns = {name: df[name].to_numpy(dtype=float) for name in fields}
+        columns["open_time"] = df.index.asi8 // 1_000_000
+        series[symbol] = columns
+    return align_panel(series, fields)
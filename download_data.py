@@ -1,7 +1,16 @@
-import requests
-import pandas as pd
+import argparse
+import asyncio
+import json
 import os
-from datetime import datetime
+import time
+import numpy as np
+import pandas as pd
+import candle_store
+from candle_store import CANDLE_DTYPE
+from async_fetch import fetch_json_many_async, open_session
+from price_data import INTERVAL_MS
+from rate_limiter import SPOT_LIMITER, SPOT_KLINE_WEIGHT
+from resampler import base_interval, resample_records
 
 BASE_URL = "https://api.binance.com/api/v3/klines"
 
@@ -9,41 +18,175 @@ symbols = ["BTCUSDT", "ETHUSDT", "SOLUSDT"]
 intervals = ["30m", "1h"]
 limit = 1000  # max allowed
 
-INTERVAL_MAP = {
-    "30m": "30m",
-    "1h": "1h"
-}
-
-def fetch_klines(symbol, interval):
-    params = {
-        "symbol": symbol,
-        "interval": interval,
-        "limit": limit
-    }
-    response = requests.get(BASE_URL, params=params)
-    data = response.json()
-
-    ohlc = []
-    for entry in data:
-        ohlc.append({
-            "timestamp": datetime.fromtimestamp(entry[0] / 1000).strftime('%Y-%m-%d %H:%M:%S'),
-            "open": float(entry[1]),
-            "high": float(entry[2]),
-            "low": float(entry[3]),
-            "close": float(entry[4]),
-            "volume": float(entry[5])
-        })
-
-    return pd.DataFrame(ohlc)
-
-def save_data(symbol, interval):
-    df = fetch_klines(symbol, interval)
-    os.makedirs("historical_data", exist_ok=True)
-    filename = f"historical_data/{symbol}_{interval}.csv"
-    df.to_csv(filename, index=False)
-    print(f"✅ Saved {symbol} ({interval}) to {filename}")
+OUT_DIR = "historical_data"
+BATCH_PAGES = 200  # pages fetched between checkpoints
+
+def history_path(symbol, interval, out_dir=OUT_DIR):
+    return os.path.join(out_dir, f"{symbol}_{interval}.npz")
+
+def partial_path(symbol, interval, out_dir=OUT_DIR):
+    return os.path.join(out_dir, f"{symbol}_{interval}.part")
+
+def checkpoint_path(out_dir=OUT_DIR):
+    return os.path.join(out_dir, "checkpoint.json")
+
+# 📑 Page start times covering [start_time, end_time), limit candles each
+def plan_pages(interval, start_time, end_time):
+    step = INTERVAL_MS[interval]
+    first = start_time // step * step
+    return list(range(first, end_time, limit * step))
+
+# 🔖 Checkpoint: {"<symbol> <interval>": {"start": ms, "end": ms, "from": ms, "done": [page start, ...]}}
+def load_checkpoint(out_dir=OUT_DIR):
+    try:
+        with open(checkpoint_path(out_dir)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        print(f"⚠️ Ignoring unreadable checkpoint: {e}")
+        return {}
+
+def save_checkpoint(state, out_dir=OUT_DIR):
+    tmp_path = checkpoint_path(out_dir) + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, checkpoint_path(out_dir))
+
+# 🧹 Sorted by open_time, one record per candle (later pages win on overlap)
+def dedupe(records):
+    records = records[np.argsort(records["open_time"], kind="stable")]
+    keep = np.r_[records["open_time"][1:] != records["open_time"][:-1], True]
+    return records[keep]
+
+# 💾 One compressed array per candle field, plus the start of the window that was requested
+# (a symbol listed later than that has no older candles to fetch)
+def save_history(records, path, covered_from):
+    tmp_path = path + ".tmp.npz"
+    np.savez_compressed(tmp_path, covered_from=covered_from, **{name: records[name] for name in CANDLE_DTYPE.names})
+    os.replace(tmp_path, path)
+
+def history_covered_from(symbol, interval, out_dir=OUT_DIR):
+    path = history_path(symbol, interval, out_dir)
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as data:
+        return int(data["covered_from"]) if "covered_from" in data else None
+
+def load_history_records(symbol, interval, out_dir=OUT_DIR):
+    path = history_path(symbol, interval, out_dir)
+    if not os.path.exists(path):
+        return np.empty(0, dtype=CANDLE_DTYPE)
+    with np.load(path) as data:
+        records = np.empty(len(data["open_time"]), dtype=CANDLE_DTYPE)
+        for name in CANDLE_DTYPE.names:
+            records[name] = data[name]
+    return records
+
+# 📊 Saved history in the fetch_price_data DataFrame layout
+def load_history(symbol, interval, out_dir=OUT_DIR, dtype=np.float64):
+    records = load_history_records(symbol, interval, out_dir)
+    if not len(records):
+        return pd.DataFrame()
+    return candle_store.to_frame(records, dtype=dtype)
+
+# ⚡ Every missing page of every series, fetched concurrently in checkpointed batches
+async def download_pages(series, state, out_dir=OUT_DIR):
+    pending = []
+    for symbol, interval in series:
+        job = state[f"{symbol} {interval}"]
+        done = set(job["done"])
+        for page_start in plan_pages(interval, job["start"], job["end"]):
+            if page_start not in done:
+                pending.append((symbol, interval, page_start))
+    total = len(pending)
+    print(f"📡 {total} pages to fetch for {len(series)} series")
+
+    async with open_session() as session:
+        for offset in range(0, total, BATCH_PAGES):
+            batch = pending[offset:offset + BATCH_PAGES]
+            requests_to_send = []
+            for symbol, interval, page_start in batch:
+                job = state[f"{symbol} {interval}"]
+                params = {
+                    "symbol": symbol,
+                    "interval": interval,
+                    "startTime": page_start,
+                    "endTime": min(page_start + limit * INTERVAL_MS[interval], job["end"]) - 1,
+                    "limit": limit
+                }
+                requests_to_send.append((BASE_URL, params, SPOT_KLINE_WEIGHT))
+            pages = await fetch_json_many_async(requests_to_send, SPOT_LIMITER, session, candle_store.parse_klines)
+
+            # 📎 Append each series' pages to its staging file, then record them as done
+            fetched = {}
+            for (symbol, interval, page_start), raw_data in zip(batch, pages):
+                if raw_data is None:
+                    continue
+                fetched.setdefault((symbol, interval), []).append((page_start, raw_data))
+            for (symbol, interval), results in fetched.items():
+                with open(partial_path(symbol, interval, out_dir), "ab") as f:
+                    for _, records in results:
+                        f.write(records.tobytes())
+                state[f"{symbol} {interval}"]["done"] += [page_start for page_start, _ in results]
+            save_checkpoint(state, out_dir)
+
+            failed = sum(raw_data is None for raw_data in pages)
+            print(f"✅ {min(offset + len(batch), total)}/{total} pages" + (f" | {failed} failed, retried next run" if failed else ""))
+
+# 🔁 Merge staged pages into each series' history file (plus resampled coarser intervals)
+def finish_series(symbol, base, derived, covered_from, out_dir=OUT_DIR):
+    staged = np.fromfile(partial_path(symbol, base, out_dir), dtype=CANDLE_DTYPE) \
+        if os.path.exists(partial_path(symbol, base, out_dir)) else np.empty(0, dtype=CANDLE_DTYPE)
+    records = dedupe(np.concatenate([load_history_records(symbol, base, out_dir), staged]))
+    save_history(records, history_path(symbol, base, out_dir), covered_from)
+    for tf in derived:
+        save_history(resample_records(records, tf), history_path(symbol, tf, out_dir), covered_from)
+    if os.path.exists(partial_path(symbol, base, out_dir)):
+        os.remove(partial_path(symbol, base, out_dir))
+    print(f"💾 {symbol}: {len(records)} {base} candles" + (f" → {', '.join(derived)}" if derived else ""))
+
+# 📥 Download [now - days, now) for every symbol; rerunning the same command resumes an interrupted run
+def download_history(symbols, intervals, days=365, out_dir=OUT_DIR):
+    os.makedirs(out_dir, exist_ok=True)
+    base = base_interval(intervals)
+    derived = [tf for tf in intervals if tf != base]
+    state = load_checkpoint(out_dir)
+
+    end_time = int(time.time() * 1000) // INTERVAL_MS[base] * INTERVAL_MS[base]
+    start_time = end_time - days * 86_400_000
+    series = [(symbol, base) for symbol in symbols]
+    for symbol, interval in series:
+        key = f"{symbol} {interval}"
+        if key in state:
+            print(f"♻️ Resuming {symbol} {interval}: {len(state[key]['done'])} pages already saved")
+        else:
+            # Only what the history file doesn't already hold
+            stored = load_history_records(symbol, interval, out_dir)
+            covered_from = history_covered_from(symbol, interval, out_dir)
+            job = {"start": start_time, "end": end_time, "from": start_time, "done": []}
+            if len(stored) and covered_from is not None and covered_from <= start_time:
+                job["start"], job["from"] = int(stored["open_time"][-1]), covered_from
+            state[key] = job
+    save_checkpoint(state, out_dir)
+
+    asyncio.run(download_pages(series, state, out_dir))
+
+    for symbol, interval in series:
+        job = state[f"{symbol} {interval}"]
+        if len(job["done"]) < len(plan_pages(interval, job["start"], job["end"])):
+            print(f"⚠️ {symbol} {interval} is incomplete, run again to resume")
+            continue
+        finish_series(symbol, base, derived, job["from"], out_dir)
+        del state[f"{symbol} {interval}"]
+        save_checkpoint(state, out_dir)
 
 if __name__ == "__main__":
-    for sym in symbols:
-        for tf in intervals:
-            save_data(sym, INTERVAL_MAP[tf])
+    parser = argparse.ArgumentParser(description="Bulk Binance kline downloader (resumable)")
+    parser.add_argument("--symbols", nargs="+", default=symbols)
+    parser.add_argument("--intervals", nargs="+", default=intervals,
+                        help="the finest interval is downloaded, the rest are resampled from it")
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--out", default=OUT_DIR)
+    args = parser.parse_args()
+    download_history(args.symbols, args.intervals, args.days, args.out)
@@ -0,0 +1,111 @@
+import numpy as np
+
+SAME_BAR_RULES = ("sl", "tp", "nearest")
+
+# 🧱 Sparse table: table[k][p] = max(values[p:p + 2**k]) (windows running past the end are clipped)
+def build_max_table(values):
+    values = np.asarray(values, dtype=float)
+    table = [values]
+    width = 1
+    while width * 2 <= len(values):
+        prev = table[-1]
+        shifted = np.full(len(values), -np.inf)
+        shifted[:len(values) - width] = prev[width:]
+        table.append(np.maximum(prev, shifted))
+        width *= 2
+    return table
+
+# 🔎 First index j >= start with values[j] >= level, for many (start, level) pairs at once
+def first_at_or_above(table, starts, levels):
+    """
+    Binary lifting over the sparse table: each step jumps 2**k bars ahead while the
+    window's max stays below the level. Returns len(values) where the level is never reached.
+    """
+    n = len(table[0])
+    pos = np.asarray(starts, dtype=np.int64).copy()
+    levels = np.asarray(levels, dtype=float)
+    for k in range(len(table) - 1, -1, -1):
+        inside = pos < n
+        window_max = np.full(len(pos), np.inf)
+        window_max[inside] = table[k][pos[inside]]
+        pos = np.where(window_max < levels, np.minimum(pos + (1 << k), n), pos)
+    return pos
+
+# 🎯 First TP/SL hit for every candidate entry (bar index of the entry candle, side +1 long / -1 short)
+def find_exits(open_, high, low, close, entry_idx, sides, tp_percent, sl_percent, same_bar="sl", max_hold=None,
+               high_table=None, low_table=None):
+    """
+    Walks forward from the bar after entry and returns (exit_idx, exit_price, result) arrays.
+    result is "TP", "SL", "TIMEOUT" (max_hold bars passed, exit at that bar's close)
+    or "OPEN" (neither level reached before the data ends).
+    same_bar decides bars that cross both levels: "sl" (conservative), "tp",
+    or "nearest" (the level closer to the bar's open is assumed to trade first).
+    """
+    if same_bar not in SAME_BAR_RULES:
+        raise ValueError(f"same_bar must be one of {SAME_BAR_RULES}")
+    open_ = np.asarray(open_, dtype=float)
+    high = np.asarray(high, dtype=float)
+    low = np.asarray(low, dtype=float)
+    close = np.asarray(close, dtype=float)
+    entry_idx = np.asarray(entry_idx, dtype=np.int64)
+    sides = np.asarray(sides, dtype=np.int64)
+    n = len(close)
+
+    high_table = high_table or build_max_table(high)
+    low_table = low_table or build_max_table(-low)
+
+    entry = close[entry_idx]
+    is_long = sides > 0
+    tp_price = np.where(is_long, entry * (1 + tp_percent), entry * (1 - tp_percent))
+    sl_price = np.where(is_long, entry * (1 - sl_percent), entry * (1 + sl_percent))
+    start = entry_idx + 1
+
+    # Longs: TP on the high, SL on the low. Shorts: the other way round.
+    up_hit = first_at_or_above(high_table, start, np.where(is_long, tp_price, sl_price))
+    down_hit = first_at_or_above(low_table, start, -np.where(is_long, sl_price, tp_price))
+    tp_hit = np.where(is_long, up_hit, down_hit)
+    sl_hit = np.where(is_long, down_hit, up_hit)
+
+    exit_idx = np.minimum(tp_hit, sl_hit)
+    takes_tp = tp_hit < sl_hit
+    both = (tp_hit == sl_hit) & (tp_hit < n)
+    if same_bar == "tp":
+        takes_tp |= both
+    elif same_bar == "nearest":
+        bar_open = open_[np.minimum(exit_idx, n - 1)]
+        takes_tp |= both & (np.abs(tp_price - bar_open) < np.abs(sl_price - bar_open))
+
+    result = np.where(takes_tp, "TP", "SL").astype(object)
+    exit_price = np.where(takes_tp, tp_price, sl_price)
+    # A bar that opens beyond the level fills at its open, not at the level
+    exit_open = open_[np.minimum(exit_idx, n - 1)]
+    gapped = np.where(is_long == takes_tp, exit_open >= exit_price, exit_open <= exit_price) & (exit_idx < n)
+    exit_price = np.where(gapped, exit_open, exit_price)
+
+    if max_hold is not None:
+        timeout = np.minimum(entry_idx + max_hold, n - 1)
+        timed_out = (exit_idx > timeout) & (entry_idx + max_hold < n)
+        exit_idx = np.where(timed_out, timeout, exit_idx)
+        exit_price = np.where(timed_out, close[timeout], exit_price)
+        result[timed_out] = "TIMEOUT"
+
+    still_open = exit_idx >= n
+    exit_idx = np.where(still_open, n - 1, exit_idx)
+    exit_price = np.where(still_open, close[n - 1], exit_price)
+    result[still_open] = "OPEN"
+    return exit_idx, exit_price, result
+
+# 🔒 One position at a time: skip candidates that fire before the previous trade has exited
+# (a new entry may open on the close of the bar the previous trade exited in)
+def select_non_overlapping(entry_idx, exit_idx):
+    taken = []
+    free_from = -1
+    pos = 0
+    while pos < len(entry_idx):
+        pos += int(np.searchsorted(entry_idx[pos:], free_from, side="left"))
+        if pos >= len(entry_idx):
+            break
+        taken.append(pos)
+        free_from = exit_idx[pos]
+        pos += 1
+    return np.asarray(taken, dtype=np.int64)
@@ -0,0 +1,164 @@
+import bisect
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+
+CONNECT_TIMEOUT = 3.05
+READ_TIMEOUT = 10
+MAX_ATTEMPTS = 4
+BACKOFF_BASE = 0.5    # seconds; attempt n waits a random time up to BACKOFF_BASE * 2 ** n
+BACKOFF_CAP = 15
+RETRY_STATUS = {418, 429, 500, 502, 503, 504}
+
+# 🚦 Requests in flight per host (also the size of that host's keep-alive pool)
+HOST_LIMITS = {
+    "testnet.binancefuture.com": 16,
+    "fapi.binance.com": 16,
+    "api.binance.com": 16,
+    "newsapi.org": 2
+}
+DEFAULT_HOST_LIMIT = 8
+
+LATENCY_BUCKETS_MS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+
+HEADERS = {"Accept-Encoding": "gzip, deflate"}
+
+def host_of(url):
+    return urlsplit(url).hostname or ""
+
+def host_limit(host):
+    return HOST_LIMITS.get(host, DEFAULT_HOST_LIMIT)
+
+# ⏳ Full-jitter exponential backoff; a server's Retry-After wins when it sends one
+def backoff_delay(attempt, retry_after=None):
+    if retry_after is not None:
+        try:
+            return float(retry_after)
+        except (TypeError, ValueError):
+            pass
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+# 📊 Request latencies per host, bucketed (bucket i counts requests ≤ LATENCY_BUCKETS_MS[i]; the last is overflow)
+class LatencyHistogram:
+    def __init__(self, buckets=LATENCY_BUCKETS_MS):
+        self.buckets = list(buckets)
+        self.counts = {}   # host → [count per bucket] + [overflow]
+        self.errors = {}   # host → failed attempts
+        self._lock = threading.Lock()
+
+    def record(self, host, seconds, ok=True):
+        with self._lock:
+            counts = self.counts.setdefault(host, [0] * (len(self.buckets) + 1))
+            counts[bisect.bisect_left(self.buckets, seconds * 1000)] += 1
+            if not ok:
+                self.errors[host] = self.errors.get(host, 0) + 1
+
+    # Upper bound of the bucket holding the q-th quantile (None once it is in the overflow bucket)
+    def quantile(self, host, q):
+        counts = self.counts.get(host)
+        if not counts or not sum(counts):
+            return None
+        target = q * sum(counts)
+        seen = 0
+        for i, count in enumerate(counts):
+            seen += count
+            if seen >= target:
+                return self.buckets[i] if i < len(self.buckets) else None
+        return None
+
+    def summary(self):
+        with self._lock:
+            hosts = list(self.counts)
+        return {
+            host: {
+                "requests": sum(self.counts[host]),
+                "errors": self.errors.get(host, 0),
+                "p50_ms": self.quantile(host, 0.5),
+                "p95_ms": self.quantile(host, 0.95),
+                "p99_ms": self.quantile(host, 0.99)
+            }
+            for host in hosts
+        }
+
+    def report(self):
+        for host, stats in self.summary().items():
+            print(f"📊 {host}: {stats['requests']} requests, {stats['errors']} errors | "
+                  f"p50 ≤ {stats['p50_ms']}ms | p95 ≤ {stats['p95_ms']}ms | p99 ≤ {stats['p99_ms']}ms")
+
+LATENCY = LatencyHistogram()
+
+# 🌐 Blocking HTTP with one keep-alive pool per host, a per-host concurrency cap, retries and timings
+class HttpClient:
+    def __init__(self, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT), max_attempts=MAX_ATTEMPTS, latency=LATENCY):
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self.latency = latency
+        self._sessions = {}    # host → requests.Session
+        self._slots = {}       # host → BoundedSemaphore
+        self._lock = threading.Lock()
+
+    def _session(self, host):
+        with self._lock:
+            if host not in self._sessions:
+                session = requests.Session()
+                session.headers.update(HEADERS)
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=host_limit(host))
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self._sessions[host] = session
+                self._slots[host] = threading.BoundedSemaphore(host_limit(host))
+            return self._sessions[host], self._slots[host]
+
+    def get(self, url, params=None, weight=1, limiter=None, timeout=None, label=None):
+        """
+        Returns the successful response, or None once every attempt has failed.
+        limiter (a rate_limiter.TokenBucket) is charged `weight` before each attempt
+        and synced from Binance's X-MBX-USED-WEIGHT-1M header.
+        """
+        host = host_of(url)
+        session, slots = self._session(host)
+        label = label or host
+        for attempt in range(self.max_attempts):
+            if limiter is not None:
+                limiter.acquire_sync(weight)
+            retry_after = None
+            started = None
+            try:
+                with slots:
+                    started = time.perf_counter()
+                    response = session.get(url, params=params, timeout=timeout or self.timeout)
+                    elapsed = time.perf_counter() - started
+                if limiter is not None:
+                    limiter.observe_used_weight(response.headers.get("X-MBX-USED-WEIGHT-1M"))
+                if response.status_code in RETRY_STATUS:
+                    retry_after = response.headers.get("Retry-After")
+                    raise requests.HTTPError(f"{response.status_code} from {host}", response=response)
+                response.raise_for_status()
+                self.latency.record(host, elapsed)
+                return response
+            except Exception as e:
+                if started is not None:
+                    self.latency.record(host, time.perf_counter() - started, ok=False)
+                status = getattr(getattr(e, "response", None), "status_code", None)
+                if status is not None and status not in RETRY_STATUS:
+                    print(f"❌ {label}: {e}")
+                    return None
+                if attempt + 1 < self.max_attempts:
+                    delay = backoff_delay(attempt, retry_after)
+                    print(f"❌ Attempt {attempt+1} failed for {label}: {e} (retrying in {delay:.1f}s)")
+                    time.sleep(delay)
+                else:
+                    print(f"❌ Attempt {attempt+1} failed for {label}: {e}")
+        return None
+
+    def close(self):
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+            self._slots.clear()
+
+HTTP_CLIENT = HttpClient()
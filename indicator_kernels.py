@@ -0,0 +1,179 @@
+# ⚙️ Indicator kernels on float64 NumPy arrays (no pandas objects in between).
+# Every kernel works along the last axis, so a 2-D (symbols × candles) array is
+# computed in one call. Values match the `ta` package within float rounding
+# (checked by kernel_parity.py) and warm-up candles are NaN.
+# Each output depends only on inputs up to its candle, so a kernel run on
+# df.iloc[:k + 1] returns exactly element k of the full-series run.
+# Each kernel's *_lookback(…, tolerance) gives the candles it needs before its
+# last value is within tolerance (relative) of a run on the full history.
+import numpy as np
+
+def _as_array(values):
+    return np.ascontiguousarray(values, dtype=np.float64)
+
+NEGLIGIBLE_WEIGHT = 1e-18  # far below float64 resolution relative to the newer terms
+LOOKBACK_TOLERANCE = 1e-4  # default relative error a shortened history may leave
+
+# 🔁 y[t] = decay * y[t - 1] + gain * x[t], seeded with y[0] = seed
+def linear_recurrence(values, decay, gain=1.0, seed=None):
+    """
+    Log-depth prefix scan (Hillis-Steele): after the pass with shift d every y[t]
+    holds the weighted sum of x[t - 2d + 1 .. t], so about log2(n) array passes
+    replace the per-candle Python loop. Passes stop once decay ** d is negligible.
+    """
+    y = _as_array(values) * gain
+    y[..., 0] = _as_array(values)[..., 0] if seed is None else seed
+    scratch = np.empty_like(y)
+    coef = float(decay)
+    shift = 1
+    n = y.shape[-1]
+    while shift < n and abs(coef) > NEGLIGIBLE_WEIGHT:
+        carried = scratch[..., :n - shift]
+        np.multiply(y[..., :n - shift], coef, out=carried)
+        y[..., shift:] += carried
+        coef *= coef
+        shift *= 2
+    return y
+
+# ⏳ Candles until a recurrence with this decay forgets its starting value to within tolerance
+def settle_bars(decay, tolerance):
+    if decay <= 0:
+        return 0
+    return int(np.ceil(np.log(tolerance) / np.log(decay)))
+
+def _first_valid(values):
+    finite = np.isfinite(values)
+    first = np.argmax(finite, axis=-1)
+    return np.where(finite.any(axis=-1), first, values.shape[-1])
+
+# 📈 EMA with pandas ewm(adjust=False) semantics: starts at the first non-NaN value
+# (leading NaNs only; a NaN after that propagates to every later value)
+def ewm(values, alpha, min_periods=1):
+    values = _as_array(values)
+    n = values.shape[-1]
+    if n == 0:
+        return values.copy()
+    first = _first_valid(values)
+    index = np.arange(n)
+    before = index < first[..., None]
+    start = index == first[..., None]
+
+    init = np.where(before, 0.0, alpha * values)
+    init = np.where(start, values, init)
+    out = linear_recurrence(init, 1 - alpha, 1.0)
+    out[before | (index < first[..., None] + min_periods - 1)] = np.nan
+    return out
+
+# 📈 EMA (ta.trend.EMAIndicator); warmup=False starts at the first candle like ewm(span=window, adjust=False)
+def ema(values, window, warmup=True):
+    return ewm(values, 2.0 / (window + 1), window if warmup else 1)
+
+def ema_lookback(window, tolerance=LOOKBACK_TOLERANCE):
+    return window + settle_bars(1 - 2.0 / (window + 1), tolerance)
+
+# 📉 MACD line, signal line and histogram (ta.trend.MACD)
+def macd(close, fast=12, slow=26, signal=9, warmup=True):
+    line = ema(close, fast, warmup) - ema(close, slow, warmup)
+    signal_line = ema(line, signal, warmup)
+    return line, signal_line, line - signal_line
+
+# The signal line smooths a line that is still settling, so both stages are counted
+def macd_lookback(fast=12, slow=26, signal=9, tolerance=LOOKBACK_TOLERANCE):
+    return max(ema_lookback(fast, tolerance), ema_lookback(slow, tolerance)) + ema_lookback(signal, tolerance)
+
+# 📊 RSI with Wilder smoothing (ta.momentum.RSIIndicator)
+def rsi(close, window=14):
+    close = _as_array(close)
+    diff = np.full(close.shape, np.nan)
+    diff[..., 1:] = np.diff(close, axis=-1)
+    up = np.where(diff > 0, diff, 0.0)
+    down = np.where(diff < 0, -diff, 0.0)
+    ema_up = ewm(up, 1.0 / window, window)
+    ema_down = ewm(down, 1.0 / window, window)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(ema_down == 0, 100.0, 100 - 100 / (1 + ema_up / ema_down))
+
+def rsi_lookback(window=14, tolerance=LOOKBACK_TOLERANCE):
+    return window + 1 + settle_bars(1 - 1.0 / window, tolerance)
+
+# 📀 Bollinger middle, upper and lower bands (ta.volatility.BollingerBands, population std)
+def bollinger(close, window=20, window_dev=2):
+    close = _as_array(close)
+    mavg = np.full(close.shape, np.nan)
+    mstd = np.full(close.shape, np.nan)
+    n = close.shape[-1]
+    if n >= window:
+        # Two passes of shifted-slice sums: window sum, then squared deviations from the window mean
+        count = n - window + 1
+        total = close[..., :count].copy()
+        for k in range(1, window):
+            total += close[..., k:k + count]
+        mean = total / window
+        squares = (close[..., :count] - mean) ** 2
+        for k in range(1, window):
+            squares += (close[..., k:k + count] - mean) ** 2
+        mavg[..., window - 1:] = mean
+        mstd[..., window - 1:] = np.sqrt(squares / window)
+    return mavg, mavg + window_dev * mstd, mavg - window_dev * mstd
+
+# Fixed window: exact once it is full
+def bollinger_lookback(window=20, tolerance=LOOKBACK_TOLERANCE):
+    return window
+
+# 🔠 ADX (ta.trend.ADXIndicator: summed seed, Wilder smoothing; first value on candle 2 * window - 1)
+def adx(high, low, close, window=14):
+    high, low, close = _as_array(high), _as_array(low), _as_array(close)
+    n = close.shape[-1]
+    out = np.full(close.shape, np.nan)
+    if n < 2 * window:
+        return out
+
+    prev_close = close[..., :-1]
+    true_range = np.maximum(high[..., 1:], prev_close) - np.minimum(low[..., 1:], prev_close)
+    diff_up = high[..., 1:] - high[..., :-1]
+    diff_down = low[..., :-1] - low[..., 1:]
+    pos = np.where((diff_up > diff_down) & (diff_up > 0), diff_up, 0.0)
+    neg = np.where((diff_down > diff_up) & (diff_down > 0), diff_down, 0.0)
+
+    # Smoothed sums: element i covers candles 1 .. window + i
+    decay = 1 - 1.0 / window
+    smoothed = []
+    for moves in (true_range, pos, neg):
+        series = moves[..., window - 1:].copy()
+        series[..., 0] = moves[..., :window].sum(axis=-1)
+        smoothed.append(linear_recurrence(series, decay, 1.0))
+    trs, dip, din = smoothed
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        di_pos = np.where(trs != 0, 100 * dip / trs, 0.0)
+        di_neg = np.where(trs != 0, 100 * din / trs, 0.0)
+        dx = np.where(di_pos + di_neg != 0, 100 * np.abs((di_pos - di_neg) / (di_pos + di_neg)), 0.0)
+
+    # ADX: mean of the first window DX values, then Wilder smoothing of the rest
+    series = dx[..., window - 1:].copy()
+    series[..., 0] = dx[..., :window].mean(axis=-1)
+    out[..., 2 * window - 1:] = linear_recurrence(series, decay, 1.0 / window)
+    return out
+
+# Wilder sums, then the Wilder-smoothed DX: both stages have to settle
+def adx_lookback(window=14, tolerance=LOOKBACK_TOLERANCE):
+    return 2 * window + 2 * settle_bars(1 - 1.0 / window, tolerance)
+
+# 🔍 Mean of the previous `window` values (NaN until at least one exists; shorter at the start)
+def trailing_mean(values, window):
+    values = _as_array(values)
+    sums = np.cumsum(values, axis=-1)
+    out = np.full(values.shape, np.nan)
+    n = values.shape[-1]
+    if n < 2:
+        return out
+    index = np.arange(1, n)
+    lagged = np.zeros(values.shape[:-1] + (n - 1,))
+    if n - 1 > window:
+        lagged[..., window:] = sums[..., :n - 1 - window]
+    counts = np.minimum(index, window)
+    out[..., 1:] = (sums[..., :-1] - lagged) / counts
+    return out
+
+def trailing_mean_lookback(window, tolerance=LOOKBACK_TOLERANCE):
+    return window + 1
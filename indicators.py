@@ -1,23 +1,20 @@
+import numpy as np
 import pandas as pd
+import indicator_kernels as kernels
 
 # ============================ 🔹 MACD 🔹 ============================
 
 def macd(df):
     try:
-        df = df.copy()
-
         if 'close' not in df.columns or len(df) < 35:
             return "neutral"  # Not enough data to calculate MACD
 
-        df['EMA12'] = df['close'].ewm(span=12, adjust=False).mean()
-        df['EMA26'] = df['close'].ewm(span=26, adjust=False).mean()
-        df['MACD'] = df['EMA12'] - df['EMA26']
-        df['Signal'] = df['MACD'].ewm(span=9, adjust=False).mean()
+        line, signal, _ = kernels.macd(df['close'], 12, 26, 9, warmup=False)
 
         # Detect crossover
-        if df['MACD'].iloc[-1] > df['Signal'].iloc[-1] and df['MACD'].iloc[-2] <= df['Signal'].iloc[-2]:
+        if line[-1] > signal[-1] and line[-2] <= signal[-2]:
             return "buy"
-        elif df['MACD'].iloc[-1] < df['Signal'].iloc[-1] and df['MACD'].iloc[-2] >= df['Signal'].iloc[-2]:
+        elif line[-1] < signal[-1] and line[-2] >= signal[-2]:
             return "sell"
         else:
             return "neutral"
@@ -28,71 +25,84 @@ def macd(df):
 
 # ======================= 📦 ORDER BLOCK DETECTION =======================
 
+# 🧮 Per-candle order blocks from candle 3 on: bearish = green then red, bullish = red then green
+def _order_block_flags(df):
+    opens = df['open'].to_numpy(dtype=float)
+    closes = df['close'].to_numpy(dtype=float)
+    green = closes > opens
+    red = closes < opens
+    bearish = np.zeros(len(df), dtype=bool)
+    bullish = np.zeros(len(df), dtype=bool)
+    bearish[3:] = green[2:-1] & red[3:]
+    bullish[3:] = red[2:-1] & green[3:]
+    return bullish, bearish
+
+def _order_block_state(bullish_count, bearish_count):
+    return np.where(bullish_count > bearish_count, "bullish",
+                    np.where(bearish_count > bullish_count, "bearish", "neutral"))
+
 def detect_order_blocks(df):
     try:
         if not {'open', 'close', 'high', 'low'}.issubset(df.columns):
             return "neutral"
 
-        bullish_blocks = []
-        bearish_blocks = []
-
-        for i in range(3, len(df)):
-            prev_candle = df.iloc[i - 1]
-            curr_candle = df.iloc[i]
-
-            # Detect bearish OB: green candle followed by red candle
-            if prev_candle['close'] > prev_candle['open'] and curr_candle['close'] < curr_candle['open']:
-                bearish_blocks.append(curr_candle['high'])
-
-            # Detect bullish OB: red candle followed by green candle
-            elif prev_candle['close'] < prev_candle['open'] and curr_candle['close'] > curr_candle['open']:
-                bullish_blocks.append(curr_candle['low'])
-
-        if bullish_blocks and not bearish_blocks:
-            return "bullish"
-        elif bearish_blocks and not bullish_blocks:
-            return "bearish"
-        elif len(bullish_blocks) > len(bearish_blocks):
-            return "bullish"
-        elif len(bearish_blocks) > len(bullish_blocks):
-            return "bearish"
-        else:
-            return "neutral"
+        bullish, bearish = _order_block_flags(df)
+        return str(_order_block_state(bullish.sum(), bearish.sum()))
     except Exception as e:
         print(f"❌ Order Block error: {e}")
         return "neutral"
 
+# 📦 Full series: row k matches detect_order_blocks(df.iloc[:k + 1]), plus the latest block levels
+def order_block_series(df):
+    bullish, bearish = _order_block_flags(df)
+    bullish_count = np.cumsum(bullish)
+    bearish_count = np.cumsum(bearish)
+    return pd.DataFrame({
+        "bullish_block": bullish,
+        "bearish_block": bearish,
+        "bullish_blocks": bullish_count,
+        "bearish_blocks": bearish_count,
+        "last_bullish_low": pd.Series(np.where(bullish, df['low'].to_numpy(dtype=float), np.nan)).ffill().to_numpy(),
+        "last_bearish_high": pd.Series(np.where(bearish, df['high'].to_numpy(dtype=float), np.nan)).ffill().to_numpy(),
+        "state": _order_block_state(bullish_count, bearish_count)
+    }, index=df.index)
+
 
 # ====================== 🔨 BREAK OF STRUCTURE (BOS) ======================
 
+# 🧮 BOS_UP when a high breaks the previous 3-candle high, else BOS_DOWN on a low break (from candle 2 on)
+def _bos_flags(df):
+    highs = df['high'].to_numpy(dtype=float)
+    lows = df['low'].to_numpy(dtype=float)
+    prev_high = np.full(len(df), np.nan)
+    prev_low = np.full(len(df), np.nan)
+    if len(df) >= 4:
+        prev_high[3:] = np.maximum(np.maximum(highs[:-3], highs[1:-2]), highs[2:-1])
+        prev_low[3:] = np.minimum(np.minimum(lows[:-3], lows[1:-2]), lows[2:-1])
+    bos_up = highs > prev_high
+    bos_down = ~bos_up & (lows < prev_low)
+    return bos_up, bos_down, highs, lows
+
+# 🔨 Full series: the BOS event (if any) on every candle
+def bos_series(df):
+    bos_up, bos_down, highs, lows = _bos_flags(df)
+    return pd.DataFrame({
+        "bos": np.where(bos_up, "BOS_UP", np.where(bos_down, "BOS_DOWN", None)),
+        "price": np.where(bos_up, highs, np.where(bos_down, lows, np.nan))
+    }, index=df.index)
+
 def detect_bos(df):
     try:
         if not {'high', 'low'}.issubset(df.columns):
             return []
 
-        highs = df['high'].rolling(window=3).max()
-        lows = df['low'].rolling(window=3).min()
-
-        bos_points = []
-
-        for i in range(2, len(df)):
-            # BOS Up: current high > previous rolling high
-            if df['high'].iloc[i] > highs.iloc[i - 1]:
-                bos_points.append({
-                    "type": "BOS_UP",
-                    "price": float(df['high'].iloc[i]),
-                    "index": i
-                })
-
-            # BOS Down: current low < previous rolling low
-            elif df['low'].iloc[i] < lows.iloc[i - 1]:
-                bos_points.append({
-                    "type": "BOS_DOWN",
-                    "price": float(df['low'].iloc[i]),
-                    "index": i
-                })
-
-        return bos_points[-20:] if bos_points else []
+        bos_up, bos_down, highs, lows = _bos_flags(df)
+        events = np.flatnonzero(bos_up | bos_down)[-20:]
+        return [
+            {"type": "BOS_UP", "price": float(highs[i]), "index": int(i)} if bos_up[i]
+            else {"type": "BOS_DOWN", "price": float(lows[i]), "index": int(i)}
+            for i in events
+        ]
     except Exception as e:
         print(f"❌ BOS error: {e}")
         return []
@@ -0,0 +1,132 @@
+import sys
+import timeit
+import numpy as np
+import pandas as pd
+from ta.trend import MACD, EMAIndicator, ADXIndicator
+from ta.momentum import RSIIndicator
+from ta.volatility import BollingerBands
+import indicator_kernels as kernels
+
+RTOL = 1e-9
+ATOL = 1e-9
+
+# 🧪 Random-walk candles standing in for a 90-day frame (seeded, so runs are repeatable)
+def sample_frame(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, rows)))
+    open_ = np.r_[close[0], close[:-1]]
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.004, rows)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.004, rows)))
+    volume = rng.lognormal(3, 0.5, rows)
+    index = pd.date_range("2025-01-01", periods=rows, freq="30min")
+    return pd.DataFrame({"open": open_, "high": high, "low": low, "close": close, "volume": volume}, index=index)
+
+# 📋 (name, ta version, kernel version) pairs over the same frame
+def cases(df):
+    close, high, low = df["close"], df["high"], df["low"]
+    closes, highs, lows = close.to_numpy(), high.to_numpy(), low.to_numpy()
+    return [
+        ("ema_9", lambda: EMAIndicator(close=close, window=9).ema_indicator(), lambda: kernels.ema(closes, 9)),
+        ("ema_20", lambda: EMAIndicator(close=close, window=20).ema_indicator(), lambda: kernels.ema(closes, 20)),
+        ("macd_diff", lambda: MACD(close=close).macd_diff(), lambda: kernels.macd(closes)[2]),
+        ("macd_signal", lambda: MACD(close=close).macd_signal(), lambda: kernels.macd(closes)[1]),
+        ("rsi_14", lambda: RSIIndicator(close=close, window=14).rsi(), lambda: kernels.rsi(closes, 14)),
+        ("bollinger_h", lambda: BollingerBands(close=close, window=20, window_dev=2).bollinger_hband(),
+         lambda: kernels.bollinger(closes, 20, 2)[1]),
+        ("bollinger_l", lambda: BollingerBands(close=close, window=20, window_dev=2).bollinger_lband(),
+         lambda: kernels.bollinger(closes, 20, 2)[2]),
+        # ta fills ADX warm-up with zeros; compared from candle 27 on
+        ("adx_14", lambda: ADXIndicator(high=high, low=low, close=close).adx().iloc[27:],
+         lambda: kernels.adx(highs, lows, closes)[27:]),
+    ]
+
+def compare(expected, actual):
+    expected = np.asarray(expected, dtype=float)
+    same_nan = np.array_equal(np.isnan(expected), np.isnan(actual))
+    return same_nan and np.allclose(expected, actual, rtol=RTOL, atol=ATOL, equal_nan=True)
+
+# ✅ Kernels vs ta, prefix runs vs the full run, and a 2-D batch vs per-row runs
+def check_parity(rows=4320, seeds=(0, 1, 2)):
+    failures = []
+    for seed in seeds:
+        df = sample_frame(rows, seed)
+        for name, reference, kernel in cases(df):
+            if not compare(reference(), kernel()):
+                failures.append(f"{name} (seed {seed}) differs from ta")
+
+    df = sample_frame(rows, 0)
+    closes = df["close"].to_numpy()
+    full_rsi = kernels.rsi(closes)
+    full_adx = kernels.adx(df["high"].to_numpy(), df["low"].to_numpy(), closes)
+    for k in (30, 100, 1000, rows - 1):
+        if not np.array_equal(kernels.rsi(closes[:k + 1])[-1], full_rsi[k], equal_nan=True):
+            failures.append(f"rsi prefix {k} differs from the full run")
+        if not np.array_equal(kernels.adx(df["high"].to_numpy()[:k + 1], df["low"].to_numpy()[:k + 1], closes[:k + 1])[-1],
+                              full_adx[k], equal_nan=True):
+            failures.append(f"adx prefix {k} differs from the full run")
+
+    batch = np.stack([sample_frame(rows, seed)["close"].to_numpy() for seed in seeds])
+    if not np.array_equal(kernels.macd(batch)[2], np.stack([kernels.macd(row)[2] for row in batch]), equal_nan=True):
+        failures.append("2-D macd differs from per-row runs")
+    return failures
+
+# ✂️ Each kernel on only its *_lookback candles vs the full history, at several end candles
+def check_lookback(rows=4320, seeds=(0, 1, 2), tolerance=kernels.LOOKBACK_TOLERANCE):
+    failures = []
+    for seed in seeds:
+        df = sample_frame(rows, seed)
+        highs, lows, closes = (df[name].to_numpy() for name in ("high", "low", "close"))
+        # (name, candles, kernel on candles [start:end], scale the error is relative to)
+        checks = [
+            ("ema_20", kernels.ema_lookback(20, tolerance), lambda s, e: kernels.ema(closes[s:e], 20), closes),
+            ("macd_diff", kernels.macd_lookback(tolerance=tolerance), lambda s, e: kernels.macd(closes[s:e])[2], closes),
+            ("rsi_14", kernels.rsi_lookback(14, tolerance), lambda s, e: kernels.rsi(closes[s:e]), 100.0),
+            ("bollinger_h", kernels.bollinger_lookback(20, tolerance), lambda s, e: kernels.bollinger(closes[s:e])[1], closes),
+            ("adx_14", kernels.adx_lookback(14, tolerance), lambda s, e: kernels.adx(highs[s:e], lows[s:e], closes[s:e]), 100.0),
+        ]
+        for name, bars, kernel, scale in checks:
+            full = kernel(0, rows)
+            for end in (bars + 500, rows // 2, rows):
+                error = abs(kernel(end - bars, end)[-1] - full[end - 1])
+                limit = tolerance * (scale if np.isscalar(scale) else abs(scale[end - 1]))
+                if not error <= limit:
+                    failures.append(f"{name} on its last {bars} candles is off by {error:.3g} at candle {end - 1} (seed {seed})")
+    return failures
+
+# ⏱ Per-call time of each ta indicator vs its kernel
+def benchmark(rows=4320, repeat=5, number=20):
+    df = sample_frame(rows, 0)
+    print(f"\n⏱ {rows} candles, best of {repeat} × {number} calls")
+    print(f"{'indicator':<14}{'ta (ms)':>10}{'kernel (ms)':>13}{'speedup':>10}")
+    for name, reference, kernel in cases(df):
+        ta_ms = min(timeit.repeat(reference, repeat=repeat, number=number)) / number * 1000
+        kernel_ms = min(timeit.repeat(kernel, repeat=repeat, number=number)) / number * 1000
+        print(f"{name:<14}{ta_ms:>10.3f}{kernel_ms:>13.3f}{ta_ms / kernel_ms:>9.1f}×")
+
+# ⏱ Many symbols: one ta call per frame vs one kernel call on the stacked (symbols × candles) arrays
+def benchmark_batch(rows=4320, symbols=50, repeat=3):
+    frames = [sample_frame(rows, seed) for seed in range(symbols)]
+    closes = np.stack([df["close"].to_numpy() for df in frames])
+    highs = np.stack([df["high"].to_numpy() for df in frames])
+    lows = np.stack([df["low"].to_numpy() for df in frames])
+    batches = [
+        ("macd_diff", lambda: [MACD(close=df["close"]).macd_diff() for df in frames], lambda: kernels.macd(closes)[2]),
+        ("rsi_14", lambda: [RSIIndicator(close=df["close"]).rsi() for df in frames], lambda: kernels.rsi(closes)),
+        ("adx_14", lambda: [ADXIndicator(high=df["high"], low=df["low"], close=df["close"]).adx() for df in frames],
+         lambda: kernels.adx(highs, lows, closes)),
+    ]
+    print(f"\n⏱ {symbols} symbols × {rows} candles in one call, best of {repeat}")
+    print(f"{'indicator':<14}{'ta (ms)':>10}{'kernel (ms)':>13}{'speedup':>10}")
+    for name, reference, kernel in batches:
+        ta_ms = min(timeit.repeat(reference, repeat=repeat, number=1)) * 1000
+        kernel_ms = min(timeit.repeat(kernel, repeat=repeat, number=1)) * 1000
+        print(f"{name:<14}{ta_ms:>10.1f}{kernel_ms:>13.1f}{ta_ms / kernel_ms:>9.1f}×")
+
+if __name__ == "__main__":
+    failures = check_parity() + check_lookback()
+    for failure in failures:
+        print(f"❌ {failure}")
+    print("✅ All kernels match ta" if not failures else f"❌ {len(failures)} parity failures")
+    benchmark()
+    benchmark_batch()
+    sys.exit(1 if failures else 0)
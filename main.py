@@ -1,9 +1,15 @@
 from flask import Flask, render_template
 from news_sentiment import fetch_and_analyze_news
-from price_data import fetch_price_data
-from signal_logic import analyze_technical
+from price_data import fetch_price_data_many_async
+from price_service import PRICE_SERVICE
+from async_fetch import open_session
+from http_client import LATENCY
+from resampler import RESAMPLER, base_interval, base_bars
+import market_stream
+from signal_logic import closed_candles, confirm_signal, required_bars, READING_KEYS
+from streaming_indicators import StreamingSignalEngine
 from whatsapp_alert import send_whatsapp_message
-from binance_trade import place_order, get_price, get_balance
+from binance_trade import place_order, get_price, get_balance, feed_price
 from portfolio_manager import (
     check_position, update_position,
     get_portfolio, save_portfolio,
@@ -11,133 +17,244 @@ from portfolio_manager import (
 )
 from trade_logger import log_trade, update_exit_price
 from accuracy_tracker import evaluate_trade_accuracy
-import schedule
+from candle_scheduler import CandleScheduler
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import functools
+import os
 import threading
 import time
 
+SYMBOLS = ["BTCUSDT", "ETHUSDT", "SOLUSDT"]
+TIMEFRAMES = ["30m", "1h"]
+LIVE_BARS = required_bars()  # closed candles per series the live signal needs (not the 90-day history)
+BASE_INTERVAL = base_interval(TIMEFRAMES)  # the only interval downloaded; the others are resampled from it
+
 app = Flask(__name__)
 dashboard_data = {}
+latest_results = {}  # (symbol, timeframe) → last analysis of that timeframe
+final_signals = {}   # symbol → last combined signal shown on the dashboard
+signal_engines = {}  # (symbol, timeframe) → StreamingSignalEngine fed each closed candle once
+
+# 📡 STREAMING=1 checks SL/TP on every streamed trade, on top of the polled exit check
+STREAMING = os.getenv("STREAMING", "0") == "1"
+STREAM_URL = os.getenv("BINANCE_STREAM_URL", market_stream.STREAM_URL)  # e.g. ws://127.0.0.1:8765/stream for stream_standin.py
+live_stream = None
+TRADE_LOCK = threading.Lock()  # one order/exit at a time across the analysis cycle and the stream
+EXIT_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="stream-exit")
+pending_exits = set()
+EXIT_CHECK_INTERVAL = 15 * 60  # seconds between polled SL/TP checks, whatever the candle closes (and as a stream fallback)
 
 @app.route("/")
 def dashboard():
     return render_template("index.html", data=dashboard_data or {})
 
-def run_full_analysis():
+# ⏱ Seconds each pipeline stage may take before the cycle carries on without it
+STAGE_TIMEOUTS = {
+    "news": 20,
+    "accuracy": 10,
+    "balance": 10,
+    "prices": 10,
+    "candles": 30
+}
+
+# Blocking calls (requests/ccxt/sqlite) run here; a hung call can't hold up asyncio.run's shutdown
+STAGE_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix="analysis")
+
+def in_thread(func, *args):
+    return asyncio.get_running_loop().run_in_executor(STAGE_EXECUTOR, functools.partial(func, *args))
+
+# ⏱ Await one stage; a timeout or error falls back to default instead of stalling the cycle
+async def run_stage(name, awaitable, default, label=""):
+    try:
+        return await asyncio.wait_for(awaitable, STAGE_TIMEOUTS[name])
+    except asyncio.TimeoutError:
+        print(f"⏱ {name} {label} timed out after {STAGE_TIMEOUTS[name]}s, continuing without it")
+    except Exception as e:
+        print(f"❌ {name} {label} failed: {e}")
+    return default
+
+# 🧱 One download of the base series, then every requested timeframe resampled from the store
+async def fetch_symbol_frames(symbol, timeframes, session):
+    bars = base_bars(BASE_INTERVAL, timeframes, LIVE_BARS)
+    await fetch_price_data_many_async([(symbol, BASE_INTERVAL)], session=session, bars=bars)
+    return {(symbol, tf): RESAMPLER.frame(symbol, tf, LIVE_BARS + 1, base=BASE_INTERVAL) for tf in timeframes}
+
+# 🔍 Signals for one symbol: fetched timeframes are analysed, the rest reuse their last readings
+def analyze_symbol(symbol, price_frames, news_sentiment):
+    print(f"\n🔍 Analyzing {symbol}...\n")
+    all_timeframes = {}
+    for tf in TIMEFRAMES:
+        try:
+            if (symbol, tf) in price_frames:
+                # ⚡ Only the candles closed since the last cycle go through the indicators
+                engine = signal_engines.setdefault((symbol, tf), StreamingSignalEngine(symbol, tf))
+                if not engine.catch_up(closed_candles(price_frames[(symbol, tf)])):
+                    raise ValueError(f"No candles for {symbol} {tf}")
+                tf_result = engine.signal(news_sentiment)
+            elif (symbol, tf) in latest_results:
+                # ♻️ No new close on this timeframe: re-confirm its last readings against fresh news
+                readings = {key: latest_results[(symbol, tf)][key] for key in READING_KEYS}
+                tf_result = confirm_signal(symbol, tf, readings, news_sentiment)
+            else:
+                continue
+            latest_results[(symbol, tf)] = tf_result
+            all_timeframes[tf] = tf_result
+            print(f"✅ {symbol} @ {tf} | Signal: {tf_result.get('signal')} | MACD: {tf_result.get('macd_signal')} | EMA: {tf_result.get('ema_signal')} | RSI: {round(tf_result.get('rsi', 0), 2)}")
+        except Exception as e:
+            print(f"❌ Error analyzing {symbol} on {tf}: {e}")
+
+    best_tf = next((tf for tf, res in all_timeframes.items() if res.get("confirmed")), "1h")
+    best_result = all_timeframes.get(best_tf, {})
+
+    final = {
+        "symbol": symbol,
+        "signal": best_result.get("signal", "WAIT"),
+        "reason": best_result.get("reason", "No strong confirmation yet"),
+        "news_sentiment": news_sentiment,
+        "details": all_timeframes,
+        "timeframe": best_tf
+    }
+
+    print(f"\n📊 Final Signal for {symbol}: {final['signal']}")
+    print(f"💡 Reason: {final['reason']}\n{'=' * 60}")
+    final_signals[symbol] = final
+    return final
+
+# 💱 Exits and entries for one symbol (balances holds a prefetched USDT balance, used once)
+def trade_symbol(symbol, final, portfolio, news_sentiment, balances):
+    with TRADE_LOCK:
+        return _trade_symbol(symbol, final, portfolio, news_sentiment, balances)
+
+# 🔻 Close a position whose SL or TP was hit
+def exit_position(portfolio, symbol, reason, sell_price, news_sentiment):
+    portfolio = update_position(portfolio, symbol, "SELL", sell_price)
+    log_trade(symbol, "SELL", reason=f"Auto {reason} Hit", news_sentiment=news_sentiment, price=sell_price, timeframe="1h", result=reason)
+    update_exit_price(symbol, sell_price)
+    send_whatsapp_message(f"⚠️ Auto {reason} HIT on {symbol}\nPrice: {sell_price}")
+    print(f"🔻 Auto {reason} executed for {symbol} at {sell_price}")
+    return portfolio
+
+def _trade_symbol(symbol, final, portfolio, news_sentiment, balances):
+    # ✅ Auto Exit
+    if check_position(portfolio, symbol):
+        reason = auto_exit_check(portfolio, symbol)
+        if reason in ["SL", "TP"]:
+            sell_price = get_current_price(symbol)
+            if sell_price:
+                portfolio = exit_position(portfolio, symbol, reason, sell_price, news_sentiment)
+            return portfolio
+
+    # ✅ Buy Logic
+    if final["signal"] == "BUY" and not check_position(portfolio, symbol):
+        tf = final["timeframe"]
+        live_price = get_price(symbol.replace("USDT", "/USDT"))
+        usdt_balance = balances.pop("USDT", None)
+        if usdt_balance is None:
+            usdt_balance = get_balance("USDT")
+
+        if live_price and usdt_balance > 0:
+            capital = usdt_balance * 0.05
+            amount = round(capital / live_price, 5)
+            if amount >= 0.001:
+                placed = place_order(symbol.replace("USDT", "/USDT"), "buy", amount)
+                if placed:
+                    portfolio = update_position(portfolio, symbol, "BUY", timeframe=tf)
+                    pos = portfolio["positions"][symbol]
+                    log_trade(symbol, "BUY", reason=final["reason"], news_sentiment=news_sentiment, price=live_price, timeframe=tf)
+                    send_whatsapp_message(f"🟢 BUY {symbol} at {live_price}\nTP: {pos['take_profit']}, SL: {pos['stop_loss']}")
+            else:
+                print(f"❌ Skipping {symbol}, amount too small: {amount}")
+        else:
+            print(f"⚠️ Skipping trade: price or balance missing for {symbol}")
+
+    # ✅ Sell Logic
+    elif final["signal"] == "SELL" and check_position(portfolio, symbol):
+        sell_price = get_price(symbol.replace("USDT", "/USDT"))
+        if sell_price:
+            placed = place_order(symbol.replace("USDT", "/USDT"), "sell", portfolio["positions"][symbol]["amount"])
+            if placed:
+                tf = final["timeframe"]
+                portfolio = update_position(portfolio, symbol, "SELL", sell_price)
+                log_trade(symbol, "SELL", reason=final["reason"], news_sentiment=news_sentiment, price=sell_price, timeframe=tf)
+                update_exit_price(symbol, sell_price)
+                send_whatsapp_message(f"🔴 SELL {symbol} at {sell_price}\nReason: {final['reason']}")
+        else:
+            print(f"⚠️ Skipping SELL for {symbol} due to missing price")
+    return portfolio
+
+# 🔁 Analyse the given (symbol, timeframe) jobs; other timeframes reuse their last readings
+async def run_full_analysis_async(jobs=None):
     global dashboard_data
     print("\n🚀 Starting Crypto AI Multi-Coin Swing Bot...\n")
+    jobs = jobs or [(symbol, tf) for symbol in SYMBOLS for tf in TIMEFRAMES]
+    symbols = [symbol for symbol in SYMBOLS if any(job[0] == symbol for job in jobs)]
 
     try:
-        # 🧠 News Analysis
-        news = fetch_and_analyze_news()
-        news_sentiment = news.get("sentiment", "NEUTRAL").upper()
-        news_confidence = news.get("confidence", 0.0)
-        affected_symbols = news.get("affected_symbols", [])
-        news_headlines = news.get("headlines", [])
-
-        print(f"🧠 News Sentiment: {news_sentiment} | 🧪 Confidence: {news_confidence:.2f}")
-        print(f"📰 Affected Symbols: {affected_symbols}")
-
-        symbols = ["BTCUSDT", "ETHUSDT", "SOLUSDT"]
-        timeframes = ["30m", "1h"]
-        portfolio = get_portfolio()
-
-        # 🎯 Accuracy Report
-        accuracy_report = evaluate_trade_accuracy()
-        accuracy_percent = accuracy_report.get("accuracy_percent", 0.0)
-        evaluated_trades = accuracy_report.get("evaluated_trades", [])[-5:]
-
-        dashboard_data = {
-            "symbols": [],
-            "balance": portfolio.get("balance", 0),
-            "news_sentiment": news_sentiment,
-            "confidence": round(news_confidence * 100, 2) if news_confidence else 0,
-            "portfolio": portfolio.get("positions", {}),
-            "accuracy": accuracy_percent,
-            "affected_symbols": affected_symbols,
-            "news_headlines": news_headlines,
-            "total_trades": accuracy_report.get("total_trades", 0),
-            "wins": accuracy_report.get("wins", 0),
-            "losses": accuracy_report.get("losses", 0),
-            "win_rate": accuracy_report.get("win_rate", 0.0),
-            "evaluated_trades": evaluated_trades
-        }
-
-        for symbol in symbols:
-            print(f"\n🔍 Analyzing {symbol}...\n")
-            all_timeframes = {}
-            for tf in timeframes:
-                try:
-                    df = fetch_price_data(symbol, tf)
-                    result = analyze_technical(symbol, df, df, news_sentiment)
-                    tf_result = result["details"][tf]
-                    all_timeframes[tf] = tf_result
-                    print(f"✅ {symbol} @ {tf} | Signal: {tf_result.get('signal')} | MACD: {tf_result.get('macd_signal')} | EMA: {tf_result.get('ema_signal')} | RSI: {round(tf_result.get('rsi', 0), 2)}")
-                except Exception as e:
-                    print(f"❌ Error analyzing {symbol} on {tf}: {e}")
-
-            best_tf = next((tf for tf, res in all_timeframes.items() if res.get("confirmed")), "1h")
-            best_result = all_timeframes.get(best_tf, {})
-
-            final = {
-                "symbol": symbol,
-                "signal": best_result.get("signal", "WAIT"),
-                "reason": best_result.get("reason", "No strong confirmation yet"),
+        async with open_session() as session:
+            # 🚦 Everything that only waits on the network starts at once
+            news_task = asyncio.ensure_future(run_stage("news", in_thread(fetch_and_analyze_news), {}))
+            accuracy_task = asyncio.ensure_future(run_stage("accuracy", in_thread(evaluate_trade_accuracy), {}))
+            balance_task = asyncio.ensure_future(run_stage("balance", in_thread(get_balance, "USDT"), None))
+            prices_task = asyncio.ensure_future(run_stage("prices", in_thread(PRICE_SERVICE.snapshot), {}))
+            candle_tasks = {
+                symbol: asyncio.ensure_future(run_stage(
+                    "candles", fetch_symbol_frames(symbol, [tf for sym, tf in jobs if sym == symbol], session), {}, symbol
+                ))
+                for symbol in symbols
+            }
+
+            # 🧠 News Analysis
+            news = await news_task
+            news_sentiment = news.get("sentiment", "NEUTRAL").upper()
+            news_confidence = news.get("confidence", 0.0)
+            affected_symbols = news.get("affected_symbols", [])
+            news_headlines = news.get("headlines", [])
+
+            print(f"🧠 News Sentiment: {news_sentiment} | 🧪 Confidence: {news_confidence:.2f}")
+            print(f"📰 Affected Symbols: {affected_symbols}")
+
+            portfolio = get_portfolio()
+
+            # 🎯 Accuracy Report
+            accuracy_report = await accuracy_task
+            accuracy_percent = accuracy_report.get("accuracy_percent", 0.0)
+            evaluated_trades = accuracy_report.get("evaluated_trades", [])[-5:]
+
+            dashboard_data = {
+                "symbols": [final_signals[s] for s in SYMBOLS if s in final_signals],
+                "balance": portfolio.get("balance", 0),
                 "news_sentiment": news_sentiment,
-                "details": all_timeframes,
-                "timeframe": best_tf
+                "confidence": round(news_confidence * 100, 2) if news_confidence else 0,
+                "portfolio": portfolio.get("positions", {}),
+                "accuracy": accuracy_percent,
+                "affected_symbols": affected_symbols,
+                "news_headlines": news_headlines,
+                "total_trades": accuracy_report.get("total_trades", 0),
+                "wins": accuracy_report.get("wins", 0),
+                "losses": accuracy_report.get("losses", 0),
+                "win_rate": accuracy_report.get("win_rate", 0.0),
+                "evaluated_trades": evaluated_trades
             }
 
-            print(f"\n📊 Final Signal for {symbol}: {final['signal']}")
-            print(f"💡 Reason: {final['reason']}\n{'=' * 60}")
-            dashboard_data["symbols"].append(final)
+            state = {"portfolio": portfolio}
+            trade_lock = asyncio.Lock()
 
-            # ✅ Auto Exit
-            if check_position(portfolio, symbol):
-                reason = auto_exit_check(portfolio, symbol)
-                if reason in ["SL", "TP"]:
-                    sell_price = get_current_price(symbol)
-                    if sell_price:
-                        portfolio = update_position(portfolio, symbol, "SELL", sell_price)
-                        log_trade(symbol, "SELL", reason=f"Auto {reason} Hit", news_sentiment=news_sentiment, price=sell_price, timeframe="1h", result=reason)
-                        update_exit_price(symbol, sell_price)
-                        send_whatsapp_message(f"⚠️ Auto {reason} HIT on {symbol}\nPrice: {sell_price}")
-                        print(f"🔻 Auto {reason} executed for {symbol} at {sell_price}")
-                    continue
-
-            # ✅ Buy Logic
-            if final["signal"] == "BUY" and not check_position(portfolio, symbol):
-                tf = final["timeframe"]
-                live_price = get_price(symbol.replace("USDT", "/USDT"))
-                usdt_balance = get_balance("USDT")
-
-                if live_price and usdt_balance > 0:
-                    capital = usdt_balance * 0.05
-                    amount = round(capital / live_price, 5)
-                    if amount >= 0.001:
-                        placed = place_order(symbol.replace("USDT", "/USDT"), "buy", amount)
-                        if placed:
-                            portfolio = update_position(portfolio, symbol, "BUY", timeframe=tf)
-                            pos = portfolio["positions"][symbol]
-                            log_trade(symbol, "BUY", reason=final["reason"], news_sentiment=news_sentiment, price=live_price, timeframe=tf)
-                            send_whatsapp_message(f"🟢 BUY {symbol} at {live_price}\nTP: {pos['take_profit']}, SL: {pos['stop_loss']}")
-                    else:
-                        print(f"❌ Skipping {symbol}, amount too small: {amount}")
-                else:
-                    print(f"⚠️ Skipping trade: price or balance missing for {symbol}")
-
-            # ✅ Sell Logic
-            elif final["signal"] == "SELL" and check_position(portfolio, symbol):
-                sell_price = get_price(symbol.replace("USDT", "/USDT"))
-                if sell_price:
-                    placed = place_order(symbol.replace("USDT", "/USDT"), "sell", portfolio["positions"][symbol]["amount"])
-                    if placed:
-                        tf = final["timeframe"]
-                        portfolio = update_position(portfolio, symbol, "SELL", sell_price)
-                        log_trade(symbol, "SELL", reason=final["reason"], news_sentiment=news_sentiment, price=sell_price, timeframe=tf)
-                        update_exit_price(symbol, sell_price)
-                        send_whatsapp_message(f"🔴 SELL {symbol} at {sell_price}\nReason: {final['reason']}")
-                else:
-                    print(f"⚠️ Skipping SELL for {symbol} due to missing price")
+            # ⚡ Each symbol is analysed as soon as its candles arrive; trades go one at a time
+            # and only they wait for the price snapshot and the balance
+            async def handle(symbol):
+                price_frames = await candle_tasks[symbol]
+                final = analyze_symbol(symbol, price_frames, news_sentiment)
+                dashboard_data["symbols"] = [final_signals[s] for s in SYMBOLS if s in final_signals]
+                async with trade_lock:
+                    await prices_task
+                    if "balances" not in state:
+                        usdt_balance = await balance_task
+                        state["balances"] = {} if usdt_balance is None else {"USDT": usdt_balance}
+                    state["portfolio"] = await in_thread(trade_symbol, symbol, final, state["portfolio"], news_sentiment, state["balances"])
+
+            await asyncio.gather(*(handle(symbol) for symbol in symbols))
+            portfolio = state["portfolio"]
 
         print("\n📊 Portfolio Summary")
         print(f"💵 Balance: ${portfolio.get('balance', 0):.2f}")
@@ -147,22 +264,81 @@ def run_full_analysis():
         else:
             print(" - No open positions")
 
-        save_portfolio(portfolio)
+        with TRADE_LOCK:
+            save_portfolio(portfolio)
         print("✅ Portfolio saved.")
         print("📤 Logging Trades...")
         print("📈 Accuracy: {:.2f}%".format(accuracy_percent))
+        LATENCY.report()
         print("✅ Done!\n")
 
     except Exception as e:
         print(f"❌ Unhandled error during analysis: {e}")
 
-def schedule_loop():
-    schedule.every(15).minutes.do(run_full_analysis)
+def run_full_analysis(jobs=None):
+    asyncio.run(run_full_analysis_async(jobs))
+
+# ⚡ Streaming SL/TP: every streamed price is checked against the open positions right away
+def on_stream_price(symbol, price):
+    PRICE_SERVICE.update_live(symbol, price)
+    feed_price(symbol, price)
+    position = get_portfolio()["positions"].get(symbol)
+    if position is None or symbol in pending_exits:
+        return
+    if price <= position["stop_loss"] or price >= position["take_profit"]:
+        # The exit (file writes, alerts) runs off the stream thread so prices keep flowing
+        pending_exits.add(symbol)
+        EXIT_EXECUTOR.submit(stream_exit, symbol, price)
+
+def stream_exit(symbol, price):
+    try:
+        with TRADE_LOCK:
+            portfolio = get_portfolio()
+            reason = auto_exit_check(portfolio, symbol, price)
+            if reason in ["SL", "TP"]:
+                exit_position(portfolio, symbol, reason, price, dashboard_data.get("news_sentiment", "NEUTRAL"))
+    except Exception as e:
+        print(f"❌ Streamed exit failed for {symbol}: {e}")
+    finally:
+        pending_exits.discard(symbol)
+
+# 📡 Trade stream for every symbol (prices only: candles still come from the store, so no kline buffers)
+def start_stream(url=STREAM_URL):
+    stream = market_stream.MarketStream(SYMBOLS, [], url=url, on_price=on_stream_price)
+    return stream.start()
+
+# 🔻 Polled SL/TP for every open position, on its own timer rather than the candle closes
+def exit_check():
+    try:
+        with TRADE_LOCK:
+            portfolio = get_portfolio()
+            exited = False
+            for symbol in list(portfolio["positions"]):
+                reason = auto_exit_check(portfolio, symbol)
+                if reason in ["SL", "TP"]:
+                    sell_price = get_current_price(symbol)
+                    if sell_price:
+                        portfolio = exit_position(portfolio, symbol, reason, sell_price, dashboard_data.get("news_sentiment", "NEUTRAL"))
+                        exited = True
+            if exited:
+                save_portfolio(portfolio)
+    except Exception as e:
+        print(f"❌ Exit check failed: {e}")
+
+def exit_loop(interval=EXIT_CHECK_INTERVAL):
     while True:
-        schedule.run_pending()
-        time.sleep(1)
+        time.sleep(interval)
+        exit_check()
+
+# 🕯 Run each symbol/timeframe right after its candle closes
+def schedule_loop():
+    scheduler = CandleScheduler([(symbol, tf) for symbol in SYMBOLS for tf in TIMEFRAMES], run_full_analysis)
+    scheduler.run_forever()
 
 if __name__ == "__main__":
+    if STREAMING:
+        live_stream = start_stream()
     run_full_analysis()  # Run once on start
     threading.Thread(target=schedule_loop).start()
+    threading.Thread(target=exit_loop, daemon=True).start()
     app.run(host="0.0.0.0", port=10000)
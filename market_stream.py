@@ -0,0 +1,188 @@
+import asyncio
+import json
+import threading
+import time
+import aiohttp
+import numpy as np
+import candle_store
+from candle_store import CANDLE_DTYPE
+
+STREAM_URL = "wss://stream.binancefuture.com/stream"
+RING_SIZE = 500          # candles kept per (symbol, interval)
+PRICE_STREAM = "aggTrade"  # every trade, pushed in real time (@ticker only pushes once a second)
+RECONNECT_DELAYS = [1, 2, 5, 10, 30]
+HEARTBEAT = 30           # seconds between pings; a dead connection is dropped and reopened
+
+# 🔁 Fixed-size candle buffer: the oldest candle is overwritten once it is full
+class RingBuffer:
+    def __init__(self, capacity=RING_SIZE):
+        self.capacity = capacity
+        self._records = np.zeros(capacity, dtype=CANDLE_DTYPE)
+        self._next = 0   # slot the next new candle goes into
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._size
+
+    # ➕ New candle, or an update of the still-open last candle (same open_time)
+    def push(self, record):
+        with self._lock:
+            last = (self._next - 1) % self.capacity
+            if self._size and self._records["open_time"][last] == record["open_time"]:
+                self._records[last] = record
+                return False
+            if self._size and self._records["open_time"][last] > record["open_time"]:
+                return False
+            self._records[self._next] = record
+            self._next = (self._next + 1) % self.capacity
+            self._size = min(self._size + 1, self.capacity)
+            return True
+
+    def extend(self, records):
+        for record in records[-self.capacity:]:
+            self.push(record)
+
+    # 📋 Oldest → newest copy
+    def records(self):
+        with self._lock:
+            if self._size < self.capacity:
+                return self._records[:self._size].copy()
+            return np.concatenate([self._records[self._next:], self._records[:self._next]])
+
+    def last(self):
+        with self._lock:
+            return self._records[(self._next - 1) % self.capacity].copy() if self._size else None
+
+    def to_frame(self):
+        return candle_store.to_frame(self.records())
+
+# 🔄 Binance kline event payload ("k") → one CANDLE_DTYPE record
+def kline_record(k):
+    record = np.zeros((), dtype=CANDLE_DTYPE)
+    record["open_time"] = k["t"]
+    record["open"] = float(k["o"])
+    record["high"] = float(k["h"])
+    record["low"] = float(k["l"])
+    record["close"] = float(k["c"])
+    record["volume"] = float(k["v"])
+    record["close_time"] = k["T"]
+    record["quote_asset_volume"] = float(k["q"])
+    record["number_of_trades"] = k["n"]
+    record["taker_buy_base"] = float(k["V"])
+    record["taker_buy_quote"] = float(k["Q"])
+    return record
+
+# 📡 Kline + trade streams for many symbols on one combined-stream connection
+class MarketStream:
+    """
+    on_price(symbol, price) runs on every trade and on every kline update;
+    on_candle(symbol, interval, buffer) runs when a candle closes. Both run on the
+    stream's own thread, so they should hand slow work (orders, alerts) elsewhere.
+    """
+    def __init__(self, symbols, intervals, url=STREAM_URL, ring_size=RING_SIZE, on_price=None, on_candle=None):
+        self.symbols = [symbol.upper() for symbol in symbols]
+        self.intervals = list(intervals)
+        self.url = url
+        self.on_price = on_price
+        self.on_candle = on_candle
+        self.buffers = {(symbol, interval): RingBuffer(ring_size) for symbol in self.symbols for interval in self.intervals}
+        self.prices = {}      # symbol → (price, event time ms, received at monotonic seconds)
+        self.messages = 0
+        self.connected = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._loop = None
+        self._ws = None
+
+    def stream_names(self):
+        names = []
+        for symbol in self.symbols:
+            names.append(f"{symbol.lower()}@{PRICE_STREAM}")
+            names += [f"{symbol.lower()}@kline_{interval}" for interval in self.intervals]
+        return names
+
+    def stream_url(self):
+        return f"{self.url}?streams={'/'.join(self.stream_names())}"
+
+    # 🌱 Fill a buffer from stored/REST candles before the stream takes over
+    def seed(self, symbol, interval, records):
+        self.buffers[(symbol.upper(), interval)].extend(records)
+
+    def get_price(self, symbol, max_age=None):
+        entry = self.prices.get(symbol.replace("/", "").upper())
+        if entry is None or (max_age is not None and time.monotonic() - entry[2] > max_age):
+            return None
+        return entry[0]
+
+    def _set_price(self, symbol, price, event_time):
+        self.prices[symbol] = (price, event_time, time.monotonic())
+        if self.on_price:
+            try:
+                self.on_price(symbol, price)
+            except Exception as e:
+                print(f"❌ Price handler failed for {symbol}: {e}")
+
+    # 📨 One combined-stream message: {"stream": ..., "data": {...}}
+    def handle_message(self, message):
+        self.messages += 1
+        data = message.get("data", message)
+        event = data.get("e")
+        symbol = data.get("s")
+        if event == "aggTrade":
+            self._set_price(symbol, float(data["p"]), data.get("T"))
+        elif event == "kline":
+            k = data["k"]
+            buffer = self.buffers.get((symbol, k["i"]))
+            if buffer is None:
+                return
+            buffer.push(kline_record(k))
+            self._set_price(symbol, float(k["c"]), data.get("E"))
+            if k["x"] and self.on_candle:
+                try:
+                    self.on_candle(symbol, k["i"], buffer)
+                except Exception as e:
+                    print(f"❌ Candle handler failed for {symbol} {k['i']}: {e}")
+
+    async def run(self):
+        attempt = 0
+        self._loop = asyncio.get_running_loop()
+        async with aiohttp.ClientSession() as session:
+            while not self._stop.is_set():
+                try:
+                    async with session.ws_connect(self.stream_url(), heartbeat=HEARTBEAT) as ws:
+                        self._ws = ws
+                        print(f"📡 Streaming {len(self.symbols)} symbols × {len(self.intervals)} intervals")
+                        self.connected.set()
+                        attempt = 0
+                        async for msg in ws:
+                            if self._stop.is_set():
+                                break
+                            if msg.type == aiohttp.WSMsgType.TEXT:
+                                self.handle_message(json.loads(msg.data))
+                            elif msg.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                                break
+                except Exception as e:
+                    print(f"❌ Stream connection failed: {e}")
+                self.connected.clear()
+                if self._stop.is_set():
+                    break
+                delay = RECONNECT_DELAYS[min(attempt, len(RECONNECT_DELAYS) - 1)]
+                attempt += 1
+                print(f"🔌 Stream disconnected, reconnecting in {delay}s")
+                await asyncio.sleep(delay)
+
+    # 🧵 Run on a background thread with its own event loop
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=lambda: asyncio.run(self.run()), name="market-stream", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=5):
+        self._stop.set()
+        if self._loop and self._ws and not self._loop.is_closed():
+            # Wake the reader so it doesn't wait for the next message
+            asyncio.run_coroutine_threadsafe(self._ws.close(), self._loop)
+        if self._thread:
+            self._thread.join(timeout)
@@ -1,9 +1,16 @@
-import requests
+from http_client import HTTP_CLIENT
+from sentiment_store import SENTIMENT_STORE, content_hash
 from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
 import os
 import re
+import time
+from datetime import datetime, timezone
 
 NEWS_API_KEY = os.getenv("NEWS_API_KEY")
+NEWS_URL = "https://newsapi.org/v2/everything"
+NEWS_QUERY = "cryptocurrency OR bitcoin OR ethereum OR solana OR xrp OR bnb"
+PAGE_SIZE = 100  # a request costs the same quota whatever its size
+MAX_PAGES = 3    # catching up after downtime stops here; older gaps stay unfetched
 analyzer = SentimentIntensityAnalyzer()
 
 def smart_sentiment(text):
@@ -37,97 +44,124 @@ def smart_sentiment(text):
     confidence = min(confidence, 1.0)
     return label, round(confidence, 2)
 
+SYMBOL_MAP = {
+    "bitcoin": "BTCUSDT", "btc": "BTCUSDT",
+    "ethereum": "ETHUSDT", "eth": "ETHUSDT",
+    "solana": "SOLUSDT", "sol": "SOLUSDT",
+    "ripple": "XRPUSDT", "xrp": "XRPUSDT",
+    "bnb": "BNBUSDT"
+}
+
+# 📰 One NewsAPI article → its label, confidence and the symbols it mentions (None when it has no text)
+def score_article(article):
+    title = article.get("title") or ""
+    description = article.get("description") or ""
+    if not title and not description:
+        return None
+
+    content = f"{title} {description}".strip()
+    label, conf = smart_sentiment(content)
+    lowered = content.lower()
+    symbols = sorted({symbol for keyword, symbol in SYMBOL_MAP.items() if re.search(rf"\b{keyword}\b", lowered)})
+    return {
+        "published_at": article.get("publishedAt"),
+        "url": article.get("url", ""),
+        "title": title,
+        "label": label,
+        "confidence": conf,
+        "symbols": symbols,
+        "content_hash": content_hash(title, description)
+    }
+
+def neutral_news():
+    return {
+        "sentiment": "NEUTRAL",
+        "confidence": 0.0,
+        "headlines": [],
+        "affected_symbols": []
+    }
+
+# 📥 Articles published since the watermark (the newest stored article), newest first; None if the first request fails
+def fetch_new_articles():
+    params = {"q": NEWS_QUERY, "language": "en", "sortBy": "publishedAt", "pageSize": PAGE_SIZE, "apiKey": NEWS_API_KEY}
+    watermark = SENTIMENT_STORE.latest_published()
+    if watermark is not None:
+        # "from" is inclusive, so the watermark article comes back and is dropped as known
+        params["from"] = datetime.fromtimestamp(watermark / 1000, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S")
+
+    articles = []
+    for page in range(1, MAX_PAGES + 1):
+        response = HTTP_CLIENT.get(NEWS_URL, {**params, "page": page}, label="NewsAPI")
+        if response is None:
+            return articles if page > 1 else None
+        data = response.json()
+        if data.get("status") != "ok" or "articles" not in data:
+            print("⚠️ NewsAPI response error or invalid data")
+            return articles if page > 1 else None
+        batch = data["articles"]
+        articles += batch
+        # Without a watermark only the latest page is wanted
+        if watermark is None or len(batch) < PAGE_SIZE:
+            break
+    return articles
+
+# 🧹 Score only articles whose URL and content hash haven't been seen; returns how many were stored
+def ingest_news():
+    articles = fetch_new_articles()
+    if articles is None:
+        return None
+    urls = [a.get("url") for a in articles if a.get("url")]
+    hashes = [content_hash(a.get("title") or "", a.get("description") or "") for a in articles]
+    known_urls, known_hashes = SENTIMENT_STORE.known(urls, hashes)
+
+    scored = []
+    for article, digest in zip(articles, hashes):
+        if article.get("url") in known_urls or digest in known_hashes or not article.get("publishedAt"):
+            continue
+        # Duplicates inside this batch are only scored once too
+        known_hashes.add(digest)
+        if article.get("url"):
+            known_urls.add(article["url"])
+        item = score_article(article)
+        if item is not None:
+            scored.append(item)
+    added = SENTIMENT_STORE.add_articles(scored)
+    print(f"📰 {len(articles)} articles fetched | {added} new")
+    return added
+
+# 🧠 Sentiment over the stored articles in the sliding window ending now (same rules as the backtests)
+def summarize_news(now=None):
+    now_ms = int((now if now is not None else time.time()) * 1000)
+    sentiment, confidence, count = SENTIMENT_STORE.asof([now_ms])
+    if not count[0]:
+        print("⚠️ No news articles found")
+        return neutral_news()
+
+    recent = SENTIMENT_STORE.recent(now_ms)
+    top_headlines = []
+    affected = set()
+    for article in recent:
+        affected.update(article["symbols"])
+        if len(top_headlines) < 5 and article["title"] not in [h['title'] for h in top_headlines]:
+            top_headlines.append({"title": article["title"], "url": article["url"]})
+
+    return {
+        "sentiment": sentiment[0],
+        "confidence": float(confidence[0]),
+        "headlines": top_headlines,
+        "affected_symbols": sorted(affected)
+    }
+
 def fetch_and_analyze_news():
     try:
         if not NEWS_API_KEY:
             print("❌ NEWS_API_KEY not found in environment.")
-            return {
-                "sentiment": "NEUTRAL",
-                "confidence": 0.0,
-                "headlines": [],
-                "affected_symbols": []
-            }
-
-        url = (
-            f"https://newsapi.org/v2/everything?"
-            f"q=cryptocurrency OR bitcoin OR ethereum OR solana OR xrp OR bnb&"
-            f"language=en&sortBy=publishedAt&pageSize=10&"
-            f"apiKey={NEWS_API_KEY}"
-        )
-
-        response = requests.get(url)
-        data = response.json()
+            return neutral_news()
 
-        if data.get("status") != "ok" or "articles" not in data:
-            print("⚠️ NewsAPI response error or invalid data")
-            return {
-                "sentiment": "NEUTRAL",
-                "confidence": 0.0,
-                "headlines": [],
-                "affected_symbols": []
-            }
-
-        articles = data.get("articles", [])
-        if not articles:
-            print("⚠️ No news articles found")
-            return {
-                "sentiment": "NEUTRAL",
-                "confidence": 0.0,
-                "headlines": [],
-                "affected_symbols": []
-            }
-
-        symbol_map = {
-            "bitcoin": "BTCUSDT", "btc": "BTCUSDT",
-            "ethereum": "ETHUSDT", "eth": "ETHUSDT",
-            "solana": "SOLUSDT", "sol": "SOLUSDT",
-            "ripple": "XRPUSDT", "xrp": "XRPUSDT",
-            "bnb": "BNBUSDT"
-        }
-
-        scores = {"bullish": 0.0, "bearish": 0.0, "neutral": 0.0}
-        count = {"bullish": 0, "bearish": 0, "neutral": 0}
-        top_headlines = []
-        affected = set()
-
-        for article in articles:
-            title = article.get("title", "")
-            description = article.get("description", "")
-            url = article.get("url", "")
-            if not title and not description:
-                continue
-
-            content = f"{title} {description}".strip()
-            label, conf = smart_sentiment(content)
-
-            scores[label] += conf
-            count[label] += 1
-
-            lowered = content.lower()
-            for keyword, symbol in symbol_map.items():
-                if re.search(rf"\b{keyword}\b", lowered):
-                    affected.add(symbol)
-
-            if len(top_headlines) < 5 and title not in [h['title'] for h in top_headlines]:
-                top_headlines.append({"title": title, "url": url})
-
-        # Final decision
-        final_sentiment = max(scores, key=scores.get)
-        total_votes = sum(count.values())
-        confidence = scores[final_sentiment] / total_votes if total_votes > 0 else 0.0
-
-        return {
-            "sentiment": final_sentiment.upper(),
-            "confidence": round(confidence, 2),
-            "headlines": top_headlines,
-            "affected_symbols": sorted(list(affected))
-        }
+        if ingest_news() is None:
+            print("⚠️ NewsAPI unavailable, using stored articles only")
+        return summarize_news()
 
     except Exception as e:
         print(f"❌ Error fetching news sentiment: {e}")
-        return {
-            "sentiment": "NEUTRAL",
-            "confidence": 0.0,
-            "headlines": [],
-            "affected_symbols": []
-        }
+        return neutral_news()
@@ -0,0 +1,157 @@
+import argparse
+import itertools
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+from backtester import backtest_symbol, INITIAL_BALANCE, PER_SYMBOL_SENTIMENT
+from signal_logic import STRATEGY_PARAMS
+from price_data import fetch_price_data
+from news_sentiment import fetch_and_analyze_news
+from sentiment_store import SENTIMENT_STORE
+
+CANDLE_FIELDS = ["open", "high", "low", "close", "volume"]
+RESULTS_FILE = "optimizer_results.csv"
+
+# 🔍 Default search space: a list is picked from, a (low, high) tuple is sampled (random search)
+PARAM_SPACE = {
+    "ema_fast": [5, 7, 9, 12],
+    "ema_slow": [20, 26, 34, 50],
+    "volume_multiplier": [1.2, 1.5, 2.0],
+    "adx_threshold": [15, 20, 25, 30],
+    "tp_percent": [0.03, 0.05, 0.10],
+    "sl_percent": [0.02, 0.03, 0.05],
+    "trade_percent": [0.05]
+}
+
+def is_valid(params):
+    return params.get("ema_fast", STRATEGY_PARAMS["ema_fast"]) < params.get("ema_slow", STRATEGY_PARAMS["ema_slow"])
+
+# 🧮 Grid search: every combination
+def grid_search(space):
+    keys = list(space)
+    combos = (dict(zip(keys, values)) for values in itertools.product(*(space[k] for k in keys)))
+    return [params for params in combos if is_valid(params)]
+
+def _sample(values, rng):
+    if isinstance(values, tuple):
+        low, high = values
+        if isinstance(low, int) and isinstance(high, int):
+            return rng.randint(low, high)
+        return rng.uniform(low, high)
+    return rng.choice(values)
+
+# 🎲 Random search: samples distinct valid combinations
+def random_search(space, samples, seed=None):
+    rng = random.Random(seed)
+    param_sets, seen = [], set()
+    for _ in range(samples * 20):
+        if len(param_sets) >= samples:
+            break
+        params = {key: _sample(values, rng) for key, values in space.items()}
+        key = tuple(sorted(params.items()))
+        if key in seen or not is_valid(params):
+            continue
+        seen.add(key)
+        param_sets.append(params)
+    return param_sets
+
+# 🧠 Per-process state: candles are read from shared memory, never pickled per task
+_worker = {}
+
+def _attach(shm_name, rows, symbol, timeframe, news_sentiment):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    prices = np.ndarray((len(CANDLE_FIELDS), rows), dtype=np.float64, buffer=shm.buf)
+    times = np.ndarray(rows, dtype=np.int64, buffer=shm.buf, offset=prices.nbytes)
+    df = pd.DataFrame({field: prices[i] for i, field in enumerate(CANDLE_FIELDS)}, index=pd.to_datetime(times, unit="ms"))
+    _worker.update(shm=shm, df=df, symbol=symbol, timeframe=timeframe, news_sentiment=news_sentiment)
+
+def _run_batch(param_sets):
+    rows = []
+    for params in param_sets:
+        trades, wins, losses, balance = backtest_symbol(
+            _worker["symbol"], _worker["df"], _worker["timeframe"], _worker["news_sentiment"],
+            INITIAL_BALANCE, params=params
+        )
+        evaluated = wins + losses
+        rows.append({
+            **params,
+            "final_balance": round(balance, 2),
+            "return_pct": round((balance / INITIAL_BALANCE - 1) * 100, 2),
+            "trades": len(trades),
+            "wins": wins,
+            "losses": losses,
+            "win_rate": round(wins / evaluated * 100, 2) if evaluated else 0.0
+        })
+    return rows
+
+# 🗞 Stored sentiment as of each bar's close, as backtester.simulate_trades reads it (None without history)
+def stored_sentiment(symbol, df):
+    try:
+        if not SENTIMENT_STORE.count():
+            print("⚠️ No stored news history, using today's sentiment for every bar")
+            return None
+        return SENTIMENT_STORE.for_frame(df, symbol if PER_SYMBOL_SENTIMENT else None)[0]
+    except Exception as e:
+        print(f"⚠️ Sentiment history unavailable: {e}")
+        return None
+
+# 🚀 Run a sweep across all cores and return the ranked results table
+def run_sweep(symbol, timeframe="1h", mode="grid", samples=1000, space=None, news_sentiment=None,
+              workers=None, seed=None, rank_by="final_balance", df=None):
+    space = space or PARAM_SPACE
+    param_sets = grid_search(space) if mode == "grid" else random_search(space, samples, seed)
+    if df is None:
+        df = fetch_price_data(symbol, timeframe)
+    if news_sentiment is None:
+        news_sentiment = stored_sentiment(symbol, df)
+    if news_sentiment is None:
+        news_sentiment = fetch_and_analyze_news().get("sentiment", "NEUTRAL").upper()
+    news_label = "as of each bar (stored)" if isinstance(news_sentiment, np.ndarray) else news_sentiment
+
+    workers = workers or os.cpu_count() or 1
+    print(f"🧪 Sweeping {len(param_sets)} combinations for {symbol} {timeframe} on {workers} workers | News: {news_label}")
+
+    rows = len(df)
+    prices = np.ascontiguousarray(df[CANDLE_FIELDS].to_numpy(dtype=np.float64).T)
+    times = (df.index.asi8 // 1_000_000).astype(np.int64)
+    shm = shared_memory.SharedMemory(create=True, size=prices.nbytes + times.nbytes)
+    try:
+        np.ndarray(prices.shape, dtype=np.float64, buffer=shm.buf)[:] = prices
+        np.ndarray(rows, dtype=np.int64, buffer=shm.buf, offset=prices.nbytes)[:] = times
+
+        started = time.time()
+        chunk = max(1, len(param_sets) // (workers * 4))
+        batches = [param_sets[i:i + chunk] for i in range(0, len(param_sets), chunk)]
+        with ProcessPoolExecutor(max_workers=workers, initializer=_attach,
+                                 initargs=(shm.name, rows, symbol, timeframe, news_sentiment)) as pool:
+            results = [row for batch in pool.map(_run_batch, batches) for row in batch]
+        elapsed = time.time() - started
+    finally:
+        shm.close()
+        shm.unlink()
+
+    table = pd.DataFrame(results)
+    if not table.empty:
+        table = table.sort_values([rank_by, "win_rate"], ascending=False).reset_index(drop=True)
+    table.to_csv(RESULTS_FILE, index=False)
+
+    print(f"✅ Sweep done in {elapsed:.1f}s → {RESULTS_FILE}")
+    print(table.head(10).to_string())
+    return table
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parameter sweep over the backtester")
+    parser.add_argument("symbol", nargs="?", default="BTCUSDT")
+    parser.add_argument("--timeframe", default="1h")
+    parser.add_argument("--mode", choices=["grid", "random"], default="grid")
+    parser.add_argument("--samples", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--rank-by", default="final_balance")
+    args = parser.parse_args()
+    run_sweep(args.symbol, args.timeframe, args.mode, args.samples, workers=args.workers,
+              seed=args.seed, rank_by=args.rank_by)
@@ -0,0 +1,285 @@
+import argparse
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+import ccxt
+import candle_store
+
+STARTING_BALANCE = {"USDT": 10000.0}
+TAKER_FEE = 0.0004      # Binance USDT-M futures defaults
+MAKER_FEE = 0.0002
+SLIPPAGE_BPS = 2        # market orders fill this many basis points worse than the last price
+LATENCY = 0.0           # seconds between sending an order and the exchange seeing it
+PRICE_INTERVAL = "30m"  # stored candles the last price falls back to
+ORDER_HISTORY = 10_000  # finished orders fetch_order can still return
+
+# 🧠 BTCUSDT → BTC/USDT (ccxt's unified symbol, as binance_trade.format_symbol)
+def market_symbol(symbol):
+    if "/" in symbol:
+        return symbol
+    return f"{symbol[:-4]}/{symbol[-4:]}"
+
+# 🧪 In-process stand-in for the ccxt client binance_trade uses
+class PaperExchange:
+    """
+    Market orders fill at the last price plus slippage and pay the taker fee; limit orders
+    that don't cross rest on the book and fill as maker once a price (update_price) or a
+    candle (update_candle) reaches them. Prices come from what is fed in, else price_source,
+    else the last stored candle. With latency > 0 an order only reaches the book that many
+    seconds (by the exchange clock: the latest fed timestamp, else clock()) after it was sent.
+    Balances are a cash ledger per asset: free, plus what open orders have reserved.
+    """
+    def __init__(self, balances=None, taker_fee=TAKER_FEE, maker_fee=MAKER_FEE, slippage_bps=SLIPPAGE_BPS,
+                 latency=LATENCY, price_source=None, price_interval=PRICE_INTERVAL, clock=time.time):
+        self.taker_fee = taker_fee
+        self.maker_fee = maker_fee
+        self.slippage = slippage_bps / 10_000
+        self.latency = latency
+        self.price_source = price_source
+        self.price_interval = price_interval
+        self.clock = clock
+        self.free = dict(balances or STARTING_BALANCE)
+        self.used = {}
+        self.prices = {}       # symbol → last price
+        self.orders = {}       # id → order dict (open ones, plus the last ORDER_HISTORY finished)
+        self.open_ids = {}     # symbol → {id, ...} still open
+        self.fills = []        # (timestamp ms, id, symbol, side, price, amount, fee)
+        self._bids = {}        # symbol → heap of (-price, seq, id)
+        self._asks = {}        # symbol → heap of (price, seq, id)
+        self._inbound = deque()  # (due time, id) orders still "on the wire"
+        self._reserved = {}    # id → funds an open order holds
+        self._finished = deque()
+        self._now = None
+        self._ids = itertools.count(1)
+        self._lock = threading.RLock()
+
+    def now(self):
+        return self._now if self._now is not None else self.clock()
+
+    def last_price(self, symbol):
+        price = self.prices.get(symbol)
+        if price is None and self.price_source is not None:
+            price = self.price_source(symbol)
+        if price is None:
+            records = candle_store.load_candles(symbol.replace("/", ""), self.price_interval)
+            price = float(records["close"][-1]) if len(records) else None
+        if price is None:
+            raise ccxt.ExchangeError(f"No price for {symbol}")
+        return price
+
+    # 💱 Ledger: base and quote of a unified symbol
+    def _assets(self, symbol):
+        base, quote = symbol.split("/")
+        return base, quote.split(":")[0]
+
+    def _reserve(self, asset, amount):
+        if self.free.get(asset, 0.0) < amount - 1e-12:
+            raise ccxt.InsufficientFunds(f"Need {amount} {asset}, have {self.free.get(asset, 0.0)}")
+        self.free[asset] = self.free.get(asset, 0.0) - amount
+        self.used[asset] = self.used.get(asset, 0.0) + amount
+
+    def _release(self, asset, amount):
+        self.used[asset] -= amount
+        self.free[asset] += amount
+
+    # 📤 ccxt's create_order; market orders return already filled unless latency holds them back
+    def create_order(self, symbol, type, side, amount, price=None, params=None):
+        with self._lock:
+            symbol = market_symbol(symbol)
+            if type not in ("market", "limit") or side not in ("buy", "sell"):
+                raise ccxt.InvalidOrder(f"Unsupported {type} {side} order")
+            if amount <= 0 or (type == "limit" and not price):
+                raise ccxt.InvalidOrder(f"Invalid amount/price: {amount} @ {price}")
+            base, quote = self._assets(symbol)
+            # Funds are held from the moment the order is sent
+            if side == "buy":
+                estimate = price if type == "limit" else self.last_price(symbol) * (1 + self.slippage)
+                reserved, reserved_asset = amount * estimate * (1 + max(self.taker_fee, self.maker_fee)), quote
+            else:
+                reserved, reserved_asset = amount, base
+            self._reserve(reserved_asset, reserved)
+
+            order = {
+                "id": str(next(self._ids)), "symbol": symbol, "type": type, "side": side,
+                "price": price, "amount": amount, "filled": 0.0, "remaining": amount,
+                "average": None, "cost": 0.0, "status": "open", "timestamp": int(self.now() * 1000),
+                "fee": {"cost": 0.0, "currency": quote}
+            }
+            self.orders[order["id"]] = order
+            self._reserved[order["id"]] = reserved
+            self.open_ids.setdefault(symbol, set()).add(order["id"])
+            if self.latency > 0:
+                self._inbound.append((self.now() + self.latency, order["id"]))
+            else:
+                self._arrive(order)
+            return order
+
+    def create_market_order(self, symbol, side, amount, price=None, params=None):
+        return self.create_order(symbol, "market", side, amount, price, params)
+
+    def create_limit_order(self, symbol, side, amount, price, params=None):
+        return self.create_order(symbol, "limit", side, amount, price, params)
+
+    # 📥 Order reaches the book: market and crossing limit orders take, the rest rest
+    def _arrive(self, order):
+        if order["status"] != "open":
+            return
+        symbol = order["symbol"]
+        last = self.last_price(symbol)
+        if order["type"] == "market":
+            self._fill(order, last * (1 + self.slippage if order["side"] == "buy" else 1 - self.slippage), self.taker_fee)
+        elif (order["side"] == "buy" and order["price"] >= last) or (order["side"] == "sell" and order["price"] <= last):
+            self._fill(order, last, self.taker_fee)
+        elif order["side"] == "buy":
+            heapq.heappush(self._bids.setdefault(symbol, []), (-order["price"], int(order["id"]), order["id"]))
+        else:
+            heapq.heappush(self._asks.setdefault(symbol, []), (order["price"], int(order["id"]), order["id"]))
+
+    def _fill(self, order, price, fee_rate):
+        base, quote = self._assets(order["symbol"])
+        amount = order["amount"]
+        cost = amount * price
+        fee = cost * fee_rate
+        reserved = self._reserved.pop(order["id"])
+        if order["side"] == "buy":
+            self._release(quote, reserved)
+            if self.free[quote] < cost + fee - 1e-9:
+                self._close(order, "rejected")
+                return
+            self.free[quote] -= cost + fee
+            self.free[base] = self.free.get(base, 0.0) + amount
+        else:
+            self.used[base] -= reserved
+            self.free[quote] = self.free.get(quote, 0.0) + cost - fee
+        order.update(filled=amount, remaining=0.0, average=price, cost=cost)
+        order["fee"]["cost"] = fee
+        self._close(order, "closed")
+        self.fills.append((int(self.now() * 1000), order["id"], order["symbol"], order["side"], price, amount, fee))
+
+    def _close(self, order, status):
+        order["status"] = status
+        self.open_ids[order["symbol"]].discard(order["id"])
+        self._finished.append(order["id"])
+        if len(self._finished) > ORDER_HISTORY:
+            self.orders.pop(self._finished.popleft(), None)
+
+    # ⏩ Deliver every order whose latency has elapsed by the exchange clock
+    def _deliver(self):
+        now = self.now()
+        while self._inbound and self._inbound[0][0] <= now:
+            order = self.orders.get(self._inbound.popleft()[1])
+            if order is not None:
+                self._arrive(order)
+
+    # 🔁 Resting limit orders the range [low, high] reaches fill at their own price
+    # (cancelled ones are dropped from the heap lazily, and may already be gone from the order history)
+    def _match(self, symbol, low, high):
+        bids = self._bids.get(symbol)
+        while bids and -bids[0][0] >= low:
+            order = self.orders.get(heapq.heappop(bids)[2])
+            if order is not None and order["status"] == "open":
+                self._fill(order, order["price"], self.maker_fee)
+        asks = self._asks.get(symbol)
+        while asks and asks[0][0] <= high:
+            order = self.orders.get(heapq.heappop(asks)[2])
+            if order is not None and order["status"] == "open":
+                self._fill(order, order["price"], self.maker_fee)
+
+    # 📡 One trade/tick, e.g. from market_stream (timestamp in seconds drives the exchange clock)
+    def update_price(self, symbol, price, timestamp=None):
+        with self._lock:
+            symbol = market_symbol(symbol)
+            if timestamp is not None:
+                self._now = timestamp
+            self._deliver()
+            self.prices[symbol] = price
+            self._match(symbol, price, price)
+
+    # 🕯 One candle (a CANDLE_DTYPE record); orders are filled as if its range traded after they arrived
+    def update_candle(self, symbol, record):
+        with self._lock:
+            symbol = market_symbol(symbol)
+            self._now = int(record["open_time"]) / 1000
+            self._deliver()
+            self.prices[symbol] = float(record["open"])
+            self._match(symbol, float(record["low"]), float(record["high"]))
+            self._now = (int(record["close_time"]) + 1) / 1000
+            self.prices[symbol] = float(record["close"])
+            self._deliver()
+
+    def update_candles(self, symbol, records):
+        for record in records:
+            self.update_candle(symbol, record)
+
+    # 📉 ccxt-shaped reads
+    def fetch_ticker(self, symbol):
+        with self._lock:
+            self._deliver()
+            symbol = market_symbol(symbol)
+            last = self.last_price(symbol)
+            return {"symbol": symbol, "last": last, "close": last, "timestamp": int(self.now() * 1000)}
+
+    def fetch_balance(self, params=None):
+        with self._lock:
+            self._deliver()
+            assets = set(self.free) | set(self.used)
+            free = {asset: self.free.get(asset, 0.0) for asset in assets}
+            used = {asset: self.used.get(asset, 0.0) for asset in assets}
+            total = {asset: free[asset] + used[asset] for asset in assets}
+            balance = {"free": free, "used": used, "total": total}
+            balance.update({asset: {"free": free[asset], "used": used[asset], "total": total[asset]} for asset in assets})
+            return balance
+
+    def fetch_order(self, id, symbol=None, params=None):
+        with self._lock:
+            self._deliver()
+            if id not in self.orders:
+                raise ccxt.OrderNotFound(f"Order {id} not found")
+            return self.orders[id]
+
+    def fetch_open_orders(self, symbol=None, since=None, limit=None, params=None):
+        with self._lock:
+            self._deliver()
+            symbols = [market_symbol(symbol)] if symbol else list(self.open_ids)
+            return [self.orders[id] for s in symbols for id in sorted(self.open_ids.get(s, ()), key=int)]
+
+    def cancel_order(self, id, symbol=None, params=None):
+        with self._lock:
+            order = self.orders.get(id)
+            if order is None or order["status"] != "open":
+                raise ccxt.OrderNotFound(f"Order {id} is not open")
+            base, quote = self._assets(order["symbol"])
+            self._release(quote if order["side"] == "buy" else base, self._reserved.pop(id))
+            self._close(order, "canceled")
+            return order
+
+# ⏱ Throughput check: random market and limit orders against a random-walk price
+def benchmark(orders=100_000, seed=0):
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    exchange = PaperExchange(balances={"USDT": 1e12, "BTC": 1e6})
+    exchange.update_price("BTCUSDT", 100.0, 0.0)
+    moves = 100.0 * np.exp(np.cumsum(rng.normal(0, 0.001, orders)))
+    kinds = rng.random(orders)
+    started = time.perf_counter()
+    for i in range(orders):
+        price = float(moves[i])
+        side = "buy" if kinds[i] < 0.5 else "sell"
+        if kinds[i] < 0.25 or kinds[i] > 0.75:
+            exchange.create_order("BTC/USDT", "market", side, 0.01)
+        else:
+            offset = 0.999 if side == "buy" else 1.001
+            exchange.create_order("BTC/USDT", "limit", side, 0.01, price * offset)
+        exchange.update_price("BTCUSDT", price, i * 0.01)
+    elapsed = time.perf_counter() - started
+    open_orders = len(exchange.fetch_open_orders("BTC/USDT"))
+    print(f"⚡ {orders} orders + {orders} ticks in {elapsed:.2f}s ({orders / elapsed:,.0f} orders/s) | "
+          f"{len(exchange.fills)} fills | {open_orders} still open")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Paper exchange throughput check")
+    parser.add_argument("--orders", type=int, default=100_000)
+    args = parser.parse_args()
+    benchmark(args.orders)
@@ -1,6 +1,7 @@
 import json
 import os
 from price_data import fetch_price_data
+from price_service import PRICE_SERVICE
 
 PORTFOLIO_FILE = "portfolio.json"
 
@@ -14,9 +15,12 @@ else:
         "positions": {}
     }
 
-# 📈 Get the latest closing price (1h timeframe)
+# 📈 Get the latest price (shared ticker snapshot; last 1h close if the ticker is unavailable)
 def get_current_price(symbol):
     try:
+        price = PRICE_SERVICE.get_price(symbol)
+        if price is not None:
+            return round(price, 2)
         df = fetch_price_data(symbol, "1h", days=1)
         return round(df['close'].iloc[-1], 2)
     except Exception as e:
@@ -62,12 +66,12 @@ def update_position(portfolio_data, symbol, action, price=None, capital_pct=0.05
     save_portfolio(portfolio_data)
     return portfolio_data
 
-# 🔁 Auto-check for Stop Loss or Take Profit
-def auto_exit_check(portfolio_data, symbol):
+# 🔁 Auto-check for Stop Loss or Take Profit (at current_price when a streamed price is given)
+def auto_exit_check(portfolio_data, symbol, current_price=None):
     if symbol not in portfolio_data["positions"]:
         return None
 
-    current_price = get_current_price(symbol)
+    current_price = current_price if current_price is not None else get_current_price(symbol)
     if current_price is None:
         return None
 
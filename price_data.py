@@ -1,55 +1,182 @@
-import requests
+import numpy as np
 import pandas as pd
 import time
-from datetime import datetime, timedelta
+import candle_store
+from rate_limiter import BINANCE_LIMITER, kline_weight
+from async_fetch import fetch_json_many_async
+from http_client import HTTP_CLIENT
 
-def fetch_price_data(symbol: str, interval: str = "1h", days: int = 90, save_csv=False):
-    base_url = "https://testnet.binancefuture.com/fapi/v1/klines"
-    limit = 1000
-    end_time = int(time.time() * 1000)
-    start_time = int((datetime.utcnow() - timedelta(days=days)).timestamp() * 1000)
+BASE_URL = "https://testnet.binancefuture.com/fapi/v1/klines"
+KLINE_LIMIT = 1000
+
+INTERVAL_MS = {
+    "1m": 60_000, "3m": 180_000, "5m": 300_000, "15m": 900_000, "30m": 1_800_000,
+    "1h": 3_600_000, "2h": 7_200_000, "4h": 14_400_000, "6h": 21_600_000,
+    "8h": 28_800_000, "12h": 43_200_000, "1d": 86_400_000, "3d": 259_200_000,
+    "1w": 604_800_000
+}
+
+# 📡 Page through Binance klines from start_time as candle records (returns None on failure)
+def download_klines(symbol, interval, start_time, end_time):
     all_data = []
-    print(f"📡 Fetching {symbol} | Interval: {interval} | Days: {days}")
     while start_time < end_time:
         params = {
             "symbol": symbol.upper(),
             "interval": interval,
             "startTime": start_time,
-            "limit": limit
+            "endTime": end_time,
+            "limit": KLINE_LIMIT
         }
-        for attempt in range(3):
-            try:
-                response = requests.get(base_url, params=params, timeout=10)
-                response.raise_for_status()
-                raw_data = response.json()
-                break
-            except Exception as e:
-                print(f"❌ Attempt {attempt+1} failed: {e}")
-                time.sleep(1.5)
-        else:
-            print(f"❌ Failed 3 times while fetching {symbol} {interval}")
-            return pd.DataFrame()
-        if not raw_data:
-            print("⚠️ No more data returned by Binance.")
+        # 🔌 Pages share the client's keep-alive connection to the host
+        response = HTTP_CLIENT.get(BASE_URL, params, kline_weight(KLINE_LIMIT), BINANCE_LIMITER, label=f"{symbol} {interval}")
+        if response is None:
+            print(f"❌ Failed while fetching {symbol} {interval}")
+            return None
+        try:
+            raw_data = candle_store.parse_klines(response.text)
+        except ValueError as e:
+            print(f"❌ Unreadable klines for {symbol} {interval}: {e}")
+            return None
+        if not len(raw_data):
+            break
+        all_data.append(raw_data)
+        if len(raw_data) < KLINE_LIMIT:
             break
-        all_data += raw_data
-        last_candle = raw_data[-1][0]
-        start_time = last_candle + 1
-        time.sleep(0.3)
-    if not all_data:
+        start_time = int(raw_data["open_time"][-1]) + 1
+    return np.concatenate(all_data) if all_data else np.empty(0, dtype=candle_store.CANDLE_DTYPE)
+
+# 🔄 Windows still missing from the local store: an optional backfill, then the top-up
+def plan_sync(symbol, interval, start_time, end_time):
+    stored = candle_store.load_candles(symbol, interval)
+    if not len(stored):
+        return [(start_time, end_time)]
+
+    windows = []
+    first_time, last_time = int(stored["open_time"][0]), int(stored["open_time"][-1])
+    if first_time > start_time + INTERVAL_MS.get(interval, 0):
+        # ⏪ Requested window starts before the store does
+        windows.append((start_time, first_time - 1))
+    # The last stored candle may have been open when saved, so it is fetched again
+    windows.append((last_time, end_time))
+    return windows
+
+# 🔄 Top up the local candle store: only candles after the last stored open_time
+def sync_candles(symbol, interval, start_time, end_time):
+    ok = True
+    for window_start, window_end in plan_sync(symbol, interval, start_time, end_time):
+        raw_data = download_klines(symbol, interval, window_start, window_end)
+        if raw_data is None:
+            ok = False
+        elif len(raw_data):
+            candle_store.save_candles(symbol, interval, raw_data)
+    return ok
+
+# 📑 Every page request for a window, planned up front so they can run concurrently
+def plan_pages(symbol, interval, window_start, window_end):
+    span = KLINE_LIMIT * INTERVAL_MS[interval]
+    pages = []
+    page_start = window_start
+    while page_start < window_end:
+        pages.append({
+            "symbol": symbol.upper(),
+            "interval": interval,
+            "startTime": page_start,
+            "endTime": min(page_start + span - 1, window_end),
+            "limit": KLINE_LIMIT
+        })
+        page_start += span
+    return pages
+
+def window_start_time(days):
+    return int(time.time() * 1000) - days * 86_400_000
+
+# 📏 Start of a window holding the last `bars` closed candles (plus the one still open)
+def bars_start_time(interval, bars, end_time):
+    return end_time - (bars + 1) * INTERVAL_MS[interval]
+
+def load_price_frame(symbol, interval, start_time, dtype=np.float64):
+    records = candle_store.load_candles(symbol, interval, start_time)
+    if not len(records):
+        return pd.DataFrame()
+    return candle_store.to_frame(records, dtype=dtype)
+
+# bars (closed candles wanted) overrides days, e.g. signal_logic.required_bars() for live signals;
+# dtype=np.float32 halves the OHLCV columns for large symbol sets
+def fetch_price_data(symbol: str, interval: str = "1h", days: int = 90, save_csv=False, bars=None, dtype=np.float64):
+    end_time = int(time.time() * 1000)
+    if bars:
+        start_time = bars_start_time(interval, bars, end_time)
+        print(f"📡 Fetching {symbol} | Interval: {interval} | Bars: {bars}")
+    else:
+        start_time = window_start_time(days)
+        print(f"📡 Fetching {symbol} | Interval: {interval} | Days: {days}")
+
+    if not sync_candles(symbol, interval, start_time, end_time):
+        if not len(candle_store.load_candles(symbol, interval, start_time)):
+            return pd.DataFrame()
+        print(f"⚠️ Using stored candles for {symbol} {interval}")
+
+    df = load_price_frame(symbol, interval, start_time, dtype)
+    if df.empty:
         raise ValueError(f"⚠️ No data found for {symbol}")
-    df = pd.DataFrame(all_data, columns=[
-        "open_time", "open", "high", "low", "close", "volume",
-        "close_time", "quote_asset_volume", "number_of_trades",
-        "taker_buy_base", "taker_buy_quote", "ignore"
-    ])
-    df["open_time"] = pd.to_datetime(df["open_time"], unit="ms")
-    df["close_time"] = pd.to_datetime(df["close_time"], unit="ms")
-    df[["open", "high", "low", "close", "volume"]] = df[["open", "high", "low", "close", "volume"]].astype(float)
-    df.set_index("open_time", inplace=True)
     if save_csv:
         filename = f"{symbol}_{interval}_last_{days}_days.csv"
         df.to_csv(filename)
         print(f"✅ Saved to CSV: {filename}")
     print(f"✅ Loaded: {symbol} | {len(df)} candles")
     return df
+
+# ⚡ Fetch many (symbol, interval) series at once: every page of every series runs concurrently
+async def fetch_price_data_many_async(series, days: int = 90, session=None, bars=None, dtype=np.float64):
+    end_time = int(time.time() * 1000)
+    if bars:
+        start_times = {interval: bars_start_time(interval, bars, end_time) for _, interval in series}
+        print(f"📡 Fetching {len(series)} series concurrently | Bars: {bars}")
+    else:
+        start_times = {interval: window_start_time(days) for _, interval in series}
+        print(f"📡 Fetching {len(series)} series concurrently | Days: {days}")
+
+    windows = []
+    backfills = set()
+    page_owner = []
+    requests_to_send = []
+    for symbol, interval in series:
+        start_time = start_times[interval]
+        for window_start, window_end in plan_sync(symbol, interval, start_time, end_time):
+            windows.append((symbol, interval))
+            if window_end < end_time:
+                # ⏪ Backfill: ends just before the first stored candle
+                backfills.add(len(windows) - 1)
+            for params in plan_pages(symbol, interval, window_start, window_end):
+                page_owner.append(len(windows) - 1)
+                requests_to_send.append((BASE_URL, params, kline_weight(KLINE_LIMIT)))
+
+    pages = await fetch_json_many_async(requests_to_send, session=session, parse=candle_store.parse_klines)
+
+    collected = [[] for _ in windows]
+    broken = set()
+    for window_index, raw_data in zip(page_owner, pages):
+        if window_index in broken:
+            continue
+        if raw_data is None:
+            # A top-up keeps the pages before the failure (they follow the stored candles);
+            # a backfill is dropped whole, since its pages would not reach the first stored candle
+            broken.add(window_index)
+            if window_index in backfills:
+                collected[window_index] = []
+        else:
+            collected[window_index].append(raw_data)
+    failed = {windows[window_index] for window_index in broken}
+
+    # 💾 Pages come back in plan order, and each window is saved on its own (backfill, then top-up)
+    for (symbol, interval), window_pages in zip(windows, collected):
+        if window_pages:
+            candle_store.save_candles(symbol, interval, np.concatenate(window_pages))
+
+    frames = {}
+    for symbol, interval in series:
+        if (symbol, interval) in failed:
+            print(f"⚠️ Some pages failed for {symbol} {interval}, using stored candles")
+        frames[(symbol, interval)] = load_price_frame(symbol, interval, start_times[interval], dtype)
+        print(f"✅ Loaded: {symbol} {interval} | {len(frames[(symbol, interval)])} candles")
+    return frames
@@ -0,0 +1,104 @@
+import threading
+import time
+from http_client import HTTP_CLIENT
+from rate_limiter import BINANCE_LIMITER
+
+FAPI_URL = "https://testnet.binancefuture.com/fapi/v1"
+PRICE_TTL = 10        # seconds a bulk snapshot is served from memory
+STALE_LIMIT = 60      # seconds an old snapshot may stand in when a refresh fails
+REQUEST_TIMEOUT = 10
+LIVE_PRICE_AGE = 5    # seconds a streamed price is preferred over the polled snapshot
+
+# 📡 One request returns every symbol: (endpoint, request weight, price field)
+ENDPOINTS = {
+    "last": ("/ticker/price", 2, "price"),
+    "mark": ("/premiumIndex", 10, "markPrice")
+}
+
+# 🧠 BTC/USDT → BTCUSDT
+def normalize_symbol(symbol):
+    return symbol.replace("/", "").upper()
+
+# 💹 Last/mark prices for all symbols from a short-lived bulk snapshot
+class PriceService:
+    def __init__(self, ttl=PRICE_TTL, stale_limit=STALE_LIMIT, clock=time.monotonic):
+        self.ttl = ttl
+        self.stale_limit = stale_limit
+        self.clock = clock
+        self.requests_made = 0
+        self._snapshots = {}  # kind → (fetched_at, {symbol: price})
+        self._inflight = {}   # kind → Event set when the running refresh finishes
+        self._live = {}       # symbol → (received_at, price) pushed by market_stream
+        self._lock = threading.Lock()
+
+    def _fetch(self, kind):
+        path, weight, field = ENDPOINTS[kind]
+        self.requests_made += 1
+        response = HTTP_CLIENT.get(FAPI_URL + path, weight=weight, limiter=BINANCE_LIMITER,
+                                   timeout=REQUEST_TIMEOUT, label=f"{kind} prices")
+        if response is None:
+            return None
+        try:
+            return {row["symbol"]: float(row[field]) for row in response.json()}
+        except Exception as e:
+            print(f"❌ Unreadable {kind} prices: {e}")
+            return None
+
+    # 🔁 Fresh snapshot for a kind; concurrent callers share the one refresh already running
+    def snapshot(self, kind="last"):
+        with self._lock:
+            cached = self._snapshots.get(kind)
+            if cached and self.clock() - cached[0] < self.ttl:
+                return cached[1]
+            event = self._inflight.get(kind)
+            leader = event is None
+            if leader:
+                event = self._inflight[kind] = threading.Event()
+
+        if not leader:
+            event.wait(REQUEST_TIMEOUT * 3)
+            with self._lock:
+                cached = self._snapshots.get(kind)
+                return cached[1] if cached and self.clock() - cached[0] < self.stale_limit else {}
+
+        prices = None
+        try:
+            prices = self._fetch(kind)
+        finally:
+            with self._lock:
+                if prices is not None:
+                    self._snapshots[kind] = (self.clock(), prices)
+                else:
+                    cached = self._snapshots.get(kind)
+                    if cached and self.clock() - cached[0] < self.stale_limit:
+                        print(f"⚠️ Using {kind} prices from {self.clock() - cached[0]:.0f}s ago")
+                        prices = cached[1]
+                del self._inflight[kind]
+                event.set()
+        return prices or {}
+
+    # 📡 Latest streamed trade price (see market_stream.MarketStream)
+    def update_live(self, symbol, price):
+        self._live[normalize_symbol(symbol)] = (self.clock(), price)
+
+    def get_price(self, symbol):
+        symbol = normalize_symbol(symbol)
+        live = self._live.get(symbol)
+        if live and self.clock() - live[0] < LIVE_PRICE_AGE:
+            return live[1]
+        return self.snapshot("last").get(symbol)
+
+    def get_mark_price(self, symbol):
+        return self.snapshot("mark").get(normalize_symbol(symbol))
+
+    def get_prices(self, symbols=None, kind="last"):
+        prices = self.snapshot(kind)
+        if symbols is None:
+            return dict(prices)
+        return {symbol: prices.get(normalize_symbol(symbol)) for symbol in symbols}
+
+    def invalidate(self):
+        with self._lock:
+            self._snapshots.clear()
+
+PRICE_SERVICE = PriceService()
@@ -0,0 +1,64 @@
+import asyncio
+import threading
+import time
+
+# ⚖️ Binance USDT-M futures request-weight budget
+WEIGHT_LIMIT_PER_MINUTE = 2400
+
+# 🪣 Token bucket shared by threads and event loops (tokens may go negative = queued waiters)
+class TokenBucket:
+    def __init__(self, capacity, refill_per_second):
+        self.capacity = capacity
+        self.rate = refill_per_second
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, weight=1):
+        """Takes weight tokens now and returns how long the caller must wait before using them."""
+        with self._lock:
+            self._refill()
+            self.tokens -= weight
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def acquire_sync(self, weight=1):
+        wait = self.reserve(weight)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire(self, weight=1):
+        wait = self.reserve(weight)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def observe_used_weight(self, used_weight):
+        """Syncs with the X-MBX-USED-WEIGHT-1M header Binance returns on each response."""
+        try:
+            used_weight = float(used_weight)
+        except (TypeError, ValueError):
+            return
+        with self._lock:
+            self._refill()
+            self.tokens = min(self.tokens, self.capacity - used_weight)
+
+# 📏 Request weight of GET /fapi/v1/klines by limit
+def kline_weight(limit):
+    if limit < 100:
+        return 1
+    if limit < 500:
+        return 2
+    if limit <= 1000:
+        return 5
+    return 10
+
+BINANCE_LIMITER = TokenBucket(WEIGHT_LIMIT_PER_MINUTE, WEIGHT_LIMIT_PER_MINUTE / 60)
+
+# ⚖️ Binance spot (api.binance.com, used by download_data.py) has its own, larger budget
+SPOT_WEIGHT_LIMIT_PER_MINUTE = 6000
+SPOT_KLINE_WEIGHT = 2  # GET /api/v3/klines, any limit
+SPOT_LIMITER = TokenBucket(SPOT_WEIGHT_LIMIT_PER_MINUTE, SPOT_WEIGHT_LIMIT_PER_MINUTE / 60)
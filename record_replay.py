@@ -0,0 +1,341 @@
+import argparse
+import contextlib
+import copy
+import gzip
+import json
+import os
+import tempfile
+import time
+from urllib.parse import parse_qsl, urlencode, urlsplit
+import async_fetch
+import binance_trade
+import candle_store
+import news_sentiment
+import portfolio_manager
+import price_data
+import sentiment_store
+import signal_logic
+import trade_store
+from http_client import HTTP_CLIENT
+from price_service import PRICE_SERVICE
+
+ARCHIVE_VERSION = 1
+ARCHIVE_FILE = "cycles.jsonl.gz"
+
+# 🕰 Modules whose time.time() is pinned to the cycle's start, so request windows
+# and "closed candle" cut-offs come out the same when a cycle is replayed
+CLOCK_MODULES = [price_data, signal_logic, news_sentiment]
+
+# 🔑 Credentials never make it into the archive (NewsAPI takes its key in the URL)
+SECRET_PARAMS = {"apiKey", "signature"}
+
+def request_key(url, params=None):
+    parts = urlsplit(url)
+    query = parse_qsl(parts.query) + list((params or {}).items())
+    query = sorted((name, str(value)) for name, value in query if name not in SECRET_PARAMS)
+    return f"GET {parts.scheme}://{parts.netloc}{parts.path}?{urlencode(query)}"
+
+def call_key(method, args, kwargs):
+    return f"{method} {json.dumps([list(args), kwargs], sort_keys=True, default=str)}"
+
+def plain(value):
+    return json.loads(json.dumps(value, default=str))
+
+class FrozenClock:
+    def __init__(self, at):
+        self.at = at
+
+    def time(self):
+        return self.at
+
+    def __getattr__(self, name):
+        return getattr(time, name)
+
+@contextlib.contextmanager
+def frozen_clock(at):
+    for module in CLOCK_MODULES:
+        module.time = FrozenClock(at)
+    try:
+        yield
+    finally:
+        for module in CLOCK_MODULES:
+            module.time = time
+
+# 📋 What a cycle decided: the signal per symbol and the portfolio it left behind
+def cycle_outcome():
+    import main
+    portfolio = portfolio_manager.get_portfolio()
+    return plain({
+        "signals": {symbol: [final["signal"], final["timeframe"], final["reason"]]
+                    for symbol, final in main.final_signals.items()},
+        "balance": portfolio.get("balance"),
+        "positions": portfolio.get("positions", {})
+    })
+
+# 📜 A recorded response stood in for the live one
+class ReplayResponse:
+    status_code = 200
+    headers = {}
+
+    def __init__(self, text):
+        self.text = text
+
+    def json(self):
+        return json.loads(self.text)
+
+# 📼 ccxt client wrapper that logs every call with its result (or error)
+class RecordingExchange:
+    def __init__(self, exchange, events):
+        self._exchange = exchange
+        self._events = events
+
+    def __getattr__(self, name):
+        attr = getattr(self._exchange, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            event = {"kind": "ccxt", "key": call_key(name, args, kwargs)}
+            try:
+                result = attr(*args, **kwargs)
+                event["result"] = plain(result)
+                return result
+            except Exception as e:
+                event["error"] = str(e)
+                raise
+            finally:
+                self._events.append(event)
+        return call
+
+# ▶️ ccxt stand-in answering from the recorded calls of the current cycle
+class ReplayExchange:
+    def __init__(self, player):
+        self._player = player
+
+    def __getattr__(self, name):
+        def call(*args, **kwargs):
+            event = self._player.next_event("ccxt", call_key(name, args, kwargs))
+            if event is None:
+                raise Exception(f"no recorded response for {name}")
+            if "error" in event:
+                raise Exception(event["error"])
+            return event["result"]
+        return call
+
+# 🔴 Capture every outbound response of live cycles into one gzip'd JSON-lines archive
+class Recorder:
+    """
+    Line 1 holds the starting state (portfolio and trade history); each further line is
+    one cycle: its start time, jobs, every HTTP/ccxt response in call order, the outcome
+    and how long it took. The candle and news stores start empty so every kline and
+    article is fetched (and recorded).
+    """
+    def __init__(self, path=ARCHIVE_FILE):
+        self.path = path
+        self.cycles = 0
+        self._events = []
+        self._originals = {}
+        self._file = None
+        self._store = None
+
+    def _get(self, url, params=None, *args, **kwargs):
+        response = self._originals["get"](url, params, *args, **kwargs)
+        self._events.append({"kind": "http", "key": request_key(url, params),
+                             "text": response.text if response is not None else None})
+        return response
+
+    async def _fetch_json(self, session, semaphore, url, params, weight=1, limiter=async_fetch.BINANCE_LIMITER, parse=None):
+        captured = {}
+
+        def capture(text):
+            captured["text"] = text
+            return parse(text) if parse is not None else json.loads(text)
+        result = await self._originals["fetch_json"](session, semaphore, url, params, weight, limiter, capture)
+        self._events.append({"kind": "http", "key": request_key(url, params), "text": captured.get("text")})
+        return result
+
+    def start(self):
+        self._store = tempfile.TemporaryDirectory(prefix="record-candles-")
+        self._originals = {"get": HTTP_CLIENT.get, "fetch_json": async_fetch.fetch_json,
+                           "binance": binance_trade.binance, "store_dir": candle_store.STORE_DIR,
+                           "news_db": sentiment_store.SENTIMENT_STORE.path}
+        HTTP_CLIENT.get = self._get
+        async_fetch.fetch_json = self._fetch_json
+        binance_trade.binance = RecordingExchange(self._originals["binance"], self._events)
+        candle_store.STORE_DIR = self._store.name
+        sentiment_store.SENTIMENT_STORE.close()
+        sentiment_store.SENTIMENT_STORE.path = os.path.join(self._store.name, sentiment_store.SENTIMENT_DB_FILE)
+
+        self._file = gzip.open(self.path, "wt", encoding="utf-8")
+        self._write({"version": ARCHIVE_VERSION, "portfolio": plain(portfolio_manager.get_portfolio()),
+                     "trades": trade_store.load_trades()})
+        print(f"🔴 Recording cycles to {self.path}")
+        return self
+
+    def _write(self, line):
+        self._file.write(json.dumps(line, separators=(",", ":")) + "\n")
+        self._file.flush()
+
+    def run_cycle(self, jobs=None):
+        import main
+        self._events.clear()
+        PRICE_SERVICE.invalidate()
+        at = time.time()
+        started = time.perf_counter()
+        with frozen_clock(at):
+            main.run_full_analysis(jobs)
+        seconds = time.perf_counter() - started
+        self._write({"index": self.cycles, "time": at, "jobs": jobs, "seconds": seconds,
+                     "events": list(self._events), "outcome": cycle_outcome()})
+        print(f"🔴 Cycle {self.cycles} recorded: {len(self._events)} responses in {seconds:.2f}s")
+        self.cycles += 1
+
+    def close(self):
+        HTTP_CLIENT.get = self._originals["get"]
+        async_fetch.fetch_json = self._originals["fetch_json"]
+        binance_trade.binance = self._originals["binance"]
+        candle_store.STORE_DIR = self._originals["store_dir"]
+        sentiment_store.SENTIMENT_STORE.close()
+        sentiment_store.SENTIMENT_STORE.path = self._originals["news_db"]
+        self._file.close()
+        self._store.cleanup()
+        print(f"💾 {self.cycles} cycles in {self.path} ({os.path.getsize(self.path) / 1024:.0f} KiB)")
+
+# ▶️ Re-run recorded cycles offline, as fast as they compute, and report drift
+class Player:
+    """
+    Runs in a scratch directory seeded with the recorded starting state, so the live
+    portfolio, trade history and candle store are never touched. A request the archive
+    has no answer for counts as a miss and fails the way a network error would.
+    """
+    def __init__(self, path=ARCHIVE_FILE):
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            lines = [json.loads(line) for line in f]
+        self.path = path
+        self.start_state = lines[0]
+        self.cycles = lines[1:]
+        self.misses = 0
+        self._queues = {}
+
+    def next_event(self, kind, key):
+        queue = self._queues.get((kind, key))
+        if not queue:
+            self.misses += 1
+            print(f"⚠️ Replay miss: {key}")
+            return None
+        return queue.pop(0)
+
+    def _get(self, url, params=None, *args, **kwargs):
+        event = self.next_event("http", request_key(url, params))
+        if event is None or event["text"] is None:
+            return None
+        return ReplayResponse(event["text"])
+
+    async def _fetch_json(self, session, semaphore, url, params, weight=1, limiter=None, parse=None):
+        event = self.next_event("http", request_key(url, params))
+        if event is None or event["text"] is None:
+            return None
+        return parse(event["text"]) if parse is not None else json.loads(event["text"])
+
+    def _load_cycle(self, cycle):
+        self._queues = {}
+        for event in cycle["events"]:
+            self._queues.setdefault((event["kind"], event["key"]), []).append(event)
+
+    def run(self):
+        import main
+        workdir = tempfile.TemporaryDirectory(prefix="replay-")
+        cwd = os.getcwd()
+        originals = (HTTP_CLIENT.get, async_fetch.fetch_json, binance_trade.binance)
+        portfolio = portfolio_manager.get_portfolio()
+        saved_portfolio = copy.deepcopy(portfolio)
+        try:
+            # The trade and news stores reconnect inside the scratch directory
+            trade_store.close()
+            sentiment_store.SENTIMENT_STORE.close()
+            os.chdir(workdir.name)
+            with open(trade_store.LEGACY_JSON_FILE, "w") as f:
+                json.dump(self.start_state["trades"], f)
+            portfolio.clear()
+            portfolio.update(self.start_state["portfolio"])
+            HTTP_CLIENT.get = self._get
+            async_fetch.fetch_json = self._fetch_json
+            binance_trade.binance = ReplayExchange(self)
+
+            drift = []
+            timings = []
+            for cycle in self.cycles:
+                self._load_cycle(cycle)
+                PRICE_SERVICE.invalidate()
+                started = time.perf_counter()
+                with frozen_clock(cycle["time"]):
+                    main.run_full_analysis(cycle["jobs"])
+                timings.append(time.perf_counter() - started)
+                outcome = cycle_outcome()
+                if outcome != cycle["outcome"]:
+                    drift.append((cycle["index"], cycle["outcome"], outcome))
+                unused = sum(len(queue) for queue in self._queues.values())
+                if unused:
+                    print(f"⚠️ Cycle {cycle['index']}: {unused} recorded responses were never requested")
+        finally:
+            HTTP_CLIENT.get, async_fetch.fetch_json, binance_trade.binance = originals
+            portfolio.clear()
+            portfolio.update(saved_portfolio)
+            trade_store.close()
+            sentiment_store.SENTIMENT_STORE.close()
+            os.chdir(cwd)
+            workdir.cleanup()
+        return self.report(timings, drift)
+
+    def report(self, timings, drift):
+        recorded = sum(cycle["seconds"] for cycle in self.cycles)
+        replayed = sum(timings)
+        print(f"\n▶️ Replayed {len(timings)} cycles from {self.path} in {replayed:.2f}s "
+              f"(recorded live: {recorded:.1f}s) | {self.misses} misses")
+        if timings:
+            ordered = sorted(timings)
+            print(f"⏱ Per cycle: median {ordered[len(ordered) // 2] * 1000:.1f}ms | max {ordered[-1] * 1000:.1f}ms")
+        for index, expected, actual in drift:
+            print(f"❌ Drift in cycle {index}:")
+            for field in expected:
+                if expected[field] != actual.get(field):
+                    print(f"   {field}: recorded {expected[field]} | replayed {actual.get(field)}")
+        if not drift:
+            print("✅ No drift: every cycle reached the recorded signals and portfolio")
+        return {"cycles": len(timings), "seconds": replayed, "timings": timings, "misses": self.misses, "drift": drift}
+
+# 🔴 Record live cycles: one full cycle now, then one per candle close like main's scheduler
+def record(path=ARCHIVE_FILE, cycles=1):
+    import main
+    from candle_scheduler import CandleScheduler
+    recorder = Recorder(path).start()
+    try:
+        recorder.run_cycle()
+        if cycles > 1:
+            scheduler = CandleScheduler([(symbol, tf) for symbol in main.SYMBOLS for tf in main.TIMEFRAMES],
+                                        recorder.run_cycle)
+            while recorder.cycles < cycles:
+                time.sleep(max(0.0, scheduler.seconds_until_next()))
+                scheduler.run_pending()
+    except KeyboardInterrupt:
+        print("⏹ Recording stopped")
+    finally:
+        recorder.close()
+
+def replay(path=ARCHIVE_FILE):
+    return Player(path).run()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Record live analysis cycles, or replay them offline")
+    sub = parser.add_subparsers(dest="mode", required=True)
+    record_parser = sub.add_parser("record", help="run live cycles and archive every response")
+    record_parser.add_argument("--cycles", type=int, default=1)
+    record_parser.add_argument("--out", default=ARCHIVE_FILE)
+    replay_parser = sub.add_parser("replay", help="re-run archived cycles offline and check for drift")
+    replay_parser.add_argument("archive", nargs="?", default=ARCHIVE_FILE)
+    args = parser.parse_args()
+    if args.mode == "record":
+        record(args.out, args.cycles)
+    else:
+        result = replay(args.archive)
+        raise SystemExit(1 if result["drift"] or result["misses"] else 0)
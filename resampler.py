@@ -0,0 +1,99 @@
+import threading
+import numpy as np
+import candle_store
+from candle_store import CANDLE_DTYPE
+from price_data import INTERVAL_MS
+
+# 📅 Binance weekly candles open on Monday 00:00 UTC; the epoch was a Thursday
+BUCKET_OFFSET_MS = {"1w": 4 * 86_400_000}
+
+# How each candle field combines across the base candles of one bucket
+FIRST_FIELDS = ["open"]
+LAST_FIELDS = ["close"]
+SUM_FIELDS = ["volume", "quote_asset_volume", "number_of_trades", "taker_buy_base", "taker_buy_quote"]
+
+# 🧱 Finest of the timeframes that every other one is a whole multiple of (the series to download)
+def base_interval(timeframes):
+    finest = min(timeframes, key=INTERVAL_MS.get)
+    step = INTERVAL_MS[finest]
+    for tf in timeframes:
+        if INTERVAL_MS[tf] % step or BUCKET_OFFSET_MS.get(tf, 0) % step:
+            raise ValueError(f"{tf} candles can't be built from {finest} candles")
+    return finest
+
+# 📏 Base candles needed to build `bars` candles of every timeframe (+1 bucket for the one still forming)
+def base_bars(base, timeframes, bars):
+    return max(INTERVAL_MS[tf] // INTERVAL_MS[base] for tf in timeframes) * (bars + 1)
+
+def bucket_start(open_times, interval):
+    step = INTERVAL_MS[interval]
+    offset = BUCKET_OFFSET_MS.get(interval, 0)
+    return (open_times - offset) // step * step + offset
+
+# 🧮 Base candle records → records of a coarser interval (same CANDLE_DTYPE)
+def resample_records(records, interval):
+    """
+    Buckets are aligned like Binance's own klines (epoch-aligned UTC, Monday weeks).
+    close_time is the end of the bucket, so a bucket that is still forming keeps a
+    close_time in the future and signal_logic.closed_candles drops it as usual.
+    """
+    if not len(records):
+        return np.empty(0, dtype=CANDLE_DTYPE)
+    open_times = np.asarray(records["open_time"])
+    starts = bucket_start(open_times, interval)
+    edges = np.flatnonzero(np.r_[True, starts[1:] != starts[:-1]])
+    ends = np.r_[edges[1:], len(records)] - 1
+
+    out = np.empty(len(edges), dtype=CANDLE_DTYPE)
+    out["open_time"] = starts[edges]
+    out["close_time"] = starts[edges] + INTERVAL_MS[interval] - 1
+    for name in FIRST_FIELDS:
+        out[name] = records[name][edges]
+    for name in LAST_FIELDS:
+        out[name] = records[name][ends]
+    out["high"] = np.maximum.reduceat(records["high"], edges)
+    out["low"] = np.minimum.reduceat(records["low"], edges)
+    for name in SUM_FIELDS:
+        out[name] = np.add.reduceat(records[name], edges)
+    return out
+
+# 🔁 Higher timeframes derived from the stored base series, cached and extended as base candles arrive
+class Resampler:
+    def __init__(self, base=None):
+        self.base = base
+        self._cache = {}  # (symbol, interval) → resampled records
+        self._lock = threading.Lock()
+
+    def records(self, symbol, interval, base=None):
+        base = base or self.base or interval
+        if interval == base:
+            return np.asarray(candle_store.load_candles(symbol, base))
+
+        with self._lock:
+            cached = self._cache.get((symbol, interval))
+            stored = candle_store.load_candles(symbol, base)
+            if (cached is not None and len(cached) and len(stored)
+                    and bucket_start(stored["open_time"][:1], interval)[0] == cached["open_time"][0]):
+                # ➕ Rebuild only from the newest cached bucket, which may have been incomplete
+                since = int(cached["open_time"][-1])
+                tail = resample_records(stored[np.searchsorted(stored["open_time"], since):], interval)
+                updated = np.concatenate([cached[:-1], tail])
+            else:
+                # 🆕 First request, or the base history was backfilled: resample all of it
+                updated = resample_records(stored, interval)
+            self._cache[(symbol, interval)] = updated
+            return updated
+
+    # 📊 Last `bars` candles of an interval in the fetch_price_data DataFrame layout
+    def frame(self, symbol, interval, bars=None, base=None, dtype=np.float64):
+        records = self.records(symbol, interval, base)
+        if bars:
+            records = records[-bars:]
+        return candle_store.to_frame(records, dtype=dtype)
+
+    def invalidate(self, symbol=None):
+        with self._lock:
+            for key in [key for key in self._cache if symbol is None or key[0] == symbol]:
+                del self._cache[key]
+
+RESAMPLER = Resampler()
@@ -0,0 +1,182 @@
+import hashlib
+import re
+import sqlite3
+import threading
+import numpy as np
+import pandas as pd
+from price_data import INTERVAL_MS
+
+SENTIMENT_DB_FILE = "sentiment_history.db"
+LABELS = ["bullish", "bearish", "neutral"]  # an exact tie goes to the first, as in fetch_and_analyze_news' max()
+WINDOW_MS = 6 * 3_600_000  # a reading rolls up the articles published in the 6 hours before it
+ARTICLE_WINDOW = None       # optional cap on how many of those (newest first) count
+
+# 🕰 Publish time → epoch ms ("2024-05-01T12:34:56Z" from NewsAPI, or already ms)
+def to_ms(published_at):
+    if isinstance(published_at, (int, np.integer)):
+        return int(published_at)
+    stamp = pd.Timestamp(published_at)
+    if stamp.tzinfo is not None:
+        stamp = stamp.tz_convert("UTC").tz_localize(None)
+    return int(stamp.value // 1_000_000)
+
+# #️⃣ Same story under another URL (syndicated copies, tracking parameters) → same hash
+def content_hash(title, description):
+    text = re.sub(r"\s+", " ", f"{title} {description}".lower()).strip()
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+# 🗞 Scored articles by publish time, read back as sentiment "as of" any moment
+class SentimentStore:
+    """
+    Each article keeps the label and confidence smart_sentiment gave it, so it is scored
+    once. A reading at time t rolls up the articles published in (t - max_age, t] (only
+    the newest `window` of them when a cap is set) with fetch_and_analyze_news' rules; live
+    cycles and backtest bars read sentiment the same way.
+    Lookups are a binary search plus differences of prefix sums: O(log n) per bar.
+    """
+    def __init__(self, path=SENTIMENT_DB_FILE, window=ARTICLE_WINDOW, max_age=WINDOW_MS):
+        self.path = path
+        self.window = window
+        self.max_age = max_age
+        self._conn = None
+        self._timelines = {}   # symbol (None = every article) → (publish times, score prefix sums)
+        self._lock = threading.RLock()
+
+    def connection(self):
+        with self._lock:
+            if self._conn is None:
+                conn = sqlite3.connect(self.path, check_same_thread=False)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS articles (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        published_at INTEGER NOT NULL,
+                        url TEXT UNIQUE,
+                        title TEXT,
+                        label TEXT NOT NULL,
+                        confidence REAL NOT NULL,
+                        symbols TEXT NOT NULL DEFAULT '',
+                        content_hash TEXT
+                    )
+                """)
+                if "content_hash" not in [row[1] for row in conn.execute("PRAGMA table_info(articles)")]:
+                    conn.execute("ALTER TABLE articles ADD COLUMN content_hash TEXT")
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_articles_published ON articles (published_at, id)")
+                conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_articles_hash ON articles (content_hash)")
+                conn.commit()
+                self._conn = conn
+            return self._conn
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+            self._timelines.clear()
+
+    # ➕ Scored articles ({published_at, url, title, label, confidence, symbols, content_hash});
+    # a known URL or content hash is skipped
+    def add_articles(self, articles):
+        rows = [
+            (to_ms(a["published_at"]), a.get("url") or None, a.get("title", ""), a["label"].lower(),
+             float(a["confidence"]), ",".join(a.get("symbols", [])), a.get("content_hash"))
+            for a in articles
+        ]
+        with self._lock:
+            conn = self.connection()
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO articles (published_at, url, title, label, confidence, symbols, content_hash) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            conn.commit()
+            added = conn.total_changes - before
+            if added:
+                self._timelines.clear()
+        return added
+
+    def count(self):
+        return self.connection().execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+
+    # 🔖 Watermark: publish time (ms) of the newest stored article, None when empty
+    def latest_published(self):
+        return self.connection().execute("SELECT MAX(published_at) FROM articles").fetchone()[0]
+
+    # 🔍 Which of these URLs / content hashes are already stored: (urls, hashes)
+    def known(self, urls, hashes):
+        conn = self.connection()
+        found_urls, found_hashes = set(), set()
+        for column, values, found in (("url", list(urls), found_urls), ("content_hash", list(hashes), found_hashes)):
+            for offset in range(0, len(values), 500):
+                chunk = values[offset:offset + 500]
+                rows = conn.execute(f"SELECT {column} FROM articles WHERE {column} IN ({', '.join('?' * len(chunk))})", chunk)
+                found.update(row[0] for row in rows)
+        return found_urls, found_hashes
+
+    # 📰 The articles a reading at time t rolls up, newest first
+    def recent(self, t, symbol=None):
+        since = t - self.max_age if self.max_age is not None else -1
+        rows = self.connection().execute(
+            "SELECT published_at, url, title, label, confidence, symbols FROM articles "
+            "WHERE published_at <= ? AND published_at > ? ORDER BY published_at DESC, id DESC",
+            (int(t), int(since))
+        ).fetchall()
+        articles = [
+            {"published_at": row[0], "url": row[1], "title": row[2], "label": row[3], "confidence": row[4],
+             "symbols": [s for s in row[5].split(",") if s]}
+            for row in rows
+        ]
+        if symbol is not None:
+            articles = [a for a in articles if symbol in a["symbols"]]
+        return articles[:self.window] if self.window is not None else articles
+
+    # 📚 Prefix sums over articles in publish order (confidence in hundredths, so sums are exact)
+    def timeline(self, symbol=None):
+        with self._lock:
+            if symbol in self._timelines:
+                return self._timelines[symbol]
+            rows = self.connection().execute(
+                "SELECT published_at, label, confidence, symbols FROM articles ORDER BY published_at, id"
+            ).fetchall()
+            if symbol is not None:
+                rows = [row for row in rows if symbol in row[3].split(",")]
+            published = np.array([row[0] for row in rows], dtype=np.int64)
+            label_index = np.array([LABELS.index(row[1]) for row in rows], dtype=np.int64)
+            scores = np.zeros((len(rows) + 1, len(LABELS)), dtype=np.int64)
+            if rows:
+                scores[np.arange(1, len(rows) + 1), label_index] = np.rint([row[2] * 100 for row in rows])
+            timeline = (published, np.cumsum(scores, axis=0))
+            self._timelines[symbol] = timeline
+            return timeline
+
+    # 🔗 As-of join: sentiment (BULLISH/BEARISH/NEUTRAL), confidence and article count at each time (epoch ms)
+    def asof(self, times, symbol=None):
+        published, scores = self.timeline(symbol)
+        times = np.asarray(times, dtype=np.int64)
+        hi = np.searchsorted(published, times, side="right")
+        lo = np.maximum(hi - self.window, 0) if self.window is not None else np.zeros_like(hi)
+        if self.max_age is not None:
+            lo = np.maximum(lo, np.searchsorted(published, times - self.max_age, side="right"))
+        window_scores = scores[hi] - scores[lo]
+        articles = hi - lo
+        best = np.argmax(window_scores, axis=-1)
+        confidence = np.take_along_axis(window_scores, best[..., None], axis=-1)[..., 0] / 100 / np.maximum(articles, 1)
+        sentiment = np.array([label.upper() for label in LABELS], dtype=object)[best]
+        sentiment[articles == 0] = "NEUTRAL"
+        return sentiment, np.round(confidence, 2), articles
+
+    # 📈 One reading per bar of an interval, taken as of each bar's close
+    def series(self, interval, start_time, end_time, symbol=None):
+        step = INTERVAL_MS[interval]
+        open_times = np.arange(start_time // step * step, end_time, step, dtype=np.int64)
+        sentiment, confidence, articles = self.asof(open_times + step - 1, symbol)
+        index = pd.to_datetime(open_times, unit="ms")
+        return pd.DataFrame({"sentiment": sentiment, "confidence": confidence, "articles": articles}, index=index)
+
+    # 🕯 Readings aligned to a candle frame (fetch_price_data layout: open-time index, close_time column)
+    def for_frame(self, df, symbol=None):
+        close_times = df["close_time"].to_numpy(dtype="datetime64[ms]").astype(np.int64)
+        return self.asof(close_times, symbol)
+
+SENTIMENT_STORE = SentimentStore()
@@ -1,13 +1,45 @@
 import sys
 sys.path.append('./strategy')
 
+import time
+import numpy as np
 import pandas as pd
-from ta.trend import MACD, EMAIndicator, ADXIndicator
-from ta.momentum import RSIIndicator
-from ta.volatility import BollingerBands
+import indicator_kernels as kernels
+
+# ⚙️ Strategy Parameters (the optimizer sweeps these; live, backtest and optimizer all read STRATEGY_PARAMS)
+EMA_FAST = 9
+EMA_SLOW = 20
+VOLUME_MULTIPLIER = 1.5
+ADX_THRESHOLD = 20
+
+STRATEGY_PARAMS = {
+    "ema_fast": EMA_FAST,
+    "ema_slow": EMA_SLOW,
+    "volume_multiplier": VOLUME_MULTIPLIER,
+    "adx_threshold": ADX_THRESHOLD
+}
+
+LOOKBACK_MARGIN = 50  # extra candles fetched on top of the strategy's warm-up
+
+# ⏳ Candles each indicator needs (for the given params) before its latest value matches full history
+INDICATOR_LOOKBACKS = {
+    "macd": lambda params, tolerance: kernels.macd_lookback(tolerance=tolerance),
+    "ema_fast": lambda params, tolerance: kernels.ema_lookback(params["ema_fast"], tolerance),
+    "ema_slow": lambda params, tolerance: kernels.ema_lookback(params["ema_slow"], tolerance),
+    "rsi": lambda params, tolerance: kernels.rsi_lookback(14, tolerance),
+    "bollinger": lambda params, tolerance: kernels.bollinger_lookback(20, tolerance),
+    "adx": lambda params, tolerance: kernels.adx_lookback(14, tolerance),
+    "volume": lambda params, tolerance: kernels.trailing_mean_lookback(19, tolerance)
+}
+
+# 📏 Closed candles the live signal needs: the slowest indicator, +1 for the previous-bar crosses, + margin
+def required_bars(params=None, tolerance=kernels.LOOKBACK_TOLERANCE, margin=LOOKBACK_MARGIN):
+    params = {**STRATEGY_PARAMS, **(params or {})}
+    return max(lookback(params, tolerance) for lookback in INDICATOR_LOOKBACKS.values()) + 1 + margin
 
 # 🔍 Volume Spike Detection
-def is_volume_spike(df, multiplier=1.5):
+def is_volume_spike(df, multiplier=None):
+    multiplier = STRATEGY_PARAMS["volume_multiplier"] if multiplier is None else multiplier
     try:
         recent_volume = df['volume'].iloc[-1]
         avg_volume = df['volume'].iloc[-20:-1].mean()
@@ -16,52 +48,51 @@ def is_volume_spike(df, multiplier=1.5):
         return False
 
 # 🔄 EMA 9/20 Cross Detection
-def analyze_ema_signal(df):
-    ema_9 = EMAIndicator(close=df['close'], window=9).ema_indicator()
-    ema_20 = EMAIndicator(close=df['close'], window=20).ema_indicator()
+def analyze_ema_signal(df, fast=None, slow=None):
+    fast = STRATEGY_PARAMS["ema_fast"] if fast is None else fast
+    slow = STRATEGY_PARAMS["ema_slow"] if slow is None else slow
+    ema_9 = kernels.ema(df['close'], fast)
+    ema_20 = kernels.ema(df['close'], slow)
 
-    if ema_9.iloc[-2] < ema_20.iloc[-2] and ema_9.iloc[-1] > ema_20.iloc[-1]:
+    if ema_9[-2] < ema_20[-2] and ema_9[-1] > ema_20[-1]:
         return "BUY"
-    elif ema_9.iloc[-2] > ema_20.iloc[-2] and ema_9.iloc[-1] < ema_20.iloc[-1]:
+    elif ema_9[-2] > ema_20[-2] and ema_9[-1] < ema_20[-1]:
         return "SELL"
     else:
         return "NEUTRAL"
 
 # 📉 MACD Signal
 def detect_macd_signal(df):
-    macd = MACD(close=df['close'])
-    macd_diff = macd.macd_diff()
+    macd_diff = kernels.macd(df['close'])[2]
 
-    if macd_diff.iloc[-2] < 0 and macd_diff.iloc[-1] > 0:
+    if macd_diff[-2] < 0 and macd_diff[-1] > 0:
         return "BUY"
-    elif macd_diff.iloc[-2] > 0 and macd_diff.iloc[-1] < 0:
+    elif macd_diff[-2] > 0 and macd_diff[-1] < 0:
         return "SELL"
     else:
         return "NEUTRAL"
 
 # 📊 RSI
 def get_rsi(df, period=14):
-    return RSIIndicator(close=df['close'], window=period).rsi()
+    return pd.Series(kernels.rsi(df['close'], period), index=df.index)
 
 # 🔠 ADX (Trend Strength)
 def get_adx(df):
     try:
-        adx = ADXIndicator(high=df['high'], low=df['low'], close=df['close'])
-        return adx.adx().iloc[-1]
+        adx = kernels.adx(df['high'], df['low'], df['close'])[-1]
+        return None if np.isnan(adx) else adx
     except:
         return None
 
 # 📀 Bollinger Band Signal
 def analyze_bollinger_signal(df):
     try:
-        bb = BollingerBands(close=df['close'], window=20, window_dev=2)
-        lower = bb.bollinger_lband()
-        upper = bb.bollinger_hband()
-        close = df['close']
+        _, upper, lower = kernels.bollinger(df['close'], 20, 2)
+        close = df['close'].iloc[-1]
 
-        if close.iloc[-1] < lower.iloc[-1]:
+        if close < lower[-1]:
             return "BUY"
-        elif close.iloc[-1] > upper.iloc[-1]:
+        elif close > upper[-1]:
             return "SELL"
         else:
             return "NEUTRAL"
@@ -90,56 +121,67 @@ def detect_pattern(df):
         print(f"⚠️ Pattern error: {e}")
         return "None"
 
+# ✅ News + indicator confirmation for one timeframe's readings (params overrides entries of STRATEGY_PARAMS)
+def confirm_signal(symbol, timeframe, readings, news_sentiment, params=None):
+    params = {**STRATEGY_PARAMS, **(params or {})}
+    signal = "WAIT"
+    reason = "No strong confirmation yet"
+    confirmed = False
+
+    if news_sentiment:
+        ns = news_sentiment.lower()
+        indicators = [readings["macd_signal"], readings["ema_signal"], readings["bollinger"]]
+        adx_value = readings["adx"]
+        pattern = readings["pattern"]
+
+        indicator_match = any(ind == "BUY" for ind in indicators) if ns == "bullish" else any(ind == "SELL" for ind in indicators)
+        volume_or_adx = readings["volume_ok"] or (adx_value is not None and adx_value >= params["adx_threshold"])
+
+        if ns == "bullish" and indicator_match and volume_or_adx:
+            confirmed = True
+            signal = "BUY"
+            reason = f"News BULLISH + indicator + Volume/ADX + Pattern: {pattern}"
+        elif ns == "bearish" and indicator_match and volume_or_adx:
+            confirmed = True
+            signal = "SELL"
+            reason = f"News BEARISH + indicator + Volume/ADX + Pattern: {pattern}"
+
+    return {
+        "symbol": symbol,
+        "timeframe": timeframe,
+        **readings,
+        "confirmed": confirmed,
+        "signal": signal,
+        "reason": reason
+    }
+
 # 🧠 Final Signal Generator per Timeframe
-def generate_trade_signal(symbol, df, timeframe, news_sentiment):
+def generate_trade_signal(symbol, df, timeframe, news_sentiment, params=None):
+    params = {**STRATEGY_PARAMS, **(params or {})}
     try:
         print(f"\n📊 Analyzing {symbol} | {timeframe} | Rows: {len(df)}")
 
         macd_signal = detect_macd_signal(df)
-        ema_signal = analyze_ema_signal(df)
+        ema_signal = analyze_ema_signal(df, params["ema_fast"], params["ema_slow"])
         rsi_series = get_rsi(df)
         rsi_latest = rsi_series.iloc[-1]
         boll_signal = analyze_bollinger_signal(df)
         pattern = detect_pattern(df)
-        vol_ok = is_volume_spike(df)
+        vol_ok = is_volume_spike(df, params["volume_multiplier"])
         adx_value = get_adx(df)
 
         print(f"📉 MACD: {macd_signal} | EMA: {ema_signal} | RSI: {rsi_latest:.2f} | BB: {boll_signal} | Pattern: {pattern} | Volume: {vol_ok} | ADX: {adx_value}")
 
-        signal = "WAIT"
-        reason = "No strong confirmation yet"
-        confirmed = False
-
-        if news_sentiment:
-            ns = news_sentiment.lower()
-            indicators = [macd_signal, ema_signal, boll_signal]
-
-            indicator_match = any(ind == "BUY" for ind in indicators) if ns == "bullish" else any(ind == "SELL" for ind in indicators)
-            volume_or_adx = vol_ok or (adx_value is not None and adx_value >= 20)
-
-            if ns == "bullish" and indicator_match and volume_or_adx:
-                confirmed = True
-                signal = "BUY"
-                reason = f"News BULLISH + indicator + Volume/ADX + Pattern: {pattern}"
-            elif ns == "bearish" and indicator_match and volume_or_adx:
-                confirmed = True
-                signal = "SELL"
-                reason = f"News BEARISH + indicator + Volume/ADX + Pattern: {pattern}"
-
-        return {
-            "symbol": symbol,
-            "timeframe": timeframe,
+        readings = {
             "macd_signal": macd_signal,
             "ema_signal": ema_signal,
             "rsi": rsi_latest,
             "bollinger": boll_signal,
             "pattern": pattern,
             "adx": adx_value,
-            "volume_ok": vol_ok,
-            "confirmed": confirmed,
-            "signal": signal,
-            "reason": reason
+            "volume_ok": vol_ok
         }
+        return confirm_signal(symbol, timeframe, readings, news_sentiment, params)
 
     except Exception as e:
         print(f"❌ Error in generate_trade_signal for {symbol} on {timeframe}: {e}")
@@ -158,31 +200,156 @@ def generate_trade_signal(symbol, df, timeframe, news_sentiment):
             "reason": "Error in analysis"
         }
 
-# 🔁 Multi-Timeframe Signal
-def analyze_technical(symbol, df_30m, df_1h, news_sentiment):
-    print(f"\n🔎 Multi-Timeframe Analysis: {symbol}")
+READING_KEYS = ["macd_signal", "ema_signal", "rsi", "bollinger", "pattern", "adx", "volume_ok"]
 
-    result_30m = generate_trade_signal(symbol, df_30m, "30m", news_sentiment)
-    result_1h = generate_trade_signal(symbol, df_1h, "1h", news_sentiment)
+# ✂️ Drop the still-open candle (Binance returns it as the last kline)
+def closed_candles(df, now=None):
+    if df.empty or "close_time" not in df.columns:
+        return df
+    now = now if now is not None else pd.Timestamp(time.time(), unit="s")
+    return df[df["close_time"] <= now]
 
-    tf_results = {
-        "30m": result_30m,
-        "1h": result_1h
-    }
+def _previous(values):
+    shifted = np.full(values.shape, np.nan)
+    shifted[..., 1:] = values[..., :-1]
+    return shifted
 
-    confirmed = [res for res in tf_results.values() if res.get("confirmed")]
+# ⚡ Indicator readings + confirmation for every bar, along the last axis (1-D series or 2-D symbols × bars)
+def signal_arrays(opens, highs, lows, closes, volumes, news_sentiment, params=None):
+    params = {**STRATEGY_PARAMS, **(params or {})}
+    shape = closes.shape
 
-    if confirmed:
-        final_signal = confirmed[0]["signal"]
-        final_reason = confirmed[0]["reason"]
-    else:
-        final_signal = "WAIT"
-        final_reason = "No strong confirmation yet"
+    # 📉 MACD + 🔄 EMA crosses (previous bar vs current bar)
+    macd_diff = kernels.macd(closes)[2]
+    macd_prev = _previous(macd_diff)
+    macd_signal = np.where((macd_prev < 0) & (macd_diff > 0), "BUY",
+                           np.where((macd_prev > 0) & (macd_diff < 0), "SELL", "NEUTRAL"))
+
+    ema_9 = kernels.ema(closes, params["ema_fast"])
+    ema_20 = kernels.ema(closes, params["ema_slow"])
+    ema_9_prev = _previous(ema_9)
+    ema_20_prev = _previous(ema_20)
+    ema_signal = np.where((ema_9_prev < ema_20_prev) & (ema_9 > ema_20), "BUY",
+                          np.where((ema_9_prev > ema_20_prev) & (ema_9 < ema_20), "SELL", "NEUTRAL"))
+
+    # 📊 RSI + 📀 Bollinger
+    rsi = kernels.rsi(closes)
+    _, upper, lower = kernels.bollinger(closes, 20, 2)
+    boll_signal = np.where(closes < lower, "BUY", np.where(closes > upper, "SELL", "NEUTRAL"))
+
+    # 🕯 Patterns (same rules as detect_pattern, applied to every bar)
+    prev_high = _previous(highs)
+    prev_low = _previous(lows)
+    doji = np.abs(opens - closes) / (highs - lows + 1e-9) < 0.1
+    hammer = (closes > opens) & (lows < np.minimum(prev_low, opens - (highs - closes) * 2))
+    star = (opens > closes) & (highs > np.maximum(prev_high, closes + (opens - lows) * 2))
+    pattern = np.where(doji, "Doji", np.where(hammer, "Hammer", np.where(star, "Shooting Star", "None")))
+    pattern[..., 0] = "None"
+
+    # 🔍 Volume spike vs the previous 19 candles
+    avg_volume = kernels.trailing_mean(volumes, 19)
+    multiplier = params["volume_multiplier"]
+    vol_ok = volumes > multiplier * avg_volume
+    # Running sums can differ from a plain slice mean in the last bit, so re-check near-ties exactly
+    for index in zip(*np.nonzero(np.abs(volumes - multiplier * avg_volume) <= 1e-9 * np.abs(volumes))):
+        k = index[-1]
+        vol_ok[index] = volumes[index] > multiplier * volumes[index[:-1] + (slice(max(k - 19, 0), k),)].mean()
+
+    # 🔠 ADX (needs 28 bars before it returns a value)
+    adx = kernels.adx(highs, lows, closes)
+    adx_ready = ~np.isnan(adx)
+
+    # 🧠 Confirmation (same rules as generate_trade_signal)
+    signal = np.full(shape, "WAIT", dtype=object)
+    reason = np.full(shape, "No strong confirmation yet", dtype=object)
+    confirmed = np.zeros(shape, dtype=bool)
+
+    if isinstance(news_sentiment, np.ndarray):
+        # 🗞 One sentiment per bar (sentiment_store.SENTIMENT_STORE.asof), broadcast like the candles
+        ns = np.broadcast_to(np.char.lower(news_sentiment.astype(str)), shape)
+        volume_or_adx = vol_ok | (adx_ready & (adx >= params["adx_threshold"]))
+        for mood, side in (("bullish", "BUY"), ("bearish", "SELL")):
+            indicator_match = (macd_signal == side) | (ema_signal == side) | (boll_signal == side)
+            matched = (ns == mood) & indicator_match & volume_or_adx
+            confirmed = confirmed | matched
+            signal[matched] = side
+            prefix = f"News {mood.upper()} + indicator + Volume/ADX + Pattern: "
+            reason[matched] = [prefix + p for p in pattern[matched]]
+    elif news_sentiment:
+        ns = news_sentiment.lower()
+        if ns in ("bullish", "bearish"):
+            side = "BUY" if ns == "bullish" else "SELL"
+            indicator_match = (macd_signal == side) | (ema_signal == side) | (boll_signal == side)
+            volume_or_adx = vol_ok | (adx_ready & (adx >= params["adx_threshold"]))
+            confirmed = indicator_match & volume_or_adx
+            signal[confirmed] = side
+            prefix = f"News {ns.upper()} + indicator + Volume/ADX + Pattern: "
+            reason[confirmed] = [prefix + p for p in pattern[confirmed]]
 
     return {
-        "symbol": symbol,
-        "signal": final_signal,
-        "reason": final_reason,
-        "news_sentiment": news_sentiment,
-        "details": tf_results
+        "macd_signal": macd_signal,
+        "ema_signal": ema_signal,
+        "rsi": rsi,
+        "bollinger": boll_signal,
+        "pattern": pattern,
+        "adx": adx,
+        "volume_ok": vol_ok,
+        "confirmed": confirmed,
+        "signal": signal,
+        "reason": reason
     }
+
+# ⚡ Whole-Series Signal Generator (vectorized)
+def generate_signal_series(symbol, df, timeframe, news_sentiment, params=None):
+    """
+    Computes every indicator once over the full frame and returns one row per bar.
+    Row k holds the same values generate_trade_signal(df.iloc[:k + 1]) would return
+    once the indicators are warmed up (ADX needs 28 bars).
+    params overrides entries of STRATEGY_PARAMS.
+    """
+    columns = [df[name].to_numpy(dtype=float) for name in ("open", "high", "low", "close", "volume")]
+    return pd.DataFrame(signal_arrays(*columns, news_sentiment, params), index=df.index)
+
+def _blank_panel(values, shape):
+    if values.dtype.kind == "f":
+        return np.full(shape, np.nan)
+    if values.dtype.kind == "b":
+        return np.zeros(shape, dtype=bool)
+    return np.full(shape, None if values.dtype == object else "", dtype=values.dtype)
+
+# 🧮 Every symbol of a candle_store.CandlePanel at once: {name: (symbols, bars) array}
+def generate_panel_signals(panel, news_sentiment, params=None):
+    """
+    Symbols are grouped by their first real bar so no kernel sees leading NaNs;
+    with a shared history that is a single call for the whole panel.
+    Bars a symbol doesn't have (mask False) come back as WAIT.
+    news_sentiment is one label, or per-bar labels shaped (times,) or (symbols, times).
+    """
+    n_symbols, n_bars = panel.mask.shape
+    out = None
+    first_valid = panel.first_valid()
+    for start in np.unique(first_valid[first_valid >= 0]):
+        rows = np.flatnonzero(first_valid == start)
+        if start == 0 and len(rows) == n_symbols:
+            # Shared history: the kernels' output already has the panel's shape
+            out = signal_arrays(*(panel[name] for name in ("open", "high", "low", "close", "volume")), news_sentiment, params)
+            break
+        columns = [panel[name][rows, start:] for name in ("open", "high", "low", "close", "volume")]
+        sentiment = news_sentiment
+        if isinstance(news_sentiment, np.ndarray):
+            # Per-bar sentiment: the whole panel's (times,) or (symbols, times), cut like the candles
+            sentiment = news_sentiment[start:] if news_sentiment.ndim == 1 else news_sentiment[rows, start:]
+        arrays = signal_arrays(*columns, sentiment, params)
+        if out is None:
+            out = {name: _blank_panel(values, (n_symbols, n_bars)) for name, values in arrays.items()}
+        for name, values in arrays.items():
+            out[name][rows, start:] = values
+
+    if out is None:
+        return {}
+    missing = ~panel.mask
+    out["confirmed"] &= panel.mask
+    out["volume_ok"] &= panel.mask
+    out["signal"][missing] = "WAIT"
+    out["reason"][missing] = "No candle"
+    return out
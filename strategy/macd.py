@@ -1,13 +1,13 @@
-import pandas as pd
+import indicator_kernels as kernels
 
 def calculate_macd(df, fast=12, slow=26, signal=9):
     """
-    Calculates MACD and signal line.
+    Calculates MACD and signal line (shared kernel, EMAs start at the first candle).
     """
-    df['ema_fast'] = df['close'].ewm(span=fast, adjust=False).mean()
-    df['ema_slow'] = df['close'].ewm(span=slow, adjust=False).mean()
+    df['ema_fast'] = kernels.ema(df['close'], fast, warmup=False)
+    df['ema_slow'] = kernels.ema(df['close'], slow, warmup=False)
     df['macd'] = df['ema_fast'] - df['ema_slow']
-    df['signal'] = df['macd'].ewm(span=signal, adjust=False).mean()
+    df['signal'] = kernels.ema(df['macd'], signal, warmup=False)
     return df
 
 def detect_macd_signal(df):
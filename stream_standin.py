@@ -0,0 +1,129 @@
+import argparse
+import asyncio
+import json
+import threading
+import time
+import numpy as np
+from aiohttp import web
+from price_data import INTERVAL_MS
+
+# 🧪 Local stand-in for Binance's combined WebSocket stream (/stream?streams=...)
+class StandInServer:
+    """
+    Serves aggTrade and kline events in Binance's message layout. Prices follow a
+    seeded random walk every `tick` seconds; push_price() injects an exact trade
+    (e.g. one that crosses a stop-loss) to every connected client at once.
+    """
+    def __init__(self, prices, host="127.0.0.1", port=8765, tick=0.2, volatility=0.001, seed=0):
+        self.prices = {symbol.upper(): float(price) for symbol, price in prices.items()}
+        self.host = host
+        self.port = port
+        self.tick = tick
+        self.volatility = volatility
+        self.rng = np.random.default_rng(seed)
+        self.candles = {}   # (symbol, interval) → open kline dict
+        self._clients = set()
+        self._loop = None
+        self._runner = None
+        self._ready = threading.Event()
+        self._thread = None
+
+    @property
+    def url(self):
+        return f"ws://{self.host}:{self.port}/stream"
+
+    def _events(self, symbol, price, now_ms):
+        events = [{"stream": f"{symbol.lower()}@aggTrade",
+                   "data": {"e": "aggTrade", "E": now_ms, "s": symbol, "p": str(price), "q": "0.01", "T": now_ms}}]
+        for (candle_symbol, interval), k in list(self.candles.items()):
+            if candle_symbol != symbol:
+                continue
+            step = INTERVAL_MS[interval]
+            if now_ms >= k["t"] + step:
+                # ⏹ The open candle closes before the new price starts the next one
+                k["x"] = True
+                events.append({"stream": f"{symbol.lower()}@kline_{interval}",
+                               "data": {"e": "kline", "E": now_ms, "s": symbol, "k": dict(k)}})
+                k = self.candles[(symbol, interval)] = self._new_candle(symbol, interval, now_ms, price)
+            k.update({"h": str(max(float(k["h"]), price)), "l": str(min(float(k["l"]), price)), "c": str(price),
+                      "v": str(float(k["v"]) + 0.01), "n": k["n"] + 1})
+            events.append({"stream": f"{symbol.lower()}@kline_{interval}",
+                           "data": {"e": "kline", "E": now_ms, "s": symbol, "k": dict(k)}})
+        return events
+
+    def _new_candle(self, symbol, interval, now_ms, price):
+        step = INTERVAL_MS[interval]
+        start = now_ms // step * step
+        return {"t": start, "T": start + step - 1, "s": symbol, "i": interval, "o": str(price), "h": str(price),
+                "l": str(price), "c": str(price), "v": "0", "n": 0, "x": False, "q": "0", "V": "0", "Q": "0"}
+
+    async def _broadcast(self, symbol, price):
+        self.prices[symbol] = price
+        messages = [(event["stream"], json.dumps(event)) for event in self._events(symbol, price, int(time.time() * 1000))]
+        for ws, streams in list(self._clients):
+            for stream, message in messages:
+                if stream in streams:
+                    try:
+                        await ws.send_str(message)
+                    except Exception:
+                        self._clients.discard((ws, streams))
+
+    async def _handler(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        streams = frozenset(request.query.get("streams", "").split("/"))
+        now_ms = int(time.time() * 1000)
+        for name in streams:
+            if "@kline_" in name:
+                symbol, interval = name.split("@kline_")
+                key = (symbol.upper(), interval)
+                if key not in self.candles and symbol.upper() in self.prices:
+                    self.candles[key] = self._new_candle(symbol.upper(), interval, now_ms, self.prices[symbol.upper()])
+        client = (ws, streams)
+        self._clients.add(client)
+        try:
+            async for _ in ws:
+                pass
+        finally:
+            self._clients.discard(client)
+        return ws
+
+    async def _random_walk(self):
+        while True:
+            await asyncio.sleep(self.tick)
+            for symbol, price in list(self.prices.items()):
+                await self._broadcast(symbol, round(price * float(np.exp(self.rng.normal(0, self.volatility))), 2))
+
+    async def serve(self):
+        self._loop = asyncio.get_running_loop()
+        app = web.Application()
+        app.router.add_get("/stream", self._handler)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        print(f"🧪 Stand-in stream on {self.url}")
+        self._ready.set()
+        if self.tick:
+            await self._random_walk()
+        else:
+            await asyncio.Event().wait()
+
+    # 💉 Send one trade at an exact price to every subscriber (thread-safe)
+    def push_price(self, symbol, price):
+        future = asyncio.run_coroutine_threadsafe(self._broadcast(symbol.upper(), float(price)), self._loop)
+        future.result(5)
+
+    def start(self):
+        self._thread = threading.Thread(target=lambda: asyncio.run(self.serve()), name="stream-standin", daemon=True)
+        self._thread.start()
+        self._ready.wait(5)
+        return self
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in for the Binance market stream")
+    parser.add_argument("--symbols", nargs="+", default=["BTCUSDT", "ETHUSDT", "SOLUSDT"])
+    parser.add_argument("--price", type=float, default=100.0)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--tick", type=float, default=0.2)
+    args = parser.parse_args()
+    asyncio.run(StandInServer({symbol: args.price for symbol in args.symbols}, port=args.port, tick=args.tick).serve())
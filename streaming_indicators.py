@@ -0,0 +1,291 @@
+import math
+from collections import deque
+import pandas as pd
+from signal_logic import STRATEGY_PARAMS, confirm_signal
+
+# ♻️ Base: state save/restore as plain JSON-friendly dicts
+class StreamingIndicator:
+    def get_state(self):
+        state = {}
+        for key, value in vars(self).items():
+            if isinstance(value, StreamingIndicator):
+                value = value.get_state()
+            elif isinstance(value, deque):
+                value = list(value)
+            state[key] = value
+        return state
+
+    def set_state(self, state):
+        for key, value in state.items():
+            current = getattr(self, key, None)
+            if isinstance(current, StreamingIndicator):
+                current.set_state(value)
+            elif isinstance(current, deque):
+                setattr(self, key, deque(value, maxlen=current.maxlen))
+            else:
+                setattr(self, key, value)
+        return self
+
+# 🔄 EMA (same recursion as pandas ewm(adjust=False) with min_periods=window)
+class StreamingEMA(StreamingIndicator):
+    def __init__(self, window, alpha=None):
+        self.alpha = alpha if alpha is not None else 2 / (window + 1)
+        self.min_periods = window
+        self.count = 0
+        self.ema = None
+
+    def update(self, x):
+        self.ema = x if self.ema is None else (1 - self.alpha) * self.ema + self.alpha * x
+        self.count += 1
+        return self.value
+
+    @property
+    def value(self):
+        return self.ema if self.count >= self.min_periods else None
+
+# 📉 MACD histogram (ta.trend.MACD.macd_diff)
+class StreamingMACD(StreamingIndicator):
+    def __init__(self, fast=12, slow=26, signal=9):
+        self.fast = StreamingEMA(fast)
+        self.slow = StreamingEMA(slow)
+        self.signal = StreamingEMA(signal)
+        self.diff = None
+
+    def update(self, close):
+        fast = self.fast.update(close)
+        slow = self.slow.update(close)
+        if fast is None or slow is None:
+            return None
+        macd = fast - slow
+        signal = self.signal.update(macd)
+        self.diff = macd - signal if signal is not None else None
+        return self.diff
+
+    @property
+    def value(self):
+        return self.diff
+
+# 📊 RSI (Wilder smoothing, ta.momentum.RSIIndicator)
+class StreamingRSI(StreamingIndicator):
+    def __init__(self, window=14):
+        self.up = StreamingEMA(window, alpha=1 / window)
+        self.down = StreamingEMA(window, alpha=1 / window)
+        self.prev_close = None
+        self.rsi = None
+
+    def update(self, close):
+        diff = 0.0 if self.prev_close is None else close - self.prev_close
+        self.prev_close = close
+        up = self.up.update(diff if diff > 0 else 0.0)
+        down = self.down.update(-diff if diff < 0 else 0.0)
+        if up is None or down is None:
+            self.rsi = None
+        elif down == 0:
+            self.rsi = 100.0
+        else:
+            self.rsi = 100 - (100 / (1 + up / down))
+        return self.rsi
+
+    @property
+    def value(self):
+        return self.rsi
+
+# 📀 Bollinger Bands (population std over the last window closes)
+class StreamingBollinger(StreamingIndicator):
+    def __init__(self, window=20, window_dev=2):
+        self.window_dev = window_dev
+        self.closes = deque(maxlen=window)
+        self.lower = None
+        self.upper = None
+
+    def update(self, close):
+        self.closes.append(close)
+        if len(self.closes) < self.closes.maxlen:
+            return None
+        mean = sum(self.closes) / len(self.closes)
+        std = math.sqrt(sum((c - mean) ** 2 for c in self.closes) / len(self.closes))
+        self.lower = mean - self.window_dev * std
+        self.upper = mean + self.window_dev * std
+        return self.lower, self.upper
+
+    @property
+    def value(self):
+        return None if self.lower is None else (self.lower, self.upper)
+
+# 🔠 ADX (same seeding and smoothing as ta.trend.ADXIndicator; first value on bar 2 * window)
+class StreamingADX(StreamingIndicator):
+    def __init__(self, window=14):
+        self.window = window
+        self.bars = 0
+        self.prev = None
+        self.trs = 0.0
+        self.dip = 0.0
+        self.din = 0.0
+        self.seed_dx = deque(maxlen=window)
+        self.adx = None
+
+    def update(self, high, low, close):
+        self.bars += 1
+        if self.prev is None:
+            self.prev = (high, low, close)
+            return None
+
+        prev_high, prev_low, prev_close = self.prev
+        self.prev = (high, low, close)
+        true_range = max(high, prev_close) - min(low, prev_close)
+        diff_up = high - prev_high
+        diff_down = prev_low - low
+        pos = diff_up if (diff_up > diff_down and diff_up > 0) else 0.0
+        neg = diff_down if (diff_down > diff_up and diff_down > 0) else 0.0
+
+        w = self.window
+        if self.bars <= w + 1:
+            # 🌱 Seed: plain sums over the first window moves
+            self.trs += true_range
+            self.dip += pos
+            self.din += neg
+            if self.bars < w + 1:
+                return None
+        else:
+            self.trs = self.trs - (self.trs / float(w)) + true_range
+            self.dip = self.dip - (self.dip / float(w)) + pos
+            self.din = self.din - (self.din / float(w)) + neg
+
+        di_pos = 100 * (self.dip / self.trs) if self.trs != 0 else 0
+        di_neg = 100 * (self.din / self.trs) if self.trs != 0 else 0
+        dx = 100 * abs((di_pos - di_neg) / (di_pos + di_neg)) if di_pos + di_neg != 0 else 0
+
+        if self.adx is None:
+            self.seed_dx.append(dx)
+            if len(self.seed_dx) == w:
+                self.adx = sum(self.seed_dx) / w
+                self.seed_dx.clear()
+        else:
+            self.adx = ((self.adx * (w - 1)) + dx) / float(w)
+        return self.adx
+
+    @property
+    def value(self):
+        return self.adx
+
+# 🔍 Volume vs the average of the previous candles
+class StreamingVolumeAverage(StreamingIndicator):
+    def __init__(self, window=19):
+        self.volumes = deque(maxlen=window)
+        self.average = None
+
+    def update(self, volume):
+        self.average = sum(self.volumes) / len(self.volumes) if self.volumes else None
+        self.volumes.append(volume)
+        return self.average
+
+    @property
+    def value(self):
+        return self.average
+
+# 🧠 Everything generate_trade_signal reads, updated one closed candle at a time
+class StreamingSignalEngine(StreamingIndicator):
+    def __init__(self, symbol, timeframe, params=None):
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.params = {**STRATEGY_PARAMS, **(params or {})}
+        self.ema_fast = StreamingEMA(self.params["ema_fast"])
+        self.ema_slow = StreamingEMA(self.params["ema_slow"])
+        self.macd = StreamingMACD()
+        self.rsi = StreamingRSI()
+        self.bollinger = StreamingBollinger()
+        self.adx = StreamingADX()
+        self.volume = StreamingVolumeAverage()
+        self.last_candle = None
+        self.prev_candle = None
+        self.readings = {}
+        self.open_time = None
+
+    def update(self, open_, high, low, close, volume, open_time=None):
+        # Plain floats in, so readings and get_state() stay JSON-friendly
+        open_, high, low, close, volume = float(open_), float(high), float(low), float(close), float(volume)
+        prev_macd = self.macd.value
+        prev_emas = (self.ema_fast.value, self.ema_slow.value)
+        macd_diff = self.macd.update(close)
+        ema_fast = self.ema_fast.update(close)
+        ema_slow = self.ema_slow.update(close)
+        rsi = self.rsi.update(close)
+        bands = self.bollinger.update(close)
+        adx = self.adx.update(high, low, close)
+        avg_volume = self.volume.update(volume)
+
+        self.prev_candle = self.last_candle
+        self.last_candle = (open_, high, low, close)
+        self.open_time = None if open_time is None else str(open_time)
+
+        macd_signal = "NEUTRAL"
+        if prev_macd is not None and macd_diff is not None:
+            if prev_macd < 0 and macd_diff > 0:
+                macd_signal = "BUY"
+            elif prev_macd > 0 and macd_diff < 0:
+                macd_signal = "SELL"
+
+        ema_signal = "NEUTRAL"
+        if None not in prev_emas and ema_fast is not None and ema_slow is not None:
+            if prev_emas[0] < prev_emas[1] and ema_fast > ema_slow:
+                ema_signal = "BUY"
+            elif prev_emas[0] > prev_emas[1] and ema_fast < ema_slow:
+                ema_signal = "SELL"
+
+        boll_signal = "NEUTRAL"
+        if bands is not None:
+            if close < bands[0]:
+                boll_signal = "BUY"
+            elif close > bands[1]:
+                boll_signal = "SELL"
+
+        self.readings = {
+            "macd_signal": macd_signal,
+            "ema_signal": ema_signal,
+            "rsi": rsi,
+            "bollinger": boll_signal,
+            "pattern": self.pattern(),
+            "adx": adx,
+            "volume_ok": avg_volume is not None and volume > self.params["volume_multiplier"] * avg_volume
+        }
+        return self.readings
+
+    # 🕯 Same rules as signal_logic.detect_pattern
+    def pattern(self):
+        if self.prev_candle is None:
+            return "None"
+        open_, high, low, close = self.last_candle
+        prev_high, prev_low = self.prev_candle[1], self.prev_candle[2]
+        if abs(open_ - close) / (high - low + 1e-9) < 0.1:
+            return "Doji"
+        elif close > open_ and (low < min(prev_low, open_ - (high - close) * 2)):
+            return "Hammer"
+        elif open_ > close and (high > max(prev_high, close + (open_ - low) * 2)):
+            return "Shooting Star"
+        return "None"
+
+    # ✅ Confirmation for the latest candle (signal_logic.confirm_signal on the current readings)
+    def signal(self, news_sentiment):
+        return confirm_signal(self.symbol, self.timeframe, self.readings, news_sentiment if self.readings else None,
+                              self.params)
+
+    # 🌱 Seed from a candle frame (oldest first)
+    def warm_up(self, df):
+        for open_time, o, h, l, c, v in zip(df.index, df["open"], df["high"], df["low"], df["close"], df["volume"]):
+            self.update(o, h, l, c, v, open_time)
+        return self
+
+    # 🔁 Feed the closed candles newer than the last one seen; a frame that doesn't reach
+    # back to it (first run, or a gap since) starts the engine over from the frame
+    def catch_up(self, df):
+        if self.open_time is not None and pd.Timestamp(self.open_time) in df.index:
+            df = df[df.index > pd.Timestamp(self.open_time)]
+        else:
+            self.__init__(self.symbol, self.timeframe, self.params)
+        self.warm_up(df)
+        return self.readings
+
+    @classmethod
+    def from_state(cls, state):
+        engine = cls(state["symbol"], state["timeframe"], state.get("params"))
+        return engine.set_state(state)
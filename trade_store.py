@@ -0,0 +1,153 @@
+import json
+import os
+import sqlite3
+import threading
+
+TRADE_DB_FILE = "trade_history.db"
+LEGACY_JSON_FILE = "trade_history.json"
+
+TRADE_COLUMNS = [
+    "timestamp", "symbol", "signal", "entry_price", "exit_price", "price",
+    "reason", "timeframe", "news_sentiment", "result"
+]
+
+INSERT_SQL = f"INSERT INTO trades ({', '.join(TRADE_COLUMNS)}, is_open) VALUES ({', '.join('?' * len(TRADE_COLUMNS))}, ?)"
+
+_conn = None
+_lock = threading.RLock()
+
+# 🔌 One shared connection (WAL: appends don't rewrite history, readers don't block the writer)
+def get_connection():
+    global _conn
+    if _conn is None:
+        with _lock:
+            if _conn is None:
+                conn = sqlite3.connect(TRADE_DB_FILE, check_same_thread=False)
+                conn.row_factory = sqlite3.Row
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS trades (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        timestamp TEXT,
+                        symbol TEXT,
+                        signal TEXT,
+                        entry_price REAL,
+                        exit_price REAL,
+                        price REAL,
+                        reason TEXT,
+                        timeframe TEXT,
+                        news_sentiment TEXT,
+                        result TEXT,
+                        is_open INTEGER NOT NULL DEFAULT 0
+                    )
+                """)
+                # 🔎 Finds the last open BUY for a symbol without scanning history
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_trades_open ON trades (symbol, signal, is_open, id)")
+                # 📒 Close events in order, so readers can pick up only trades closed since their checkpoint
+                has_closes = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'trade_closes'").fetchone()
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS trade_closes (
+                        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                        trade_id INTEGER NOT NULL
+                    )
+                """)
+                if not has_closes:
+                    conn.execute("INSERT INTO trade_closes (trade_id) SELECT id FROM trades WHERE exit_price IS NOT NULL ORDER BY id")
+                conn.commit()
+                _conn = conn
+                import_json(LEGACY_JSON_FILE)
+    return _conn
+
+# 🔒 Drop the shared connection (the next call reopens TRADE_DB_FILE, e.g. after a chdir)
+def close():
+    global _conn
+    with _lock:
+        if _conn is not None:
+            _conn.close()
+            _conn = None
+
+def _is_open(trade):
+    return 1 if trade.get("signal") == "BUY" and not trade.get("exit_price") else 0
+
+# 📥 One-time import of the old trade_history.json (skipped once the table has rows)
+def import_json(path=LEGACY_JSON_FILE):
+    conn = _conn or get_connection()
+    if not os.path.exists(path) or conn.execute("SELECT 1 FROM trades LIMIT 1").fetchone():
+        return 0
+    try:
+        with open(path, "r") as f:
+            trades = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        print(f"⚠️ Could not import {path}")
+        return 0
+
+    with _lock:
+        for t in trades:
+            _insert(conn, t)
+        conn.commit()
+    print(f"📥 Imported {len(trades)} trades from {path} into {TRADE_DB_FILE}")
+    return len(trades)
+
+def _insert(conn, trade):
+    cursor = conn.execute(INSERT_SQL, [trade.get(col) for col in TRADE_COLUMNS] + [_is_open(trade)])
+    if trade.get("exit_price") is not None:
+        conn.execute("INSERT INTO trade_closes (trade_id) VALUES (?)", (cursor.lastrowid,))
+    return cursor.lastrowid
+
+# ➕ Append one trade
+def insert_trade(trade):
+    conn = get_connection()
+    with _lock:
+        trade_id = _insert(conn, trade)
+        conn.commit()
+    return trade_id
+
+# 🔁 Set the exit price on the latest open BUY for a symbol (returns the row id or None)
+def close_open_buy(symbol, exit_price):
+    conn = get_connection()
+    with _lock:
+        row = conn.execute(
+            "SELECT id FROM trades WHERE symbol = ? AND signal = 'BUY' AND is_open = 1 ORDER BY id DESC LIMIT 1",
+            (symbol,)
+        ).fetchone()
+        if row is None:
+            return None
+        conn.execute("UPDATE trades SET exit_price = ?, is_open = 0 WHERE id = ?", (exit_price, row["id"]))
+        conn.execute("INSERT INTO trade_closes (trade_id) VALUES (?)", (row["id"],))
+        conn.commit()
+    return row["id"]
+
+def _row_to_trade(row):
+    trade = {col: row[col] for col in TRADE_COLUMNS}
+    if trade["result"] is None:
+        trade.pop("result")
+    return trade
+
+# 📜 All trades, oldest first (same dicts trade_history.json held)
+def load_trades():
+    conn = get_connection()
+    return [_row_to_trade(row) for row in conn.execute("SELECT * FROM trades ORDER BY id")]
+
+def count_trades():
+    return get_connection().execute("SELECT COUNT(*) FROM trades").fetchone()[0]
+
+# 📒 Trades that got an exit price after close event after_seq, as (seq, trade) in close order
+def load_closed_trades(after_seq=0):
+    conn = get_connection()
+    rows = conn.execute(
+        "SELECT c.seq AS close_seq, t.* FROM trade_closes c JOIN trades t ON t.id = c.trade_id WHERE c.seq > ? ORDER BY c.seq",
+        (after_seq,)
+    )
+    return [(row["close_seq"], _row_to_trade(row)) for row in rows]
+
+# 🪪 Fingerprint of the close log (its first close event and that trade), None while empty;
+# a checkpoint taken on another (recreated or migrated) database won't match it
+def close_log_identity():
+    row = get_connection().execute(
+        "SELECT c.seq, c.trade_id, t.timestamp FROM trade_closes c JOIN trades t ON t.id = c.trade_id ORDER BY c.seq LIMIT 1"
+    ).fetchone()
+    return None if row is None else f"{row['seq']}:{row['trade_id']}:{row['timestamp']}"
+
+def last_close_seq():
+    return get_connection().execute("SELECT COALESCE(MAX(seq), 0) FROM trade_closes").fetchone()[0]